@@ -3,10 +3,10 @@
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton, QLabel,
     QLineEdit, QTextEdit, QTableWidget, QTableWidgetItem, QHBoxLayout, QMessageBox,
-    QListWidget, QListWidgetItem, QInputDialog, QTabWidget, QCheckBox
+    QListView, QInputDialog, QTabWidget, QCheckBox, QComboBox, QProgressBar
 )
 
-from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal, QAbstractListModel, QModelIndex
 from datetime import datetime
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
@@ -14,25 +14,88 @@ import numpy as np
 import requests
 import time
 import sys
+import argparse
+import ast
 import hmac
+import html
 import hashlib
 import base64
+import bisect
+import heapq
 import urllib.parse
 import csv
+import gzip
+import io
+import json
+import logging
+import logging.handlers
+import math
+import mmap
+import os
+import struct
+import tracemalloc
+import queue
+import random
+import sqlite3
+import threading
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from contextlib import nullcontext
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import MappingProxyType
 
 # ----------------- Globale Konfiguration -----------------
 LAST_TRADE_TIME = {}
 LAST_BUY_PRICE = {}
 TRADE_COOLDOWN_SECONDS = 60
 TRADE_PAIRS = {"XETHZEUR": 0.01, "SOLEUR": 0.2}
+PENDING_REMOVAL = set()  # aus der Config entfernt, aber noch Position offen: keine Käufe mehr, Abbau abwarten
 PRICE_HISTORY = {pair: [] for pair in TRADE_PAIRS}
-SIMUL_ASSETS = {pair: 0.0 for pair in TRADE_PAIRS}
-SIMUL_WALLET_VALUE = 1000.0
-TRADES = []
+SIMUL_START_EUR = "1000"  # Startguthaben im SIMUL-Modus (Wallet und Bestände: siehe Festkomma-Beträge)
+TRADES_MAXLEN = 500  # Einträge im Speicher, ältere landen im Archiv (JOURNAL_DB_PATH)
 SIMUL = True
 STOP_LOSS_DYNAMIC = 0.02
 TAKE_PROFIT_DYNAMIC = 0.03
+TRAILING_STOP_DYNAMIC = None  # z.B. 0.015 = 1,5% unter Höchstkurs seit Kauf; None = aus
+RISK_POLL_SECONDS = 2  # Ticker-Abfrage für Paare mit offenen Lots zwischen zwei Zyklen
+BREAKER_FAILURE_THRESHOLD = 3  # Fehler in Folge, bis ein Endpoint gesperrt wird
+BREAKER_BASE_SECONDS = 5       # erste Sperrzeit, verdoppelt sich bei jedem fehlgeschlagenen Probe-Request
+BREAKER_MAX_SECONDS = 300
+SCREENER_ENABLED = False
+SCREENER_QUOTE = "EUR"            # beobachtet alle Paare mit dieser Quote-Währung
+SCREENER_TOP_N = 5                # so viele Paare werden automatisch aktiv geschaltet
+SCREENER_ORDER_EUR = 25.0         # Ordergröße für hochgestufte Paare
+SCREENER_MIN_VOLUME_EUR = 100000.0  # Mindestumsatz der letzten 24h
+SCREENER_PROMOTE_SECONDS = 300    # Rangliste wird so oft in TRADE_PAIRS übernommen
+SCREENER_UNIVERSE_SECONDS = 3600  # Paarliste (AssetPairs) neu laden
+SCREENER_WINDOW = 100             # Ticker-Samples je Paar, wie PRICE_HISTORY
+CANDLE_TIMEFRAMES = {"1m": 60, "5m": 300, "1h": 3600}
+CANDLE_MAXLEN = 1000            # Kerzen je Zeitrahmen im Speicher
+INDICATOR_TIMEFRAME = None      # None = Indikatoren auf Roh-Ticks (bisheriges Verhalten), sonst z.B. "1m"
+TRADE_FEED_ENABLED = True
+TRADE_FEED_INTERVAL_SECONDS = 15  # Trades-Abfrage je Paar (öffentlicher Endpoint, Rate-Limit beachten)
+TRADE_FEED_MAX_PAGES = 5          # je Abfrage höchstens so viele 1000er-Seiten nachholen
+TRADE_FLOW_WINDOW_SECONDS = 300   # Fenster für VWAP, Volumen und Kauf-/Verkaufsdruck
+MIN_FLOW_VOLUME_EUR = 0.0         # Kaufsignal nur bei so viel Umsatz im Fenster (0 = aus)
+MIN_BUY_IMBALANCE = None          # z.B. -0.2: Kauf nur, wenn der Verkaufsdruck nicht stärker ist (None = aus)
+CORRELATION_TIMEFRAME = "5m"      # Renditen je abgeschlossener Kerze dieses Zeitrahmens
+CORRELATION_WINDOW = 288          # rollendes Fenster in Kerzen (288 x 5m = 1 Tag)
+MAX_PORTFOLIO_EXPOSURE_EUR = None   # Summe aller Positionen inkl. neuer Order (None = aus)
+MAX_CORRELATED_EXPOSURE_EUR = None  # Order + mit max(Korrelation, 0) gewichtete Positionen (None = aus)
+MAX_PORTFOLIO_RISK_EUR = None       # Standardabweichung des Portfolios je Kerze, sqrt(x'Σx) (None = aus)
+ASSET_PAIRS_CACHE_PATH = "asset_pairs.json"
+ASSET_PAIRS_TTL_SECONDS = 24 * 3600  # danach wird bedingt (ETag/Last-Modified) neu geladen
+ASSET_PAIRS_RETRY_SECONDS = 60  # Wartezeit nach fehlgeschlagenem Laden
 REENTRY_THRESHOLD = 0.01
+STRATEGY = "default"  # diese Strategie handelt; alle weiteren aus STRATEGY_RULES laufen mit und zählen nur Signale
+STRATEGY_RULES = {
+    "default": {"buy": "rsi < 30 and price < lower and trend > 0 and price <= fib618",
+                "sell": "rsi > 70 and price > upper and trend < 0"},
+}
+PRICE_HISTORY_LEN = 100  # Ticks je Paar für die Indikatoren
 RSI_PERIOD = 14
 BOLLINGER_PERIOD = 20
 BOLLINGER_STD = 2.0
@@ -41,20 +104,2127 @@ LAST_TRADE_PRICE = {}
 MIN_PROFIT_EUR = 10.0
 MIN_PROFIT_PCT = 1.0
 CHART_LINES = {}
-LAST_LOGGED_TRADE = None
-chart_window_instance = None
 SAFE_BALANCES = {}  # Erlaubte Sockelbeträge geschützter Assets
 SAFE_ASSET_ALLOW_SELL = {}  # Dict: Asset -> Checkbox true/false
+LEDGER_MODE = "fifo"  # "fifo" oder "avg" (Durchschnittskosten)
+VOLUME_EPSILON = 1e-12
+JOURNAL_DB_PATH = "trade_journal.db"
+JOURNAL_CSV_PATH = "trade_log.csv"  # Export für die Steuer
+JOURNAL_FLUSH_SECONDS = 1.0
+CHECKPOINT_PATH = "bot_state.ckpt"
+CHECKPOINT_INTERVAL_SECONDS = 30
+RESTORED_STATE = False
+LOG_PATH = "tradebot.log"
+LOG_FILE_LEVEL = logging.DEBUG
+LOG_CONSOLE_LEVEL = logging.INFO
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+LOG_RATE_LIMITS = {"cooldown": 0.2, "reentry": 0.2, "profit": 0.2}  # Meldungen/s je Kategorie und Paar
+METRICS_ENABLED = False  # oder Startoption --metrics
+METRICS_PORT = 9108      # http://127.0.0.1:9108/metrics (Prometheus), /metrics.csv
+METRICS_CSV_PATH = "metrics.csv"
+PROFILE_DIR = "profiles"
+PROFILE_INTERVAL = 0.01        # Stack-Samples alle 10 ms
+PROFILE_ALLOC_INTERVAL = 60    # tracemalloc-Vergleich höchstens einmal pro Minute
+PROFILE_ALLOC_TOP = 25
+CONFIG_PATH = "bot_config.json"  # optionale Strategie-Konfiguration, wird im Betrieb neu geladen
+CONFIG_POLL_SECONDS = 2
+
+# ----------------- Logging (Queue-Handler, JSON-Datei, Rate-Limits) -----------------
+log = logging.getLogger("tradebot")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for key in ("category", "pair", "tick", "dropped"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """Token-Bucket je (Kategorie, Paar); läuft im aufrufenden Thread, also vor dem Enqueue."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self.buckets = {}
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, "category", None))
+        if rate is None:
+            return True
+        key = (record.category, getattr(record, "pair", None))
+        now = time.monotonic()
+        tokens, last, dropped = self.buckets.get(key, (1.0, now, 0))
+        tokens = min(1.0, tokens + (now - last) * rate)
+        if tokens < 1.0:
+            self.buckets[key] = (tokens, now, dropped + 1)
+            return False
+        if dropped:
+            record.dropped = dropped  # unterdrückte Meldungen seit der letzten
+        self.buckets[key] = (tokens - 1.0, now, 0)
+        return True
+
+
+def setup_logging():
+    """Datei- und Konsolenausgabe laufen im Listener-Thread; der Handel schreibt nur in die Queue."""
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+    file_handler.setLevel(LOG_FILE_LEVEL)
+    file_handler.setFormatter(JsonFormatter())
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(LOG_CONSOLE_LEVEL)
+    console.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(LOG_RATE_LIMITS))
+    log.addHandler(queue_handler)
+    log.setLevel(min(LOG_FILE_LEVEL, LOG_CONSOLE_LEVEL))
+    log.propagate = False
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+# ----------------- Metriken (Histogramme, Zähler, Gauges) -----------------
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # letzter Eintrag: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        # Obergrenze des Buckets, in den das Quantil fällt
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+def _escape_label(value):
+    # Prometheus-Textformat: Backslash, Anführungszeichen und Zeilenumbruch im Labelwert escapen
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Ist die Instrumentierung aus, kehrt jeder Aufruf sofort zurück (timer() liefert einen
+    geteilten nullcontext). Gauges sind Callbacks und kosten erst beim Abruf."""
+    _NULL = nullcontext()
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}  # (Name, Labels) -> Histogram
+        self.counters = {}    # (Name, Labels) -> Wert
+        self.gauges = {}      # Name -> Callback, liefert {Labels: Wert}
+        self.server = None
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def timer(self, name, **labels):
+        if not self.enabled:
+            return self._NULL
+        return _MetricsTimer(self, name, labels)
+
+    def gauge(self, name, callback):
+        self.gauges[name] = callback
+
+    def _gauge_values(self):
+        for name, callback in list(self.gauges.items()):
+            try:
+                values = callback()
+            except Exception as e:
+                log.debug("Gauge %s fehlgeschlagen: %s", name, e)
+                continue
+            for labels, value in values.items():
+                yield name, labels, value
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        items = list(labels) + list(extra)
+        if not items:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in items) + "}"
+
+    def render_prometheus(self):
+        with self.lock:
+            histograms = {k: (h.buckets, list(h.counts), h.sum, h.count) for k, h in self.histograms.items()}
+            counters = dict(self.counters)
+        lines, typed = [], set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        for (name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, n in zip(buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{self._labels(labels)} {total}")
+            lines.append(f"{name}_count{self._labels(labels)} {count}")
+        for name, labels, value in self._gauge_values():
+            if name not in typed:
+                lines.append(f"# TYPE {name} gauge")
+                typed.add(name)
+            lines.append(f"{name}{self._labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def csv_rows(self):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.lock:
+            for (name, labels), hist in sorted(self.histograms.items()):
+                mean = hist.sum / hist.count if hist.count else 0.0
+                yield [now, name, self._labels(labels), "histogram", hist.count, hist.sum, mean,
+                       hist.quantile(0.5), hist.quantile(0.9), hist.quantile(0.99)]
+            for (name, labels), value in sorted(self.counters.items()):
+                yield [now, name, self._labels(labels), "counter", value, "", "", "", "", ""]
+        for name, labels, value in self._gauge_values():
+            yield [now, name, self._labels(labels), "gauge", value, "", "", "", "", ""]
+
+    def dump_csv(self, path=METRICS_CSV_PATH):
+        new_file = not os.path.exists(path)
+        with open(path, mode="a", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            if new_file:
+                writer.writerow(["time", "name", "labels", "type", "count_or_value", "sum", "mean", "p50", "p90", "p99"])
+            writer.writerows(self.csv_rows())
+
+    def serve(self, port=METRICS_PORT):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, ctype = metrics.render_prometheus(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.csv":
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(metrics.csv_rows())
+                    body, ctype = buffer.getvalue(), "text/csv"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=self.server.serve_forever, name="Metrics", daemon=True).start()
+        log.info("Metriken unter http://127.0.0.1:%d/metrics", port)
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+
+
+class _MetricsTimer:
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+METRICS = Metrics()
+
+
+def register_gauges():
+    METRICS.gauge("price_history_length", lambda: {(("pair", p),): len(h) for p, h in list(PRICE_HISTORY.items())})
+    METRICS.gauge("chart_series_length", lambda: {(("pair", p),): len(c) for p, c in list(CHART_SERIES.items())})
+    METRICS.gauge("open_lots", lambda: {(("pair", p),): sum(1 for _ in l.open_lots()) for p, l in list(LEDGER.pairs.items())})
+    METRICS.gauge("trade_history_entries", lambda: {(): len(TRADES)})
+    METRICS.gauge("journal_queue_depth", lambda: {(): JOURNAL.queue.qsize()})
+    METRICS.gauge("command_queue_depth", lambda: {(): STATE.commands.qsize()})
+    METRICS.gauge("kraken_breaker_state", BREAKERS.states)  # 0 closed, 1 half_open, 2 open
+    METRICS.gauge("portfolio_exposure_eur", lambda: {(): total_exposure()})
+
+
+# ----------------- Profiler (Stack-Sampling, tracemalloc) -----------------
+class SamplingProfiler:
+    """Sampelt die Stacks aller Threads (Bot, GUI, Hilfsthreads) aus einem eigenen Thread und schreibt
+    sie im Collapsed-Format für Flamegraphs (flamegraph.pl, speedscope). Optional vergleicht er zwischen
+    zwei Bot-Zyklen tracemalloc-Snapshots und schreibt die größten Zuwächse."""
+
+    def __init__(self, interval=PROFILE_INTERVAL, out_dir=PROFILE_DIR):
+        self.interval = interval
+        self.out_dir = out_dir
+        self.counts = {}
+        self.samples = 0
+        self.running = False
+        self.thread = None
+        self.trace_alloc = False
+        self.alloc_snapshot = None
+        self.alloc_last = 0.0
+        self.alloc_lock = threading.Lock()  # Checkpoint (Bot-Thread) gegen stop() (GUI-Thread)
+        self.labels = {}  # code -> "name (datei:zeile)", einmal je Code-Objekt formatiert
+        self.started = None
+
+    def start(self, trace_alloc=False):
+        if self.running:
+            return
+        self.counts = {}
+        self.samples = 0
+        self.started = datetime.now()
+        self.running = True
+        if trace_alloc:
+            with self.alloc_lock:
+                tracemalloc.start(16)
+                self.alloc_snapshot = tracemalloc.take_snapshot()
+                self.alloc_last = time.monotonic()
+                self.trace_alloc = True
+        self.thread = threading.Thread(target=self._run, name="Profiler", daemon=True)
+        self.thread.start()
+        log.info("Profiler gestartet (%.0f Hz%s).", 1 / self.interval, ", tracemalloc" if trace_alloc else "")
+
+    def stop(self):
+        """Beendet das Sampling und gibt die geschriebenen Dateien zurück."""
+        if not self.running:
+            return []
+        self.running = False
+        self.thread.join(timeout=2)
+        self.thread = None
+        paths = [self._write_stacks()]
+        with self.alloc_lock:
+            if self.trace_alloc:
+                paths.append(self._write_alloc_report(tracemalloc.take_snapshot()))
+                self.trace_alloc = False
+                tracemalloc.stop()
+                self.alloc_snapshot = None
+        log.info("Profiler gestoppt: %d Samples, %s", self.samples, ", ".join(paths))
+        return paths
+
+    def _run(self):
+        me = threading.get_ident()
+        labels = self.labels
+        while self.running:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def _path(self, prefix, suffix):
+        os.makedirs(self.out_dir, exist_ok=True)
+        return os.path.join(self.out_dir, f"{prefix}-{self.started:%Y%m%d-%H%M%S}{suffix}")
+
+    def _write_stacks(self):
+        path = self._path("stacks", ".folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.counts.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def alloc_checkpoint(self):
+        """Vom Bot-Thread zwischen zwei Zyklen aufgerufen; kostet nur etwas, wenn tracemalloc läuft."""
+        if not self.trace_alloc or time.monotonic() - self.alloc_last < PROFILE_ALLOC_INTERVAL:
+            return
+        with self.alloc_lock:
+            if self.trace_alloc:  # stop() kann zwischen Prüfung und Lock gelaufen sein
+                self._write_alloc_report(tracemalloc.take_snapshot())
+
+    def _write_alloc_report(self, snapshot):
+        path = self._path("alloc", ".txt")
+        current, peak = tracemalloc.get_traced_memory()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"=== {datetime.now():%Y-%m-%d %H:%M:%S}  aktuell {current / 1e6:.1f} MB, Spitze {peak / 1e6:.1f} MB\n")
+            f.write("-- Zuwachs seit letztem Snapshot --\n")
+            for stat in snapshot.compare_to(self.alloc_snapshot, "lineno")[:PROFILE_ALLOC_TOP]:
+                f.write(f"{stat}\n")
+            f.write("-- Größte Allokationen --\n")
+            for stat in snapshot.statistics("lineno")[:PROFILE_ALLOC_TOP]:
+                f.write(f"{stat}\n")
+            f.write("\n")
+        self.alloc_snapshot = snapshot
+        self.alloc_last = time.monotonic()
+        return path
+
+
+PROFILER = SamplingProfiler()
+
+
+# ----------------- Tick-to-Trade-Latenz -----------------
+LATENCY_STAGES = ("fetch", "batch_fetch", "indicators", "decision", "order", "tick_to_trade")
+LATENCY_WINDOW = 2048  # Ticks je Stufe für die Perzentile
+
+
+class TickTrace:
+    """Monotone Zeitstempel eines Ticks: Anfrage, Empfang, Indikatoren, Entscheidung, Order-Bestätigung.
+    requested=None: Kurs kam aus dem Sammel-Ticker (eigene Stufe batch_fetch), received = Beginn der Auswertung."""
+    __slots__ = ("pair", "requested", "received", "computed", "decided", "acked")
+
+    def __init__(self, pair, requested):
+        self.pair = pair
+        self.requested = requested
+        self.received = None
+        self.computed = None
+        self.decided = None
+        self.acked = None
+
+    def stages(self):
+        stages = {}
+        if self.received is not None and self.requested is not None:
+            stages["fetch"] = self.received - self.requested
+        if self.computed is not None:
+            stages["indicators"] = self.computed - self.received
+            if self.decided is not None:
+                stages["decision"] = self.decided - self.computed
+        if self.acked is not None and self.decided is not None:
+            stages["order"] = self.acked - self.decided
+            stages["tick_to_trade"] = self.acked - self.received
+        return stages
+
+    def journal_fields(self):
+        # (fetch_ms, decide_ms, order_ms, tick_to_trade_ms) für TradeRecord
+        def ms(start, end):
+            return round((end - start) * 1000, 3) if start is not None and end is not None else None
+        return (ms(self.requested, self.received), ms(self.received, self.decided),
+                ms(self.decided, self.acked), ms(self.received, self.acked))
+
+
+class StageStats:
+    __slots__ = ("values", "pos", "count", "total", "max")
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.values = array("d", bytes(8 * window))
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.values[self.pos] = seconds
+        self.pos = (self.pos + 1) % len(self.values)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def recent(self):
+        return sorted(self.values[:min(self.count, len(self.values))])
+
+
+class LatencyTracker:
+    def __init__(self, window=LATENCY_WINDOW):
+        self.stats = {stage: StageStats(window) for stage in LATENCY_STAGES}
+
+    def record(self, trace):
+        if trace.computed is not None and trace.decided is None:
+            trace.decided = time.monotonic()  # kein Trade: Entscheidung fällt mit Ende der Auswertung
+        for stage, seconds in trace.stages().items():
+            self.observe(stage, seconds)
+
+    def observe(self, stage, seconds):
+        self.stats[stage].add(seconds)
+        METRICS.observe("tick_stage_seconds", seconds, stage=stage)
+
+    def report(self):
+        lines = [f"{'Stufe':<14}{'n':>8}{'Ø ms':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"]
+        for stage, stats in self.stats.items():
+            values = stats.recent()
+            if not values:
+                lines.append(f"{stage:<14}{0:>8}")
+                continue
+
+            def pct(q):
+                return values[min(len(values) - 1, int(q * len(values)))] * 1000
+            lines.append(f"{stage:<14}{stats.count:>8}{stats.total / stats.count * 1000:>9.2f}"
+                         f"{pct(0.5):>9.2f}{pct(0.9):>9.2f}{pct(0.99):>9.2f}{stats.max * 1000:>9.2f}")
+        return "\n".join(lines)
+
+
+LATENCY = LatencyTracker()
+
+
+# ----------------- Circuit-Breaker (Backoff mit Jitter je Endpoint) -----------------
+class Backoff:
+    """Exponentielle Wartezeit base * 2^n bis cap, zufällig aus [d/2, d] gezogen (Jitter)."""
+
+    def __init__(self, base=None, cap=None):
+        self.base = base
+        self.cap = cap
+        self.attempts = 0
+
+    def next(self):
+        base = BREAKER_BASE_SECONDS if self.base is None else self.base
+        cap = BREAKER_MAX_SECONDS if self.cap is None else self.cap
+        delay = min(cap, base * 2 ** min(self.attempts, 20))
+        self.attempts += 1
+        return random.uniform(delay / 2, delay)
+
+    def reset(self):
+        self.attempts = 0
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """closed -> (N Fehler) -> open -> (Wartezeit um) -> half_open: genau ein Probe-Request.
+    Erfolg schließt den Breaker, Fehler öffnet ihn mit verdoppelter Wartezeit."""
+    STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+    def __init__(self, name):
+        self.name = name
+        self.state = "closed"
+        self.failures = 0
+        self.retry_at = 0.0
+        self.probing = False
+        self.last_error = ""
+        self.backoff = Backoff()
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() < self.retry_at:
+                    return False
+                self._set_state("half_open")
+            if self.probing:
+                return False
+            self.probing = True
+            return True
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.probing = False
+            if self.state != "closed":
+                self.backoff.reset()
+                self._set_state("closed")
+                log.info("Endpoint %s wieder erreichbar.", self.name)
+
+    def failure(self, error):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            self.last_error = str(error)
+            if self.state == "half_open" or self.failures >= BREAKER_FAILURE_THRESHOLD:
+                delay = self.backoff.next()
+                self.retry_at = time.monotonic() + delay
+                if self.state != "open":
+                    log.warning("Endpoint %s gesperrt für %.0fs: %s", self.name, delay, error)
+                self._set_state("open")
+
+    def release(self):
+        # Probe-Request kam nicht zustande (übergeordneter Breaker offen), zählt nicht als Ergebnis
+        with self.lock:
+            self.probing = False
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            METRICS.inc("breaker_transitions_total", endpoint=self.name, state=state)
+
+    def describe(self):
+        if self.state == "open":
+            return f"{self.name} gesperrt ({max(0.0, self.retry_at - time.monotonic()):.0f}s)"
+        return f"{self.name} {self.state}"
+
+
+class BreakerRegistry:
+    def __init__(self):
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def get(self, name):
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            with self.lock:
+                breaker = self.breakers.setdefault(name, CircuitBreaker(name))
+        return breaker
+
+    def states(self):
+        return {(("endpoint", b.name),): CircuitBreaker.STATES[b.state] for b in list(self.breakers.values())}
+
+    def unhealthy(self):
+        return [b for b in list(self.breakers.values()) if b.state != "closed"]
+
+    def remove(self, name):
+        with self.lock:
+            self.breakers.pop(name, None)
+
+
+BREAKERS = BreakerRegistry()
+
+
+# ----------------- Kassetten (Aufnahme/Wiedergabe öffentlicher Kraken-Antworten) -----------------
+class CassetteMiss(Exception):
+    pass
+
+
+class Cassette:
+    """Zeichnet Antworten öffentlicher Endpoints als gzip-JSON-Lines auf bzw. spielt sie offline ab.
+    Index: (Methode, Pfad, sortierte Parameter) -> Antworten in Aufnahmereihenfolge; ist eine Folge
+    aufgebraucht, wird die letzte Antwort wiederholt. Private Endpoints werden nie aufgezeichnet."""
+    VERSION = 1
+    KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+    def __init__(self, path, mode, timing=False):
+        self.path = path
+        self.mode = mode  # "record" oder "replay"
+        self.timing = timing
+        self.lock = threading.Lock()
+        self.index = {}
+        self.replayed = 0
+        self.file = None
+        if mode == "record":
+            # In eine Teildatei schreiben und erst bei close() umbenennen: ein Absturz hinterlässt keine halbe Kassette
+            self.file = gzip.open(path + ".part", "wt", encoding="utf-8")
+            self.file.write(json.dumps({"version": self.VERSION, "created": time.time()}) + "\n")
+        else:
+            self._load()
+
+    @staticmethod
+    def key(method, url_path, params):
+        return f"{method} {url_path} {json.dumps(params or {}, sort_keys=True)}"
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != self.VERSION:
+                raise ValueError(f"Kassette {self.path}: Version {header.get('version')} nicht unterstützt")
+            try:
+                for line in f:
+                    entry = json.loads(line)
+                    self.index.setdefault(entry["key"], deque()).append(entry)
+            except (EOFError, gzip.BadGzipFile, zlib.error, ValueError) as e:
+                # Abgeschnittene Aufnahme (Absturz beim Aufnehmen): alles bis zur letzten vollständigen Zeile nutzen
+                log.warning("Kassette %s abgeschnitten (%s), nutze die vollständigen Einträge.", self.path, e)
+        log.info("Kassette %s geladen: %d Anfragen.", self.path, sum(len(v) for v in self.index.values()))
+
+    def record(self, method, url_path, params, response, elapsed):
+        if not url_path.startswith("/0/public/"):
+            return
+        entry = {
+            "key": self.key(method, url_path, params),
+            "status": response.status_code,
+            "headers": {h: response.headers[h] for h in self.KEPT_HEADERS if h in response.headers},
+            "body": response.text,
+            "elapsed": round(elapsed, 6),
+        }
+        with self.lock:
+            self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    def replay(self, method, url_path, params):
+        key = self.key(method, url_path, params)
+        with self.lock:
+            entries = self.index.get(key)
+            if not entries:
+                raise CassetteMiss(f"nicht in der Kassette: {key}")
+            entry = entries.popleft() if len(entries) > 1 else entries[0]
+            self.replayed += 1
+        if self.timing:
+            time.sleep(entry["elapsed"])
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers.update(entry["headers"])
+        response._content = entry["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.url = f"{KRAKEN_API_URL}{url_path}"
+        return response
+
+    def close(self):
+        if self.file is not None:
+            with self.lock:
+                self.file.close()
+                self.file = None
+                os.replace(self.path + ".part", self.path)
+
+
+CASSETTE = None  # wird per --record/--replay gesetzt
+
+
+# ----------------- Kraken-Transport -----------------
+KRAKEN_TRANSIENT_ERRORS = ("EService:", "EAPI:Rate limit", "EGeneral:Temporary lockout", "EGeneral:Internal error")
+
+
+def _transient_failure(response):
+    # Ausfälle und Drosselung zählen, fachliche Fehler (ungültiger Key, unbekanntes Paar) nicht
+    if response.status_code == 429 or response.status_code >= 500:
+        return f"HTTP {response.status_code}"
+    if response.status_code != 200:
+        return None
+    try:
+        errors = response.json().get("error") or []
+    except ValueError:
+        return "keine gültige JSON-Antwort"
+    for error in errors:
+        if error.startswith(KRAKEN_TRANSIENT_ERRORS):
+            return error
+    return None
+
+
+def kraken_request(method, url_path, **kwargs):
+    """Alle REST-Aufrufe laufen hier durch (Latenz- und Fehlermetriken, Circuit-Breaker je Endpoint)."""
+    endpoint = url_path.rsplit("/", 1)[-1]
+    breaker = BREAKERS.get(endpoint)
+    if not breaker.allow():
+        METRICS.inc("kraken_errors_total", endpoint=endpoint, kind="circuit_open")
+        raise CircuitOpenError(breaker.describe())
+    try:
+        with METRICS.timer("kraken_request_seconds", endpoint=endpoint):
+            if CASSETTE is not None and CASSETTE.mode == "replay":
+                response = CASSETTE.replay(method, url_path, kwargs.get("params"))
+            else:
+                started = time.perf_counter()
+                response = requests.request(method, f"{KRAKEN_API_URL}{url_path}", timeout=10, **kwargs)
+                if CASSETTE is not None:
+                    CASSETTE.record(method, url_path, kwargs.get("params"), response, time.perf_counter() - started)
+    except CassetteMiss:
+        METRICS.inc("kraken_errors_total", endpoint=endpoint, kind="cassette_miss")
+        breaker.release()  # fehlende Aufnahme ist kein Ausfall des Endpoints
+        raise
+    except Exception as e:
+        METRICS.inc("kraken_errors_total", endpoint=endpoint, kind="transport")
+        breaker.failure(e)
+        raise
+    if response.status_code not in (200, 304):
+        METRICS.inc("kraken_errors_total", endpoint=endpoint, kind=f"http_{response.status_code}")
+    error = _transient_failure(response)
+    if error:
+        breaker.failure(error)
+    else:
+        breaker.success()
+    return response
+
+
+# ----------------- Festkomma-Beträge (skalierte Ganzzahlen) -----------------
+# Intern wird mit ganzen Zahlen in festen Einheiten gerechnet: Mengen in 1e-8, Preise in 1e-10, EUR in 1e-8.
+# Menge x Preis ist damit exakt (1e-18). Die Dezimalen aus AssetPairs gelten nur für Orders und Ausgabe.
+VOLUME_DECIMALS = 8
+PRICE_DECIMALS = 10
+QUOTE_DECIMALS = 8
+COST_DECIMALS = VOLUME_DECIMALS + PRICE_DECIMALS
+_POW10 = [10 ** i for i in range(40)]
+
+
+def _div_round(n, d, rounding):
+    q, r = divmod(n, d)
+    if not r or rounding == "floor":
+        return q
+    if rounding == "ceil":
+        return q + 1
+    twice = 2 * r  # half_even
+    return q + 1 if twice > d or (twice == d and q & 1) else q
+
+
+def to_units(value, decimals, rounding="half_even"):
+    """str/int/float exakt in ganze Einheiten von 10**-decimals. Floats zählen mit ihrer kürzesten
+    Dezimaldarstellung (0.1 -> "0.1"), nicht mit dem Binärwert."""
+    if isinstance(value, int):
+        return value * _POW10[decimals]
+    if isinstance(value, float):
+        scaled = value * _POW10[decimals]
+        # Schnellpfad: weit unter 2**53 liegt der Rundungsfehler weit unter 0.01 Einheiten;
+        # nur Grenzfälle (nahe .5 bzw. nahe ganzzahlig bei floor/ceil) gehen über den String
+        if -3e13 < scaled < 3e13:
+            units = round(scaled)
+            frac = abs(scaled - units)
+            if rounding == "half_even":
+                if frac < 0.49:
+                    return units
+            elif frac > 0.01:
+                return math.floor(scaled) if rounding == "floor" else math.ceil(scaled)
+        value = repr(value)
+    text = value.strip().lower()
+    mantissa, _, exponent = text.partition("e")
+    sign = -1 if mantissa.startswith("-") else 1
+    whole, _, frac = mantissa.lstrip("+-").partition(".")
+    if not (whole + frac).isdigit():
+        raise ValueError(f"kein Betrag: {value!r}")
+    shift = decimals - len(frac) + (int(exponent) if exponent else 0)
+    digits = sign * int(whole + frac)  # Vorzeichen vor dem Runden, sonst kippen floor/ceil
+    if shift >= 0:
+        return digits * 10 ** shift
+    return _div_round(digits, 10 ** -shift, rounding)
+
+
+def rescale_units(units, decimals, to_decimals, rounding="half_even"):
+    if to_decimals >= decimals:
+        return units * _POW10[to_decimals - decimals]
+    return _div_round(units, _POW10[decimals - to_decimals], rounding)
+
+
+def round_units(units, decimals, places, rounding="half_even"):
+    """Auf places Nachkommastellen runden, Skala bleibt decimals."""
+    if places >= decimals:
+        return units
+    step = _POW10[decimals - places]
+    return _div_round(units, step, rounding) * step
+
+
+def cost_units(volume_units, price_units, rounding="half_even"):
+    """Menge x Preis in EUR-Einheiten (QUOTE_DECIMALS)."""
+    return _div_round(volume_units * price_units, _POW10[COST_DECIMALS - QUOTE_DECIMALS], rounding)
+
+
+def format_units(units, decimals):
+    """Exakte Dezimaldarstellung, ohne Umweg über float."""
+    digits = str(abs(units)).rjust(decimals + 1, "0")
+    sign = "-" if units < 0 else ""
+    return f"{sign}{digits[:-decimals]}.{digits[-decimals:]}" if decimals else sign + digits
+
+
+def _strip_zeros(text):
+    return text.rstrip("0").rstrip(".") if "." in text else text
+
+
+class Amount:
+    """Unveränderlicher Festkomma-Betrag (units x 10**-decimals) für Wallet, Bestände und Ausgaben.
+    Im Tick-Pfad wird direkt mit .units gerechnet."""
+    __slots__ = ("units", "decimals")
+
+    def __init__(self, units=0, decimals=QUOTE_DECIMALS):
+        self.units = units
+        self.decimals = decimals
+
+    @classmethod
+    def parse(cls, value, decimals, rounding="half_even"):
+        if isinstance(value, Amount):
+            return value.rescale(decimals, rounding)
+        return cls(to_units(value, decimals, rounding), decimals)
+
+    def rescale(self, decimals, rounding="half_even"):
+        if decimals == self.decimals:
+            return self
+        return Amount(rescale_units(self.units, self.decimals, decimals, rounding), decimals)
+
+    def _align(self, other):
+        if not isinstance(other, Amount):
+            other = Amount.parse(other, self.decimals)
+        decimals = max(self.decimals, other.decimals)
+        return (self.units * _POW10[decimals - self.decimals],
+                other.units * _POW10[decimals - other.decimals], decimals)
+
+    def __add__(self, other):
+        a, b, decimals = self._align(other)
+        return Amount(a + b, decimals)
+
+    def __sub__(self, other):
+        a, b, decimals = self._align(other)
+        return Amount(a - b, decimals)
+
+    def __neg__(self):
+        return Amount(-self.units, self.decimals)
+
+    def __eq__(self, other):
+        if not isinstance(other, (Amount, int, float, str)):
+            return NotImplemented
+        a, b, _ = self._align(other)
+        return a == b
+
+    def __lt__(self, other):
+        a, b, _ = self._align(other)
+        return a < b
+
+    def __le__(self, other):
+        a, b, _ = self._align(other)
+        return a <= b
+
+    def __gt__(self, other):
+        a, b, _ = self._align(other)
+        return a > b
+
+    def __ge__(self, other):
+        a, b, _ = self._align(other)
+        return a >= b
+
+    def __hash__(self):
+        return hash(self.units / _POW10[self.decimals])
+
+    def __bool__(self):
+        return self.units != 0
+
+    def __float__(self):
+        return self.units / _POW10[self.decimals]  # int/int rundet korrekt
+
+    def __str__(self):
+        return format_units(self.units, self.decimals)
+
+    def __repr__(self):
+        return f"Amount('{self}')"
+
+    def __format__(self, spec):
+        return format(float(self), spec) if spec else str(self)
+
+
+SIMUL_ASSETS = {pair: Amount(0, VOLUME_DECIMALS) for pair in TRADE_PAIRS}
+SIMUL_WALLET_VALUE = Amount.parse(SIMUL_START_EUR, QUOTE_DECIMALS)
+
+
+# ----------------- AssetPairs-Katalog (Disk-Cache, Namensauflösung, Ordergrößen) -----------------
+@dataclass(frozen=True, slots=True)
+class PairInfo:
+    name: str          # REST-Name, z.B. XETHZEUR
+    altname: str       # ETHEUR
+    wsname: str        # ETH/EUR
+    base: str          # XETH (wie in /Balance)
+    quote: str         # ZEUR
+    lot_decimals: int
+    pair_decimals: int
+    ordermin: float
+    costmin: float
+
+
+class AssetPairCatalog:
+    """AssetPairs einmal laden, auf Platte cachen und als Hash-Indizes vorhalten.
+    Alle Lookups (REST-/alt-/ws-Name, Base/Quote, Dezimalen, ordermin) sind O(1)."""
+
+    def __init__(self, path=ASSET_PAIRS_CACHE_PATH):
+        self.path = path
+        self.pairs = {}     # REST-Name -> PairInfo
+        self.aliases = {}   # REST-/alt-/ws-Name -> REST-Name
+        self.by_quote = {}  # Quote-Asset -> [REST-Namen]
+        self.raw = {}
+        self.fetched_at = 0.0
+        self.retry_at = 0.0  # nach einem Fehlschlag nicht bei jedem Tick erneut anfragen
+        self.etag = None
+        self.last_modified = None
+        self.lock = threading.Lock()
+
+    def load_cache(self):
+        if self.path is None:  # nur im Speicher (z.B. beim Aufnehmen/Abspielen von Kassetten)
+            return False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            log.warning("AssetPairs-Cache unlesbar (%s), wird neu geladen.", e)
+            return False
+        self.etag = cached.get("etag")
+        self.last_modified = cached.get("last_modified")
+        self._index(cached["result"], cached["fetched_at"])
+        return True
+
+    def ensure(self, max_age=None):
+        """Lädt neu, wenn der Stand älter als max_age (Standard: TTL) ist; bei Fehlern bleibt der alte Stand."""
+        max_age = ASSET_PAIRS_TTL_SECONDS if max_age is None else max_age
+        if not self.pairs:
+            self.load_cache()
+        if time.time() - self.fetched_at > max_age and time.monotonic() >= self.retry_at:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.retry_at = time.monotonic() + ASSET_PAIRS_RETRY_SECONDS
+                log.warning("AssetPairs konnten nicht geladen werden (neuer Versuch in %ds): %s",
+                            ASSET_PAIRS_RETRY_SECONDS, e)
+        return self
+
+    def refresh(self):
+        with self.lock:
+            headers = {}
+            if self.pairs and self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.pairs and self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+            response = kraken_request("GET", "/0/public/AssetPairs", headers=headers)
+            if response.status_code == 304:
+                self.fetched_at = time.time()
+                self._save()
+                return
+            response.raise_for_status()
+            data = response.json()
+            if data.get("error"):
+                raise RuntimeError(data["error"])
+            self.etag = response.headers.get("ETag")
+            self.last_modified = response.headers.get("Last-Modified")
+            self._index(data["result"], time.time())
+            self._save()
+            log.info("AssetPairs aktualisiert: %d Paare.", len(self.pairs))
+
+    def _index(self, result, fetched_at):
+        pairs, aliases, by_quote = {}, {}, {}
+        for name, info in result.items():
+            if name.endswith(".d") or info.get("status", "online") != "online":
+                continue  # Darkpool- und abgeschaltete Paare sind nicht handelbar
+            entry = PairInfo(
+                name=name,
+                altname=info.get("altname", name),
+                wsname=info.get("wsname", ""),
+                base=info.get("base", ""),
+                quote=info.get("quote", ""),
+                lot_decimals=int(info.get("lot_decimals", 8)),
+                pair_decimals=int(info.get("pair_decimals", 8)),
+                ordermin=float(info.get("ordermin") or 0.0),
+                costmin=float(info.get("costmin") or 0.0),
+            )
+            pairs[name] = entry
+            for alias in (name, entry.altname, entry.wsname):
+                if alias:
+                    aliases[alias] = name
+            by_quote.setdefault(entry.quote, []).append(name)
+        # Referenzen erst am Ende tauschen: Leser sehen immer einen vollständigen Stand
+        self.pairs, self.aliases, self.by_quote = pairs, aliases, by_quote
+        self.raw = result
+        self.fetched_at = fetched_at
+
+    def _save(self):
+        if self.path is None:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": self.fetched_at, "etag": self.etag,
+                       "last_modified": self.last_modified, "result": self.raw}, f)
+        os.replace(tmp, self.path)
+
+    def resolve(self, name):
+        return self.pairs.get(self.aliases.get(name, name))
+
+    def base(self, pair):
+        info = self.resolve(pair)
+        return info.base if info else None
+
+    def names(self):
+        return sorted(self.pairs)
+
+    def pairs_for_quote(self, quote):
+        return sorted(self.by_quote.get(quote, []) + self.by_quote.get("Z" + quote, []))
+
+    def normalize_order(self, pair, volume, price):
+        """Menge und Preis als Festkomma-Einheiten (VOLUME_/PRICE_DECIMALS): Menge auf lot_decimals abrunden,
+        Preis auf pair_decimals runden, gegen ordermin/costmin prüfen (ValueError statt Kraken-Ablehnung)."""
+        volume_units = to_units(volume, VOLUME_DECIMALS, "floor")
+        price_units = to_units(price, PRICE_DECIMALS)
+        info = self.resolve(pair)
+        if info is None:
+            return volume_units, price_units  # Katalog nicht geladen: Kraken prüft selbst
+        volume_units = round_units(volume_units, VOLUME_DECIMALS, info.lot_decimals, "floor")
+        price_units = round_units(price_units, PRICE_DECIMALS, info.pair_decimals)
+        if volume_units <= 0 or volume_units < to_units(info.ordermin, VOLUME_DECIMALS):
+            raise ValueError(f"Volumen {volume} unter Mindestmenge {info.ordermin} für {pair}")
+        cost = cost_units(volume_units, price_units)
+        if info.costmin and cost < to_units(info.costmin, QUOTE_DECIMALS):
+            raise ValueError(f"Ordervolumen {format_units(cost, QUOTE_DECIMALS)} unter Mindestwert {info.costmin} für {pair}")
+        return volume_units, price_units
+
+    def format_volume(self, pair, volume_units):
+        info = self.resolve(pair)
+        if info is None:
+            return _strip_zeros(format_units(volume_units, VOLUME_DECIMALS))
+        return format_units(rescale_units(volume_units, VOLUME_DECIMALS, info.lot_decimals, "floor"), info.lot_decimals)
+
+    def format_price(self, pair, price_units):
+        info = self.resolve(pair)
+        if info is None:
+            return _strip_zeros(format_units(price_units, PRICE_DECIMALS))  # keine 10 Nachkommastellen an Kraken
+        return format_units(rescale_units(price_units, PRICE_DECIMALS, info.pair_decimals), info.pair_decimals)
+
+
+ASSET_PAIRS = AssetPairCatalog()
+
+
+# ----------------- Positions-Ledger (offene Lots, PnL) -----------------
+class PairLots:
+    """Offene Lots eines Paares mit laufenden Aggregaten, damit Kostenbasis und PnL O(1) bleiben.
+    Mengen/Preise in Festkomma-Einheiten (VOLUME_/PRICE_DECIMALS), Kosten und PnL in 1e-18 EUR – exakt."""
+    __slots__ = ("mode", "volumes", "prices", "head", "base", "open_units", "cost_units", "realized_units", "fills")
+
+    def __init__(self, mode="fifo"):
+        self.mode = mode
+        self.volumes = array("q")  # nur FIFO: Restmenge je Lot
+        self.prices = array("q")   # nur FIFO: Einstandspreis je Lot
+        self.head = 0              # erstes noch offenes Lot (kein pop(0))
+        self.base = 0              # Lot-Nummer von volumes[0]; Nummern bleiben über Abschneiden stabil
+        self.open_units = 0
+        self.cost_units = 0
+        self.realized_units = 0
+        self.fills = 0
+
+    # Float-Sicht für Anzeige, Risiko-Engine und Indikatoren
+    @property
+    def open_volume(self):
+        return self.open_units / _POW10[VOLUME_DECIMALS]
+
+    @property
+    def cost_basis(self):
+        return self.cost_units / _POW10[COST_DECIMALS]
+
+    @property
+    def realized_pnl(self):
+        return self.realized_units / _POW10[COST_DECIMALS]
+
+    def avg_price(self):
+        return self.cost_units / (self.open_units * _POW10[PRICE_DECIMALS]) if self.open_units else 0.0
+
+    def unrealized_pnl(self, price):
+        return (self.open_units * to_units(price, PRICE_DECIMALS) - self.cost_units) / _POW10[COST_DECIMALS]
+
+    def next_lot(self):
+        """Nummer, die der nächste Kauf bekommt (nur FIFO) – dieselbe führt die Risiko-Engine."""
+        return self.base + len(self.volumes) if self.mode == "fifo" else None
+
+    def open_lots(self):
+        for i in range(self.head, len(self.volumes)):
+            if self.volumes[i]:
+                yield self.base + i, self.volumes[i], self.prices[i]
+
+    def buy(self, volume, price):
+        self.fills += 1
+        self.open_units += volume
+        self.cost_units += volume * price
+        if self.mode == "fifo":
+            self.volumes.append(volume)
+            self.prices.append(price)
+
+    def _avg_cost(self, volume):
+        # Anteil der Kostenbasis; der letzte Rest geht vollständig mit, damit nichts liegen bleibt
+        if volume == self.open_units:
+            return self.cost_units
+        return _div_round(self.cost_units * volume, self.open_units, "half_even")
+
+    def sell_cost(self, volume):
+        # Kostenbasis der Menge, die ein Verkauf auflösen würde – ohne zu buchen
+        volume = min(volume, self.open_units)
+        if self.mode != "fifo":
+            return self._avg_cost(volume)
+        cost, rest, i = 0, volume, self.head
+        while rest > 0 and i < len(self.volumes):
+            take = min(rest, self.volumes[i])
+            cost += take * self.prices[i]
+            rest -= take
+            i += 1
+        return cost
+
+    def sell(self, volume, price, lot=None):
+        # Bestände ohne bekannte Kostenbasis (z.B. Altbestand im Real-Modus) werden nicht bewertet
+        volume = min(volume, self.open_units)
+        if volume <= 0:
+            return 0
+        self.fills += 1
+        if self.mode == "fifo":
+            cost, rest = 0, volume
+            i = lot - self.base if lot is not None else -1
+            if self.head <= i < len(self.volumes):
+                # Ausgelöster Trigger: genau dieses Lot schließen wie die Risiko-Engine, Rest FIFO
+                take = min(rest, self.volumes[i])
+                cost += take * self.prices[i]
+                rest -= take
+                self.volumes[i] -= take
+            while rest > 0 and self.head < len(self.volumes):
+                lot = self.volumes[self.head]
+                take = min(rest, lot)
+                cost += take * self.prices[self.head]
+                rest -= take
+                if lot > take:
+                    self.volumes[self.head] = lot - take
+                else:
+                    self.head += 1
+            while self.head < len(self.volumes) and not self.volumes[self.head]:
+                self.head += 1  # gezielt geschlossene Lots überspringen
+        else:
+            cost = self._avg_cost(volume)
+
+        pnl = volume * price - cost
+        self.realized_units += pnl
+        self.open_units -= volume
+        self.cost_units -= cost
+        if not self.open_units:
+            self.cost_units = 0
+            self._clear_lots()
+        elif self.head > 64 and self.head * 2 > len(self.volumes):
+            # Verbrauchte Lots gelegentlich abschneiden (amortisiert O(1))
+            del self.volumes[:self.head]
+            del self.prices[:self.head]
+            self.base += self.head
+            self.head = 0
+        return pnl
+
+    def _clear_lots(self):
+        self.base += len(self.volumes)
+        self.volumes = array("q")
+        self.prices = array("q")
+        self.head = 0
+
+
+class PositionLedger:
+    def __init__(self, mode=LEDGER_MODE):
+        self.mode = mode
+        self.pairs = {}
+        self.realized_units = 0
+
+    @property
+    def realized_pnl(self):
+        return self.realized_units / _POW10[COST_DECIMALS]
+
+    def get(self, pair):
+        return self.pairs.get(pair)
+
+    def lots(self, pair):
+        lots = self.pairs.get(pair)
+        if lots is None:
+            lots = self.pairs[pair] = PairLots(self.mode)
+        return lots
+
+    def record(self, pair, side, volume, price, lot=None):
+        """volume/price in Festkomma-Einheiten; liefert den realisierten PnL in 1e-18 EUR.
+        lot: beim Verkauf das ausgelöste Lot (sonst FIFO)."""
+        lots = self.lots(pair)
+        if side == "buy":
+            lots.buy(volume, price)
+            return 0
+        pnl = lots.sell(volume, price, lot)
+        self.realized_units += pnl
+        return pnl
+
+    def open_volume(self, pair):
+        lots = self.pairs.get(pair)
+        return lots.open_volume if lots else 0.0
+
+    def open_units(self, pair):
+        lots = self.pairs.get(pair)
+        return lots.open_units if lots else 0
+
+    def next_lot(self, pair):
+        return self.lots(pair).next_lot()
+
+    def unrealized_pnl(self, pair, price):
+        lots = self.pairs.get(pair)
+        return lots.unrealized_pnl(price) if lots else 0.0
+
+    def remove(self, pair):
+        lots = self.pairs.pop(pair, None)
+        if lots:
+            self.realized_units -= lots.realized_units
+
+    def reset(self):
+        self.pairs.clear()
+        self.realized_units = 0
+
+
+LEDGER = PositionLedger()
+
+
+# ----------------- Risiko-Engine (Stop-Loss / Take-Profit / Trailing je Lot) -----------------
+class PairTriggers:
+    """Sortierte Auslöser der offenen Lots eines Paares.
+
+    Stops liegen in einem Max-Heap, Take-Profits in einem Min-Heap (geschlossene Lots werden
+    beim Erreichen der Heap-Spitze verworfen). Trailing-Stops: Lots sind nach Kaufreihenfolge
+    nummeriert, der Höchstkurs seit Kauf fällt von alt nach neu monoton. Zusammenhängende Lots
+    mit gleichem Höchstkurs bilden eine Gruppe (peak, erstes Lot); neue Hochs verschmelzen
+    Gruppen von rechts, Trailing-Stops feuern von links.
+    """
+    __slots__ = ("lots", "next_id", "stops", "takes", "trail_groups", "pending")
+
+    def __init__(self):
+        self.lots = {}            # lot_id -> [Restmenge, Einstand] in Kaufreihenfolge
+        self.next_id = 0
+        self.stops = []           # (-stop, lot_id)
+        self.takes = []           # (take, lot_id)
+        self.trail_groups = deque()  # [peak, erstes lot_id], peak fällt nach rechts
+        self.pending = {}         # ausgelöst, Verkauf läuft noch: lot_id -> Trailing-Peak oder None
+
+    def open(self, volume, price, lot_id=None):
+        # lot_id aus dem Ledger (FIFO), damit beide Bücher dasselbe Lot schließen
+        if lot_id is None:
+            lot_id = self.next_id
+        self.next_id = max(self.next_id, lot_id + 1)
+        self.lots[lot_id] = [volume, price]
+        self._arm(lot_id, price)
+        if TRAILING_STOP_DYNAMIC:
+            if self.trail_groups and self.trail_groups[-1][0] <= price:
+                self._raise_peak(price)
+            else:
+                self.trail_groups.append([price, lot_id])
+        return lot_id
+
+    def _arm(self, lot_id, entry):
+        heapq.heappush(self.stops, (-entry * (1 - STOP_LOSS_DYNAMIC), lot_id))
+        heapq.heappush(self.takes, (entry * (1 + TAKE_PROFIT_DYNAMIC), lot_id))
+
+    def close(self, volume, lot_id=None):
+        # Mit lot_id: gezielt (ausgelöster Trigger), sonst FIFO wie im Ledger
+        if lot_id is not None:
+            lot = self.lots.get(lot_id)
+            if lot is not None:
+                lot[0] -= volume
+                if lot[0] <= VOLUME_EPSILON:
+                    del self.lots[lot_id]
+            self.pending.pop(lot_id, None)
+            self._compact()
+            return
+        rest = volume
+        while rest > VOLUME_EPSILON and self.lots:
+            lot_id = next(iter(self.lots))
+            lot = self.lots[lot_id]
+            take = min(rest, lot[0])
+            lot[0] -= take
+            rest -= take
+            if lot[0] <= VOLUME_EPSILON:
+                del self.lots[lot_id]
+                self.pending.pop(lot_id, None)
+        self._compact()
+
+    def _compact(self):
+        # Verwaiste Heap-Einträge wegräumen, bevor sie die Heaps dominieren
+        if len(self.stops) > 2 * len(self.lots) + 32:
+            self.stops = [e for e in self.stops if e[1] in self.lots]
+            heapq.heapify(self.stops)
+            self.takes = [e for e in self.takes if e[1] in self.lots]
+            heapq.heapify(self.takes)
+        if self.lots:
+            oldest = next(iter(self.lots))
+            while len(self.trail_groups) > 1 and self.trail_groups[1][1] <= oldest:
+                self.trail_groups.popleft()
+        else:
+            self.trail_groups.clear()
+
+    def _raise_peak(self, price):
+        # Alle Gruppen mit niedrigerem Höchstkurs sind ein Suffix -> zu einer Gruppe verschmelzen
+        first = None
+        while self.trail_groups and self.trail_groups[-1][0] <= price:
+            first = self.trail_groups.pop()[1]
+        if first is not None:
+            self.trail_groups.append([price, first])
+
+    def _fire(self, lot_id, kind, level, fired, peak=None):
+        if lot_id not in self.lots:
+            return
+        if lot_id in self.pending:
+            if peak is not None:
+                self.pending[lot_id] = peak  # Trailing-Gruppe ist weg, bei rearm() wiederherstellen
+            return
+        self.pending[lot_id] = peak
+        fired.append((lot_id, self.lots[lot_id][0], kind, level))
+
+    def on_price(self, price):
+        fired = []
+        while self.stops and -self.stops[0][0] >= price:
+            stop, lot_id = heapq.heappop(self.stops)
+            self._fire(lot_id, "stop_loss", -stop, fired)
+        while self.takes and self.takes[0][0] <= price:
+            take, lot_id = heapq.heappop(self.takes)
+            self._fire(lot_id, "take_profit", take, fired)
+        if TRAILING_STOP_DYNAMIC and self.trail_groups:
+            self._raise_peak(price)
+            # Älteste Gruppe hat den höchsten Peak und damit das höchste Stop-Level
+            while self.trail_groups and price <= self.trail_groups[0][0] * (1 - TRAILING_STOP_DYNAMIC):
+                peak, first = self.trail_groups.popleft()
+                end = self.trail_groups[0][1] if self.trail_groups else self.next_id
+                for lot_id in range(first, end):
+                    self._fire(lot_id, "trailing_stop", peak * (1 - TRAILING_STOP_DYNAMIC), fired, peak)
+        return fired
+
+    def rearm(self, lot_id):
+        # Verkauf fehlgeschlagen: Lot bleibt offen und wird beim nächsten Preis erneut geprüft
+        peak = self.pending.pop(lot_id, None)
+        lot = self.lots.get(lot_id)
+        if lot is None:
+            return False
+        self._arm(lot_id, lot[1])
+        if peak is not None:
+            # Selten (nur nach Fehlern): Gruppe an ihrer Position wieder einfügen, O(n) ist hier in Ordnung
+            i = bisect.bisect_right([first for _, first in self.trail_groups], lot_id)
+            self.trail_groups.insert(i, [peak, lot_id])
+        return True
+
+    def nearest(self):
+        stop = -self.stops[0][0] if self.stops else None
+        take = self.takes[0][0] if self.takes else None
+        return stop, take
+
+
+class RiskEngine:
+    """Hält die Trigger-Indizes aller Paare; jeder eintreffende Preis feuert nur die überschrittenen Lots."""
+
+    def __init__(self):
+        self.pairs = {}
+        self.lock = threading.Lock()
+
+    def on_fill(self, pair, side, volume, price, lot_id=None):
+        with self.lock:
+            triggers = self.pairs.setdefault(pair, PairTriggers())
+            if side == "buy":
+                triggers.open(volume, price, lot_id)
+            else:
+                triggers.close(volume, lot_id)
+
+    def on_price(self, pair, price):
+        """Liefert [(lot_id, Menge, Art, Level)] der durch diesen Preis ausgelösten Lots."""
+        with self.lock:
+            triggers = self.pairs.get(pair)
+            return triggers.on_price(price) if triggers and triggers.lots else []
+
+    def rearm(self, pair, lot_id):
+        """False, wenn das Lot inzwischen geschlossen ist."""
+        with self.lock:
+            triggers = self.pairs.get(pair)
+            return triggers.rearm(lot_id) if triggers else False
+
+    def armed_pairs(self):
+        with self.lock:
+            return [pair for pair, triggers in self.pairs.items() if triggers.lots]
+
+    def nearest(self, pair):
+        with self.lock:
+            triggers = self.pairs.get(pair)
+            return triggers.nearest() if triggers else (None, None)
+
+    def remove(self, pair):
+        with self.lock:
+            self.pairs.pop(pair, None)
+
+    def reset(self):
+        with self.lock:
+            self.pairs.clear()
+
+    def sync_from_ledger(self, ledger):
+        """Trigger nach einem Wiederanlauf aus den offenen Ledger-Lots neu aufbauen."""
+        with self.lock:
+            self.pairs.clear()
+            for pair, lots in ledger.pairs.items():
+                if not lots.open_units:
+                    continue
+                triggers = self.pairs[pair] = PairTriggers()
+                if lots.mode == "fifo":
+                    for lot_id, volume, price in lots.open_lots():
+                        triggers.open(volume / _POW10[VOLUME_DECIMALS], price / _POW10[PRICE_DECIMALS], lot_id)
+                else:
+                    triggers.open(lots.open_volume, lots.avg_price())
+
+
+RISK = RiskEngine()
+
+# ----------------- Trade-Journal (SQLite WAL + CSV, Hintergrund-Writer) -----------------
+@dataclass(slots=True)
+class TradeRecord:
+    timestamp: float
+    pair: str
+    side: str
+    volume: float
+    price: float
+    mode: str
+    reason: str
+    order_id: str = ""
+    fetch_ms: float = None          # Ticker-Anfrage bis Antwort
+    decide_ms: float = None         # Antwort bis Handelsentscheidung
+    order_ms: float = None          # Entscheidung bis Order-Bestätigung
+    tick_to_trade_ms: float = None  # Antwort bis Order-Bestätigung
+
+
+@dataclass(slots=True)
+class HistoryEntry:
+    timestamp: float
+    pair: str
+    side: str
+    text: str
+
+
+def history_matches(entry, pair=None, side=None, since=None, until=None):
+    return ((pair is None or entry.pair == pair) and (side is None or entry.side == side)
+            and (since is None or entry.timestamp >= since) and (until is None or entry.timestamp < until))
+
+
+class TradeJournal:
+    """Append-only Journal: record() legt nur in eine Queue, geschrieben wird gebündelt im Writer-Thread."""
+    _STOP = object()
+
+    def __init__(self, db_path=JOURNAL_DB_PATH, csv_path=JOURNAL_CSV_PATH,
+                 flush_seconds=JOURNAL_FLUSH_SECONDS, batch_size=256):
+        self.db_path = db_path
+        self.csv_path = csv_path
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.unwritten = deque()  # Verlaufseinträge zwischen record() und Commit, für query_history
+        self.write_lock = threading.Lock()
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="TradeJournal", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            self.queue.put(self._STOP)
+            self.thread.join(timeout=5)
+            self.thread = None
+
+    def record(self, rec):
+        if isinstance(rec, HistoryEntry):
+            self.unwritten.append(rec)
+        self.queue.put(rec)
+
+    @staticmethod
+    def _connect(path):
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")  # WAL+NORMAL synct nicht beim Commit
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS trades ("
+            "id INTEGER PRIMARY KEY, ts REAL NOT NULL, pair TEXT NOT NULL, side TEXT NOT NULL, "
+            "volume REAL NOT NULL, price REAL NOT NULL, mode TEXT NOT NULL, reason TEXT, order_id TEXT)")
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(trades)")}
+        for column in ("fetch_ms", "decide_ms", "order_ms", "tick_to_trade_ms"):
+            if column not in columns:  # Journale älterer Versionen nachrüsten
+                conn.execute(f"ALTER TABLE trades ADD COLUMN {column} REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS trades_ts ON trades (ts)")
+        conn.execute("CREATE INDEX IF NOT EXISTS trades_pair_ts ON trades (pair, ts)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "id INTEGER PRIMARY KEY, ts REAL NOT NULL, pair TEXT, side TEXT, text TEXT NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS history_ts ON history (ts)")
+        conn.execute("CREATE INDEX IF NOT EXISTS history_pair_ts ON history (pair, ts)")
+        return conn
+
+    def _run(self):
+        conn = self._connect(self.db_path)
+        csv_file = open(self.csv_path, mode="a", newline="", encoding="utf-8")
+        writer = csv.writer(csv_file)
+        running = True
+        try:
+            while running:
+                batch = []
+                try:
+                    item = self.queue.get(timeout=self.flush_seconds)
+                except queue.Empty:
+                    continue
+                deadline = time.monotonic() + self.flush_seconds
+                while True:
+                    if item is self._STOP:
+                        running = False
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._write(conn, writer, csv_file, batch)
+        finally:
+            conn.close()
+            csv_file.close()
+
+    def _write(self, conn, writer, csv_file, batch):
+        trades = [r for r in batch if isinstance(r, TradeRecord)]
+        history = [h for h in batch if isinstance(h, HistoryEntry)]
+        try:
+            with self.write_lock, conn:  # ein Commit (= ein fsync) pro Batch
+                try:
+                    conn.executemany(
+                        "INSERT INTO trades (ts, pair, side, volume, price, mode, reason, order_id, "
+                        "fetch_ms, decide_ms, order_ms, tick_to_trade_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(r.timestamp, r.pair, r.side, r.volume, r.price, r.mode, r.reason, r.order_id,
+                          r.fetch_ms, r.decide_ms, r.order_ms, r.tick_to_trade_ms) for r in trades])
+                    conn.executemany(
+                        "INSERT INTO history (ts, pair, side, text) VALUES (?, ?, ?, ?)",
+                        [(h.timestamp, h.pair, h.side, h.text) for h in history])
+                finally:
+                    for _ in history:
+                        self.unwritten.popleft()
+            if not trades:
+                return
+            for r in trades:
+                ts = datetime.fromtimestamp(r.timestamp)
+                writer.writerow([
+                    ts.strftime("%Y-%m-%d"), ts.strftime("%H:%M:%S"), r.pair,
+                    r.side.upper(), r.volume, r.price, r.mode, r.reason
+                ])
+            csv_file.flush()
+            os.fsync(csv_file.fileno())
+        except Exception as e:
+            log.error("TradeJournal: %d Einträge nicht geschrieben: %s", len(batch), e)
+
+    def query(self, pair=None, side=None, since=None, until=None, limit=None):
+        """Trades aus der Datenbank, ältester zuerst. Läuft über eine eigene Leseverbindung (WAL)."""
+        if not os.path.exists(self.db_path):
+            return []
+        sql, args = ("SELECT ts, pair, side, volume, price, mode, reason, order_id, "
+                     "fetch_ms, decide_ms, order_ms, tick_to_trade_ms FROM trades WHERE 1=1"), []
+        if pair is not None:
+            sql += " AND pair = ?"
+            args.append(pair)
+        if side is not None:
+            sql += " AND side = ?"
+            args.append(side)
+        if since is not None:
+            sql += " AND ts >= ?"
+            args.append(since)
+        if until is not None:
+            sql += " AND ts < ?"
+            args.append(until)
+        sql += " ORDER BY ts"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [TradeRecord(*row) for row in conn.execute(sql, args)]
+        finally:
+            conn.close()
+
+    def query_history(self, pair=None, side=None, since=None, until=None, offset=0, limit=50):
+        """Archivierte Verlaufseinträge, neuester zuerst; noch nicht geschriebene zählen mit."""
+        with self.write_lock:
+            pending = [h for h in reversed(list(self.unwritten)) if history_matches(h, pair, side, since, until)]
+            page = pending[offset:offset + limit]
+            if len(page) < limit:
+                page += self._query_history_db(pair, side, since, until,
+                                               max(0, offset - len(pending)), limit - len(page))
+            return page
+
+    def _query_history_db(self, pair, side, since, until, offset, limit):
+        if not os.path.exists(self.db_path):
+            return []
+        sql, args = "SELECT ts, pair, side, text FROM history WHERE 1=1", []
+        if pair is not None:
+            sql += " AND pair = ?"
+            args.append(pair)
+        if side is not None:
+            sql += " AND side = ?"
+            args.append(side)
+        if since is not None:
+            sql += " AND ts >= ?"
+            args.append(since)
+        if until is not None:
+            sql += " AND ts < ?"
+            args.append(until)
+        sql += " ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?"
+        args += [int(limit), int(offset)]
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return [HistoryEntry(*row) for row in conn.execute(sql, args)]
+        except sqlite3.OperationalError:
+            return []  # Tabelle noch nicht angelegt
+        finally:
+            conn.close()
+
+
+JOURNAL = TradeJournal()
+
+# ----------------- Trade-Verlauf (begrenzt im Speicher, Rest im Archiv) -----------------
+class TradeHistory:
+    def __init__(self, maxlen=TRADES_MAXLEN, archive=None):
+        self.maxlen = maxlen
+        self.archive = archive
+        self.entries = deque()
+        self.appended = 0  # Anzahl aller jemals angehängten Einträge
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def append(self, text, pair="", side=""):
+        with self.lock:
+            if len(self.entries) >= self.maxlen:
+                old = self.entries.popleft()
+                if self.archive is not None:
+                    self.archive.record(old)
+            self.entries.append(HistoryEntry(time.time(), pair, side, text))
+            self.appended += 1
+
+    def query(self, pair=None, side=None, since=None, until=None, offset=0, limit=50):
+        """Seitenweise Abfrage, neuester zuerst: erst Speicher, dann Archiv."""
+        hits = [e for e in reversed(list(self.entries)) if history_matches(e, pair, side, since, until)]
+        page = hits[offset:offset + limit]
+        if len(page) < limit and self.archive is not None:
+            page += self.archive.query_history(pair, side, since, until,
+                                               offset=max(0, offset - len(hits)), limit=limit - len(page))
+        return page
+
+
+TRADES = TradeHistory(archive=JOURNAL)
+
+# ----------------- Zustands-Snapshots (Bot -> GUI) und Kommandos (GUI -> Bot) -----------------
+@dataclass(frozen=True, slots=True)
+class StateSnapshot:
+    version: int
+    timestamp: float
+    simul: bool
+    wallet: Amount
+    trade_pairs: MappingProxyType
+    last_prices: MappingProxyType
+    simul_assets: MappingProxyType  # Paar -> Amount
+    last_buy_price: MappingProxyType
+    safe_balances: MappingProxyType
+    safe_allow_sell: MappingProxyType
+    positions: MappingProxyType  # Paar -> (offene Menge, Ø Einstand, realisiert)
+    realized_pnl: float
+    exposure_report: str  # Korrelationsmatrix, Positionswerte, Risiko (Text für die GUI)
+    trade_flows: MappingProxyType  # Paar -> Kurzbeschreibung des Orderflows
+
+
+class StateStore:
+    """Die Globals gehören dem Bot-Thread. Er veröffentlicht nach jedem Zyklus einen unveränderlichen
+    Snapshot per Referenztausch, die GUI liest ihn ohne Lock. Änderungen aus der GUI laufen als Kommandos
+    über eine Queue und werden im Bot-Thread zwischen zwei Ticks ausgeführt; läuft kein Bot, sofort."""
+
+    def __init__(self):
+        self.snapshot = None
+        self.version = 0
+        self.commands = queue.SimpleQueue()
+        self.owner = None
+        self.lock = threading.Lock()  # nur für Besitzwechsel, nie beim Lesen
+
+    def get(self):
+        return self.snapshot
+
+    def publish(self):
+        self.version += 1
+        self.snapshot = StateSnapshot(
+            version=self.version,
+            timestamp=time.time(),
+            simul=SIMUL,
+            wallet=SIMUL_WALLET_VALUE,
+            trade_pairs=MappingProxyType(dict(TRADE_PAIRS)),
+            last_prices=MappingProxyType({pair: hist[-1] for pair, hist in PRICE_HISTORY.items() if hist}),
+            simul_assets=MappingProxyType(dict(SIMUL_ASSETS)),
+            last_buy_price=MappingProxyType(dict(LAST_BUY_PRICE)),
+            safe_balances=MappingProxyType(dict(SAFE_BALANCES)),
+            safe_allow_sell=MappingProxyType(dict(SAFE_ASSET_ALLOW_SELL)),
+            positions=MappingProxyType({pair: (lots.open_volume, lots.avg_price(), lots.realized_pnl)
+                                        for pair, lots in LEDGER.pairs.items()}),
+            realized_pnl=LEDGER.realized_pnl,
+            exposure_report=exposure_report(),
+            trade_flows=MappingProxyType({pair: TRADE_FEED.describe(pair) for pair in TRADE_PAIRS}),
+        )
+        return self.snapshot
+
+    def submit(self, command):
+        with self.lock:
+            if self.owner is not None:
+                self.commands.put(command)
+                return
+            self._run(command)
+            self.publish()
+
+    def attach(self, owner):
+        with self.lock:
+            self.owner = owner
+
+    def detach(self, owner):
+        with self.lock:
+            if self.owner is not owner:
+                return  # inzwischen läuft ein neuer Bot-Thread
+            self.owner = None
+            if self.drain():
+                self.publish()
+
+    def wake(self):
+        self.commands.put(None)  # beendet ein laufendes idle() vorzeitig
+
+    def drain(self):
+        applied = 0
+        while True:
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                return applied
+            if command is not None:
+                self._run(command)
+                applied += 1
+
+    def idle(self, seconds):
+        """Wartet im Bot-Thread zwischen zwei Zyklen und führt eintreffende Kommandos sofort aus."""
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                command = self.commands.get(timeout=remaining)
+            except queue.Empty:
+                return
+            if command is None:
+                return
+            self._run(command)
+            self.publish()
+
+    @staticmethod
+    def _run(command):
+        try:
+            command()
+        except Exception as e:
+            log.error("Kommando %s fehlgeschlagen: %s", getattr(command, "func", command), e)
+
+
+STATE = StateStore()
+
+
+def add_trade_pair(pair, volume):
+    PENDING_REMOVAL.discard(pair)
+    if pair in TRADE_PAIRS:
+        return
+    TRADE_PAIRS[pair] = volume
+    PRICE_HISTORY[pair] = []
+    CHART_SERIES[pair] = ChartSeries()
+    CANDLES[pair] = CandleBook()
+    SIMUL_ASSETS[pair] = Amount(0, VOLUME_DECIMALS)
+
+
+def remove_trade_pair(pair):
+    TRADE_PAIRS.pop(pair, None)
+    PENDING_REMOVAL.discard(pair)
+    PRICE_HISTORY.pop(pair, None)
+    CHART_SERIES.pop(pair, None)
+    CANDLES.pop(pair, None)
+    TRADE_FEED.remove(pair)
+    SIMUL_ASSETS.pop(pair, None)
+    LEDGER.remove(pair)
+    RISK.remove(pair)
+    BREAKERS.remove(f"Ticker/{pair}")
+
+
+def apply_mode(simul, safe_balances=None, allow_sell=None):
+    global SIMUL, SIMUL_WALLET_VALUE
+    SIMUL = simul
+    if simul:
+        SIMUL_WALLET_VALUE = Amount.parse(SIMUL_START_EUR, QUOTE_DECIMALS)
+        for pair in SIMUL_ASSETS:
+            SIMUL_ASSETS[pair] = Amount(0, VOLUME_DECIMALS)
+    else:
+        SAFE_BALANCES.clear()
+        SAFE_BALANCES.update(safe_balances or {})
+        SAFE_ASSET_ALLOW_SELL.clear()
+        SAFE_ASSET_ALLOW_SELL.update(allow_sell or {})
+    LEDGER.reset()
+    RISK.reset()
+
+
+def set_sell_permission(asset, allowed):
+    SAFE_ASSET_ALLOW_SELL[asset] = allowed
+
+
+# ----------------- Checkpoints (atomarer Binär-Snapshot, Wiederanlauf) -----------------
+# Format: MAGIC | u32 Headerlänge | JSON-Header | Sektionen (float64: Preisverläufe/Kerzen, int64: FIFO-Lots)
+# Beträge im Header als exakte Strings bzw. ganze Einheiten
+CHECKPOINT_MAGIC = b"KTBCKPT1"
+
+
+def capture_state():
+    """Kopie des Laufzeitzustands, wird im Bot-Thread zwischen zwei Ticks gezogen."""
+    ledger = {}
+    for pair, lots in list(LEDGER.pairs.items()):
+        ledger[pair] = {
+            "mode": lots.mode,
+            "open_units": lots.open_units,
+            "cost_units": lots.cost_units,
+            "realized_units": lots.realized_units,
+            "fills": lots.fills,
+            "volumes": lots.volumes[lots.head:],
+            "prices": lots.prices[lots.head:],
+        }
+    return {
+        "saved_at": time.time(),
+        "simul": SIMUL,
+        "wallet": str(SIMUL_WALLET_VALUE),
+        "trade_pairs": dict(TRADE_PAIRS),
+        "simul_assets": {pair: str(amount) for pair, amount in SIMUL_ASSETS.items()},
+        "last_buy_price": dict(LAST_BUY_PRICE),
+        "last_trade_time": dict(LAST_TRADE_TIME),
+        "safe_balances": dict(SAFE_BALANCES),
+        "safe_allow_sell": dict(SAFE_ASSET_ALLOW_SELL),
+        "ledger": ledger,
+        "screener_promoted": sorted(SCREENER.promoted),
+        "trade_cursors": dict(TRADE_FEED.cursors),
+        "trade_last_ids": dict(TRADE_FEED.last_ids),
+        "prices": {pair: array("d", hist) for pair, hist in list(PRICE_HISTORY.items())},
+        "chart": {pair: series.snapshot() for pair, series in list(CHART_SERIES.items())},
+        "candles": {pair: book.snapshot() for pair, book in list(CANDLES.items())},
+    }
+
+
+def write_checkpoint(state, path=CHECKPOINT_PATH):
+    sections, blobs, offset = {}, [], 0
+
+    def add(name, values, dtype="<f8"):
+        nonlocal offset
+        data = np.asarray(values, dtype=dtype).tobytes()
+        sections[name] = [offset, len(values), dtype]
+        blobs.append(data)
+        offset += len(data)
+
+    for pair, hist in state["prices"].items():
+        add("price:" + pair, hist)
+    for pair, values in state["chart"].items():
+        add("chart:" + pair, values)
+    for pair, book in state["candles"].items():
+        for timeframe, columns in book.items():
+            for field, values in columns.items():
+                add(f"candle:{pair}:{timeframe}:{field}", values)
+    ledger = {}
+    for pair, lots in state["ledger"].items():
+        lots = dict(lots)
+        add("lot_v:" + pair, lots.pop("volumes"), "<i8")
+        add("lot_p:" + pair, lots.pop("prices"), "<i8")
+        ledger[pair] = lots
+
+    meta = {k: v for k, v in state.items() if k not in ("prices", "chart", "candles", "ledger")}
+    meta["ledger"] = ledger
+    meta["sections"] = sections
+    header = json.dumps(meta).encode()
+    header += b" " * (-(len(CHECKPOINT_MAGIC) + 4 + len(header)) % 8)  # Sektionen 8-Byte-ausgerichtet
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(CHECKPOINT_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for data in blobs:
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)  # atomar: entweder alter oder neuer Stand
+
+
+def read_checkpoint(path=CHECKPOINT_PATH):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:len(CHECKPOINT_MAGIC)] != CHECKPOINT_MAGIC:
+            raise ValueError("kein Checkpoint (Magic fehlt)")
+        pos = len(CHECKPOINT_MAGIC)
+        (header_len,) = struct.unpack_from("<I", mm, pos)
+        pos += 4
+        meta = json.loads(mm[pos:pos + header_len])
+        base = pos + header_len
+
+        def section(name):
+            off, count, *dtype = meta["sections"][name]  # ältere Checkpoints: nur float64
+            view = np.frombuffer(mm, dtype=dtype[0] if dtype else "<f8", count=count, offset=base + off)
+            values = view.tolist()
+            del view  # Export freigeben, sonst lässt sich die mmap nicht schließen
+            return values
+
+        meta["prices"] = {name[6:]: section(name) for name in meta["sections"] if name.startswith("price:")}
+        meta["chart"] = {name[6:]: section(name) for name in meta["sections"] if name.startswith("chart:")}
+        meta["candles"] = {}
+        for name in meta["sections"]:
+            if name.startswith("candle:"):
+                pair, timeframe, field = name[7:].rsplit(":", 2)
+                meta["candles"].setdefault(pair, {}).setdefault(timeframe, {})[field] = section(name)
+        for pair, lots in meta["ledger"].items():
+            lots["volumes"] = section("lot_v:" + pair)
+            lots["prices"] = section("lot_p:" + pair)
+    return meta
+
+
+def restore_checkpoint(path=CHECKPOINT_PATH):
+    global SIMUL_WALLET_VALUE, RESTORED_STATE
+    if not os.path.exists(path):
+        return False
+    try:
+        state = read_checkpoint(path)
+    except Exception as e:
+        log.error("Checkpoint %s nicht lesbar: %s", path, e)
+        return False
+
+    TRADE_PAIRS.clear()
+    TRADE_PAIRS.update(state["trade_pairs"])
+    SCREENER.promoted = set(state.get("screener_promoted", ())) & TRADE_PAIRS.keys()
+    # Trades ab dem gespeicherten Cursor nachholen: Kerzenvolumen wird nicht doppelt gezählt
+    TRADE_FEED.cursors.update({p: c for p, c in state.get("trade_cursors", {}).items() if p in TRADE_PAIRS})
+    TRADE_FEED.last_ids.update({p: i for p, i in state.get("trade_last_ids", {}).items() if p in TRADE_PAIRS})
+    PRICE_HISTORY.clear()
+    PRICE_HISTORY.update(state["prices"])
+    CHART_SERIES.clear()
+    for pair, values in state["chart"].items():
+        CHART_SERIES[pair] = ChartSeries(values=values)
+    CANDLES.clear()
+    for pair, saved in state["candles"].items():
+        if pair in TRADE_PAIRS:
+            # Zeitrahmen, die es im Checkpoint nicht gibt (oder nicht mehr), starten leer
+            CANDLES[pair] = CandleBook(saved={tf: cols for tf, cols in saved.items() if tf in CANDLE_TIMEFRAMES
+                                              and set(cols) == set(CandleSeries.FIELDS)})
+    LAST_BUY_PRICE.clear()
+    LAST_BUY_PRICE.update(state["last_buy_price"])
+    LAST_TRADE_TIME.clear()
+    LAST_TRADE_TIME.update(state["last_trade_time"])
+    SAFE_BALANCES.clear()
+    SAFE_BALANCES.update(state["safe_balances"])
+    SAFE_ASSET_ALLOW_SELL.clear()
+    SAFE_ASSET_ALLOW_SELL.update(state["safe_allow_sell"])
+
+    # Start erfolgt immer im SIMUL-Modus: Wallet und Lots nur aus einem SIMUL-Snapshot übernehmen
+    SIMUL_ASSETS.clear()
+    LEDGER.reset()
+    if state["simul"]:
+        SIMUL_WALLET_VALUE = Amount.parse(state["wallet"], QUOTE_DECIMALS)
+        SIMUL_ASSETS.update({pair: Amount.parse(v, VOLUME_DECIMALS) for pair, v in state["simul_assets"].items()})
+        for pair, saved in state["ledger"].items():
+            lots = LEDGER.lots(pair)
+            lots.mode = saved["mode"]
+            lots.fills = saved["fills"]
+            if "open_units" in saved:
+                lots.open_units = saved["open_units"]
+                lots.cost_units = saved["cost_units"]
+                lots.realized_units = saved["realized_units"]
+                lots.volumes = array("q", saved["volumes"])
+                lots.prices = array("q", saved["prices"])
+            else:  # Checkpoint aus der Float-Zeit
+                lots.open_units = to_units(saved["open_volume"], VOLUME_DECIMALS)
+                lots.cost_units = to_units(saved["cost_basis"], COST_DECIMALS)
+                lots.realized_units = to_units(saved["realized_pnl"], COST_DECIMALS)
+                lots.volumes = array("q", [to_units(v, VOLUME_DECIMALS) for v in saved["volumes"]])
+                lots.prices = array("q", [to_units(v, PRICE_DECIMALS) for v in saved["prices"]])
+            LEDGER.realized_units += lots.realized_units
+    RISK.sync_from_ledger(LEDGER)
+    for pair in TRADE_PAIRS:
+        PRICE_HISTORY.setdefault(pair, [])
+        if pair not in CHART_SERIES:
+            CHART_SERIES[pair] = ChartSeries()
+        if pair not in CANDLES:
+            CANDLES[pair] = CandleBook()
+        SIMUL_ASSETS.setdefault(pair, Amount(0, VOLUME_DECIMALS))
+
+    RESTORED_STATE = True
+    log.info("Zustand vom %s wiederhergestellt.", datetime.fromtimestamp(state["saved_at"]).strftime("%Y-%m-%d %H:%M:%S"))
+    return True
+
+
+class Checkpointer:
+    """Schreibt Snapshots im Hintergrund; liegt schon einer an, wird er durch den neueren ersetzt."""
+
+    def __init__(self, path=CHECKPOINT_PATH, interval=CHECKPOINT_INTERVAL_SECONDS):
+        self.path = path
+        self.interval = interval
+        self.cond = threading.Condition()
+        self.pending = None
+        self.running = False
+        self.thread = None
+        self.last_submit = 0.0
+
+    def start(self):
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name="Checkpointer", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        if self.thread is not None:
+            with self.cond:
+                self.running = False
+                self.cond.notify()
+            self.thread.join(timeout=10)
+            self.thread = None
+
+    def submit(self, state):
+        with self.cond:
+            self.pending = state
+            self.cond.notify()
+
+    def maybe_submit(self):
+        now = time.monotonic()
+        if now - self.last_submit >= self.interval:
+            self.last_submit = now
+            self.submit(capture_state())
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.pending is None and self.running:
+                    self.cond.wait()
+                state, self.pending = self.pending, None
+            if state is None:
+                return
+            try:
+                write_checkpoint(state, self.path)
+            except Exception as e:
+                log.error("Checkpoint schreiben fehlgeschlagen: %s", e)
+
+
+CHECKPOINTER = Checkpointer()
 
 # ----------------- Initialkäufe bei Botstart -----------------
-def perform_initial_trades():
-    global SIMUL_ASSETS, SIMUL_WALLET_VALUE
-    for pair, amount in TRADE_PAIRS.items():
-        price = fetch_price(pair)
-        if price and SIMUL and SIMUL_ASSETS[pair] == 0.0:
-            execute_trade(pair, "buy", amount, price, "Initialkauf (SIMUL)")
+def perform_initial_trades(progress=None, should_stop=None):
+    """Startkäufe im SIMUL-Modus. Alle Startkurse kommen mit einer Ticker-Abfrage, einzeln nachgefragt
+    wird nur, was darin fehlt. progress(done, total, text) meldet den Stand, should_stop() bricht ab."""
+    if not SIMUL:
+        return 0
+    pairs = [pair for pair in TRADE_PAIRS if not SIMUL_ASSETS.get(pair)]
+    total, bought = len(pairs), 0
+    if progress:
+        progress(0, total, f"Startkurse für {total} Paare")
+    prices = fetch_prices(pairs) if pairs else {}
+    for done, pair in enumerate(pairs, 1):
+        if should_stop and should_stop():
+            break
+        price = prices.get(pair) or fetch_price(pair)
+        if price and execute_trade(pair, "buy", TRADE_PAIRS[pair], price, "Initialkauf (SIMUL)"):
             LAST_BUY_PRICE[pair] = price
             LAST_TRADE_TIME[pair] = time.time()
+            bought += 1
+        if progress:
+            progress(done, total, f"Initialkauf {pair}")
+    return bought
 
 # ----------------- Trendanalyse (lineare Regression) -----------------
 def calculate_trend(prices):
@@ -84,155 +2254,1731 @@ def calculate_fibonacci_levels(prices, lookback=50):
         high - diff * 0.618  # 61.8% level
     )
 
-# ----------------- Chart Linien aktualisieren inkl. Fibonacci -----------------
-def update_chart_lines(ax, pair):
-    prices = PRICE_HISTORY.get(pair, [])
-    if not prices:
-        return
-    ax.clear()
-    ax.plot(prices, label="Price", color="blue")
-    ax.set_title(f"{pair} – letzte {len(prices)} Preise")
-
-    # Dynamische Linien
-    if prices:
-        last_price = prices[-1]
-        next_buy = last_price * (1 - REENTRY_THRESHOLD)
-        next_sell = last_price * (1 + TAKE_PROFIT_DYNAMIC)
-        stop_loss = last_price * (1 - STOP_LOSS_DYNAMIC)
-
-        ax.axhline(y=next_buy, color="green", linestyle="--", label="Next Buy")
-        ax.axhline(y=next_sell, color="red", linestyle="--", label="Next Sell")
-        ax.axhline(y=stop_loss, color="orange", linestyle=":", label="Stop-Loss")
-
-        # Fibonacci-Linien
-        fib0, fib382, fib618 = calculate_fibonacci_levels(prices)
-        if fib0: ax.axhline(y=fib0, color="purple", linestyle="--", linewidth=1, label="Fibo 0.0")
-        if fib382: ax.axhline(y=fib382, color="purple", linestyle="--", linewidth=1, label="Fibo 38.2")
-        if fib618: ax.axhline(y=fib618, color="purple", linestyle="--", linewidth=1, label="Fibo 61.8")
-
-        # Trendlinie
-        trend = calculate_trend(prices)
-        if trend:
-            x_vals = np.arange(len(prices))
-            trend_line = trend * x_vals + prices[0]
-            ax.plot(x_vals, trend_line, linestyle="-.", color="gray", label="Trend")
-
-    ax.legend()
-
-# ----------------- Update Trade-Liste (GUI + CSV Logging) -----------------
-def update_trade_list(gui_list_widget):
+# ----------------- Strategien (deklarative Regeln, vektorisiert ausgewertet) -----------------
+# Regeln sind Ausdrücke über die Spalten der Indikator-Tabelle, z.B. "rsi < 30 and price < lower".
+# Erlaubt: Spaltennamen, Zahlen, + - * /, Vergleiche (auch verkettet), and/or/not, Klammern.
+# Fehlende Werte (kalter Puffer, kein Trades-Feed) sind NaN, jeder Vergleich damit ist falsch.
+RULE_COLUMNS = ("price", "rsi", "sma", "upper", "lower", "trend", "fib0", "fib382", "fib618",
+                "vwap", "imbalance", "flow_eur")
+_RULE_OPS = {
+    ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater, ast.GtE: np.greater_equal,
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide,
+    ast.And: np.logical_and, ast.Or: np.logical_or,
+}
+
+
+def compile_rule(text):
+    """Regeltext -> Funktion(table, memo) -> bool-Array je Zeile. ValueError bei unzulässigen Ausdrücken."""
     try:
-        global LAST_LOGGED_TRADE
-        last_entry = TRADES[-1] if TRADES else None
-
-        if last_entry and last_entry != LAST_LOGGED_TRADE:
-            with open("trade_log.csv", mode="a", newline="", encoding="utf-8") as file:
-                writer = csv.writer(file)
-                parts = last_entry.split()
-                if len(parts) >= 6 and "@" in last_entry:
-                    action = parts[1]
-                    volume = parts[2]
-                    pair = parts[3]
-                    price = parts[5]
-                    reason = last_entry.split("Grund:")[-1].strip()
-                    sim_label = "SIMUL" if "[SIMUL]" in last_entry else "REAL"
-                    now = datetime.now()
-                    writer.writerow([
-                        now.strftime("%Y-%m-%d"), now.strftime("%H:%M:%S"), pair,
-                        action.upper(), volume, price, sim_label, reason
-                    ])
-            LAST_LOGGED_TRADE = last_entry  # nur wenn geschrieben
-        gui_list_widget.clear()
-        for entry in TRADES[-20:]:
-            gui_list_widget.addItem(QListWidgetItem(entry))
+        tree = ast.parse(text, mode="eval").body
+    except SyntaxError as e:
+        raise ValueError(f"Regel {text!r}: {e.msg}") from None
+    return _compile_node(tree)
+
+
+def _compile_node(node):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = float(node.value)
+        return lambda table, memo: value
+    if isinstance(node, ast.Name):
+        if node.id not in RULE_COLUMNS:
+            raise ValueError(f"unbekannte Spalte {node.id!r} (erlaubt: {', '.join(RULE_COLUMNS)})")
+        name = node.id
+        return lambda table, memo: table[name]
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.Not)):
+        operand = _compile_node(node.operand)
+        op = np.negative if isinstance(node.op, ast.USub) else np.logical_not
+        evaluate = lambda table, memo: op(operand(table, memo))
+    elif isinstance(node, ast.BinOp) and type(node.op) in _RULE_OPS:
+        left, right, op = _compile_node(node.left), _compile_node(node.right), _RULE_OPS[type(node.op)]
+        evaluate = lambda table, memo: op(left(table, memo), right(table, memo))
+    elif isinstance(node, ast.Compare) and all(type(op) in _RULE_OPS for op in node.ops):
+        # a < b <= c wie in Python: paarweise, mit und verknüpft
+        operands = [_compile_node(n) for n in (node.left, *node.comparators)]
+        ops = [_RULE_OPS[type(op)] for op in node.ops]
+
+        def evaluate(table, memo):
+            values = [operand(table, memo) for operand in operands]
+            result = ops[0](values[0], values[1])
+            for i in range(1, len(ops)):
+                result = np.logical_and(result, ops[i](values[i], values[i + 1]))
+            return result
+    elif isinstance(node, ast.BoolOp):
+        parts, op = [_compile_node(n) for n in node.values], _RULE_OPS[type(node.op)]
+
+        def evaluate(table, memo):
+            result = parts[0](table, memo)
+            for part in parts[1:]:
+                result = op(result, part(table, memo))
+            return result
+    else:
+        raise ValueError(f"nicht erlaubt in Regeln: {ast.unparse(node)!r}")
+
+    key = ast.dump(node, annotate_fields=False)  # gleiche Teilausdrücke teilen sich das Ergebnis
+
+    def memoized(table, memo):
+        result = memo.get(key)
+        if result is None:
+            result = memo[key] = evaluate(table, memo)
+        return result
+    return memoized
+
+
+def indicator_table(windows, price=None):
+    """Indikatoren für viele Kurspuffer zugleich, eine Zeile je Puffer (vorn mit NaN aufgefüllt).
+    Dieselben Formeln wie calculate_rsi/_bollinger/_trend/_fibonacci_levels auf PRICE_HISTORY."""
+    windows = np.asarray(windows, dtype=np.float64)
+    valid = ~np.isnan(windows)
+    count = valid.sum(axis=1)
+    last = windows[:, -1] if price is None else np.asarray(price, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # RSI: Mittel aller Gewinne bzw. Verluste im Puffer
+        deltas = np.diff(windows, axis=1)
+        up, down = deltas > 0, deltas < 0
+        n_up, n_down = up.sum(axis=1), down.sum(axis=1)
+        avg_gain = np.where(n_up > 0, np.where(up, deltas, 0).sum(axis=1) / n_up, 0.0)
+        avg_loss = np.where(n_down > 0, -np.where(down, deltas, 0).sum(axis=1) / n_down, 1e-10)
+        rsi = np.where(count >= RSI_PERIOD, 100 - 100 / (1 + avg_gain / avg_loss), np.nan)
+
+        # Bollinger über die letzten BOLLINGER_PERIOD Werte (NaN, solange der Puffer kürzer ist)
+        tail = windows[:, -BOLLINGER_PERIOD:]
+        sma, std = tail.mean(axis=1), tail.std(axis=1)
+
+        # Trend: Steigung der Regressionsgeraden über die gültigen Werte je Zeile
+        x = np.arange(windows.shape[1], dtype=np.float64)
+        y = np.where(valid, windows, 0.0)
+        x_mean = (x * valid).sum(axis=1) / count
+        y_mean = y.sum(axis=1) / count
+        dx = np.where(valid, x - x_mean[:, None], 0.0)
+        slope = (dx * (y - y_mean[:, None])).sum(axis=1) / (dx * dx).sum(axis=1)
+        trend = np.where(count >= 10, slope, 0.0)
+
+        # Fibonacci über die letzten 50 Werte
+        recent = windows[:, -50:]
+        high = np.where(np.isnan(recent), -np.inf, recent).max(axis=1)
+        low = np.where(np.isnan(recent), np.inf, recent).min(axis=1)
+        warm = count >= 2
+        high, diff = np.where(warm, high, np.nan), np.where(warm, high - low, np.nan)
+    nan = np.full(len(windows), np.nan)
+    return {
+        "price": last, "rsi": rsi, "sma": sma,
+        "upper": sma + BOLLINGER_STD * std, "lower": sma - BOLLINGER_STD * std, "trend": trend,
+        "fib0": high, "fib382": high - diff * 0.382, "fib618": high - diff * 0.618,
+        "vwap": nan, "imbalance": nan, "flow_eur": nan,
+    }
+
+
+class StrategyEngine:
+    """Kompiliert STRATEGY_RULES (Cache je Regeltext) und wertet alle Strategien über dieselbe Indikator-Tabelle
+    aus. Gemeinsame Teilausdrücke werden je Auswertung nur einmal berechnet, jede weitere Strategie kostet
+    also nur ihre eigenen Vergleiche. Genutzt vom Bot-Loop (eine Zeile), Screener (ein Paar je Zeile) und
+    backtest() (ein Zeitpunkt je Zeile)."""
 
-    except Exception as e:
-        print(f"[WARN] Logging in update_trade_list fehlgeschlagen: {e}")
+    def __init__(self):
+        self.cache = {}   # Regeltext -> kompilierte Regel
+        self.counts = {}  # (Strategie, Seite) -> Live-Signale seit Start
+
+    def rule(self, text):
+        compiled = self.cache.get(text)
+        if compiled is None:
+            compiled = self.cache[text] = compile_rule(text)
+        return compiled
+
+    def evaluate(self, table):
+        """{Strategie: (Kauf-Maske, Verkaufs-Maske)} für alle Zeilen der Tabelle."""
+        memo, result = {}, {}
+        rows = len(table["price"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for name, rules in STRATEGY_RULES.items():
+                result[name] = tuple(np.broadcast_to(self.rule(rules[side])(table, memo), rows).astype(bool)
+                                     for side in ("buy", "sell"))
+        return result
+
+    def decide(self, row):
+        """Bot-Loop: eine Zeile auswerten, Signale aller Strategien zählen, (kaufen, verkaufen) der aktiven liefern."""
+        table = {column: np.array([np.nan if row.get(column) is None else row[column]]) for column in RULE_COLUMNS}
+        decision = (False, False)
+        for name, (buy, sell) in self.evaluate(table).items():
+            for side, mask in (("buy", buy), ("sell", sell)):
+                if mask[0]:
+                    self.counts[name, side] = self.counts.get((name, side), 0) + 1
+                    METRICS.inc("strategy_signals_total", strategy=name, side=side)
+            if name == STRATEGY:
+                decision = (bool(buy[0]), bool(sell[0]))
+        return decision
+
+    def backtest(self, prices, chunk=4096):
+        """Signale aller Strategien über eine Kursreihe; Zeile t sieht den Puffer bis t wie PRICE_HISTORY live.
+        Liefert {Strategie: (Kauf-Indizes, Verkaufs-Indizes)}."""
+        window = PRICE_HISTORY_LEN
+        padded = np.concatenate([np.full(window - 1, np.nan), np.asarray(prices, dtype=np.float64)])
+        views = np.lib.stride_tricks.sliding_window_view(padded, window)
+        masks = {name: ([], []) for name in STRATEGY_RULES}
+        for start in range(0, len(views), chunk):
+            for name, (buy, sell) in self.evaluate(indicator_table(views[start:start + chunk])).items():
+                masks[name][0].append(buy)
+                masks[name][1].append(sell)
+        return {name: tuple(np.flatnonzero(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+                            for parts in sides)
+                for name, sides in masks.items()}
+
+    def report(self, pairs, step=None):
+        """Läuft im Worker: pairs aus dem Snapshot, step(done, total, text) meldet den Fortschritt."""
+        active, strategies = STRATEGY, STRATEGY_RULES  # ein Config-Reload tauscht beide nur aus
+        lines = [f"Aktiv: {active}", ""]
+        history = {pair: CHART_SERIES[pair].tail(CHART_ZOOM_LEVELS["1 Tag"]) for pair in pairs if pair in CHART_SERIES}
+        tested = {}
+        for i, (pair, prices) in enumerate(history.items()):
+            if step is not None:
+                step(i, len(history), f"Backtest {pair}")
+            if prices:
+                tested[pair] = self.backtest(prices)
+        for name, rules in strategies.items():
+            lines.append(f"{name}{' (aktiv)' if name == active else ''}")
+            lines.append(f"  Kauf:    {rules['buy']}")
+            lines.append(f"  Verkauf: {rules['sell']}")
+            lines.append(f"  Live-Signale: {self.counts.get((name, 'buy'), 0)} Kauf / {self.counts.get((name, 'sell'), 0)} Verkauf")
+            for pair, result in tested.items():
+                if name not in result:
+                    continue
+                buys, sells = result[name]
+                lines.append(f"  {pair:<10} letzte {len(history[pair])} Ticks: {len(buys)} Kauf / {len(sells)} Verkauf")
+            lines.append("")
+        return "\n".join(lines)
+
+
+STRATEGIES = StrategyEngine()
+
+
+# ----------------- Screener (alle Paare einer Quote-Währung) -----------------
+class Screener:
+    """Beobachtet alle Paare einer Quote-Währung mit einem einzigen Ticker-Aufruf je Zyklus.
+    Kurse liegen als Matrix (Paar x Sample, Ringpuffer), RSI/Bollinger/Trend werden für alle
+    Paare zugleich in numpy berechnet – dieselben Formeln wie im Bot-Loop."""
+
+    def __init__(self, window=SCREENER_WINDOW):
+        self.window = window
+        self.pairs = []
+        self.rows = {}
+        self.closes = np.full((0, window), np.nan)
+        self.pos = 0
+        self.samples = 0
+        self.universe_at = 0.0
+        self.promoted_at = 0.0
+        self.ranking = ()   # Tupel von (pair, score, price, rsi, band, trend, liquidity_eur)
+        self.promoted = set()
+
+    def refresh_universe(self):
+        pairs = ASSET_PAIRS.ensure(max_age=SCREENER_UNIVERSE_SECONDS).pairs_for_quote(SCREENER_QUOTE)
+        if not pairs:
+            raise RuntimeError("keine AssetPairs verfügbar")
+        closes = np.full((len(pairs), self.window), np.nan)
+        for row, pair in enumerate(pairs):
+            if pair in self.rows:
+                closes[row] = self.closes[self.rows[pair]]
+        self.pairs = pairs
+        self.rows = {pair: row for row, pair in enumerate(pairs)}
+        self.closes = closes
+        self.universe_at = time.time()
+        log.info("Screener beobachtet %d %s-Paare.", len(pairs), SCREENER_QUOTE)
+
+    def scan(self):
+        """Ein Sample für alle Paare ziehen und die Rangliste neu berechnen. Liefert {pair: Kurs}."""
+        if time.time() - self.universe_at > SCREENER_UNIVERSE_SECONDS:
+            self.refresh_universe()
+        result = kraken_request("GET", "/0/public/Ticker").json()["result"]
+        n = len(self.pairs)
+        last, vwap, volume = np.full(n, np.nan), np.full(n, np.nan), np.zeros(n)
+        quotes = {}
+        for pair, row in self.rows.items():
+            ticker = result.get(pair)
+            if ticker is None:
+                continue
+            price = quotes[pair] = float(ticker["c"][0])
+            last[row] = price
+            vwap[row] = float(ticker["p"][1])
+            volume[row] = float(ticker["v"][1])
+        self.closes[:, self.pos] = last
+        self.pos = (self.pos + 1) % self.window
+        self.samples += 1
+        self.ranking = self._rank(last, vwap, volume * vwap)
+        return quotes
+
+    def history(self, pair):
+        # Samples eines Paares, alt -> neu (zum Vorwärmen von PRICE_HISTORY)
+        row = self.closes[self.rows[pair]]
+        n = min(self.samples, self.window)
+        values = np.roll(row, -self.pos)[-n:]
+        return [float(v) for v in values if not np.isnan(v)]
+
+    def _rank(self, last, vwap, liquidity):
+        n = min(self.samples, self.window)
+        window = np.roll(self.closes, -self.pos, axis=1)[:, -n:]
+        warm = ~np.isnan(window).any(axis=1) & (n >= max(RSI_PERIOD, BOLLINGER_PERIOD))
+        table = indicator_table(window, last)
+        table["vwap"], table["flow_eur"] = vwap, liquidity
+        rsi, trend, sma = table["rsi"], table["trend"], table["sma"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Bollinger: -1 = unteres Band, +1 = oberes Band
+            half = table["upper"] - sma
+            band = np.where(half > 0, (last - sma) / half, 0.0)
+
+            # Nähe zum Kaufsignal (RSI niedrig, unter dem unteren Band, Trend > 0); feuert die Kaufregel der
+            # aktiven Strategie, zählt das Signal voll. Ohne genug Samples: Abstand unter dem 24h-VWAP
+            buy = STRATEGIES.evaluate(table).get(STRATEGY, (np.zeros(len(last), dtype=bool),))[0]
+            signal = np.where(
+                warm,
+                np.where(buy, 1.0, (np.clip((50 - rsi) / 20, 0, 1) + np.clip(-band, 0, 1) + (trend > 0)) / 3),
+                np.clip((vwap - last) / vwap / 0.05, 0, 1),
+            )
+            score = signal * np.log10(np.maximum(liquidity, 1.0))
+        score = np.where(np.isnan(last) | (liquidity < SCREENER_MIN_VOLUME_EUR) | np.isnan(score), 0.0, score)
+
+        order = np.argsort(-score)
+        return tuple((self.pairs[i], float(score[i]), float(last[i]),
+                      float(rsi[i]) if warm[i] else None, float(band[i]) if warm[i] else None,
+                      float(trend[i]) if warm[i] else None, float(liquidity[i]))
+                     for i in order if score[i] > 0)
+
+    def promote(self, force=False):
+        """Top N in TRADE_PAIRS übernehmen, herausgefallene ohne offene Position wieder entfernen."""
+        if not force and time.time() - self.promoted_at < SCREENER_PROMOTE_SECONDS:
+            return [], []
+        self.promoted_at = time.time()
+        top = {entry[0]: entry[2] for entry in self.ranking[:SCREENER_TOP_N]}
+        added, removed = [], []
+        for pair, price in top.items():
+            if pair in TRADE_PAIRS:
+                continue
+            info = ASSET_PAIRS.resolve(pair)
+            volume = float(f"{SCREENER_ORDER_EUR / price:.3g}")
+            if info is not None:
+                volume = max(round(volume, info.lot_decimals), info.ordermin)
+            add_trade_pair(pair, volume)
+            PRICE_HISTORY[pair].extend(self.history(pair)[-PRICE_HISTORY_LEN:])
+            for value in self.history(pair):
+                CHART_SERIES[pair].append(value)
+            self.promoted.add(pair)
+            added.append(pair)
+        for pair in sorted(self.promoted - top.keys()):
+            if LEDGER.open_volume(pair) > VOLUME_EPSILON:
+                continue  # erst abbauen, dann entfernen
+            remove_trade_pair(pair)
+            self.promoted.discard(pair)
+            removed.append(pair)
+        return added, removed
+
+    def report(self, limit=20):
+        lines = [f"{'Paar':<12}{'Score':>7}{'Kurs':>12}{'RSI':>7}{'Band':>7}{'Umsatz 24h':>14}"]
+        for pair, score, price, rsi, band, trend, liquidity in self.ranking[:limit]:
+            mark = "*" if pair in self.promoted else " "
+            rsi_text = f"{rsi:7.1f}" if rsi is not None else f"{'-':>7}"
+            band_text = f"{band:7.2f}" if band is not None else f"{'-':>7}"
+            lines.append(f"{pair:<11}{mark}{score:7.2f}{price:12.4f}{rsi_text}{band_text}{liquidity:14,.0f}")
+        return "\n".join(lines)
+
+
+SCREENER = Screener()
+
+
+def set_screener(enabled):
+    global SCREENER_ENABLED
+    SCREENER_ENABLED = enabled
+    if enabled:
+        SCREENER.promoted_at = 0.0  # erste Rangliste sofort übernehmen, sobald sie warm ist
+
+
+# ----------------- Chart-Daten (lange Historie, LTTB-Downsampling) -----------------
+CHART_HISTORY_LEN = 3 * 17280  # ~3 Tage bei 5-s-Ticks
+CHART_ZOOM_LEVELS = {"100 Ticks": 100, "1 Stunde": 720, "1 Tag": 17280, "Alles": CHART_HISTORY_LEN}
+
+
+class ChartSeries:
+    """Lange Preisreihe eines Paares für die Charts. view() reduziert per LTTB auf die Pixelbreite.
+    Die Buckets liegen auf festen absoluten Indizes, daher ändern sich abgeschlossene Buckets nicht mehr:
+    sie werden je Bucketgröße gecacht und pro Tick nur die neuen nachgerechnet."""
+    MAX_CACHES = 8
+
+    def __init__(self, maxlen=CHART_HISTORY_LEN, values=()):
+        self.maxlen = maxlen
+        self.values = array("d", values)
+        self.base = 0  # absoluter Index von values[0]
+        self.lock = threading.Lock()
+        self.cache = {}  # Bucketgröße -> [Indizes, Werte, nächster Bucket]
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, price):
+        with self.lock:
+            self.values.append(price)
+            excess = len(self.values) - self.maxlen
+            if excess >= max(1, self.maxlen // 10):  # blockweise kürzen, amortisiert O(1)
+                del self.values[:excess]
+                self.base += excess
+
+    def snapshot(self):
+        with self.lock:
+            return self.values[:]
+
+    def tail(self, n):
+        with self.lock:
+            return self.values[-n:].tolist()
+
+    def view(self, window, width):
+        """(x, y, low, high) der letzten `window` Werte, x relativ zum Fensteranfang."""
+        with self.lock:
+            end = self.base + len(self.values)
+            start = max(self.base, end - window)
+            data = np.frombuffer(self.values[start - self.base:], dtype=np.float64)
+        if len(data) == 0:
+            return np.empty(0), np.empty(0), None, None
+        low, high = float(data.min()), float(data.max())
+        bucket = -(-len(data) // max(1, width))
+        if bucket <= 2:
+            return np.arange(len(data)), data, low, high
+
+        idx, vals, next_b = self._bucket_cache(bucket, start)
+
+        def at(i):  # absoluter Index -> Wert im Fenster
+            return data[i - start]
+
+        # Abgeschlossene Buckets: Bucket b ist final, sobald b+1 vollständig ist
+        while (next_b + 2) * bucket <= end:
+            lo_i = next_b * bucket
+            nxt = data[lo_i + bucket - start:lo_i + 2 * bucket - start]
+            self._select(idx, vals, data[lo_i - start:lo_i + bucket - start], lo_i,
+                         lo_i + bucket + (bucket - 1) / 2, float(nxt.mean()))
+            next_b += 1
+        self.cache[bucket][2] = next_b
+
+        cut = bisect.bisect_left(idx, start)
+        if cut > 1024:
+            del idx[:cut]
+            del vals[:cut]
+            cut = 0
+        xs = list(idx[cut:])
+        ys = list(vals[cut:])
+        # Offener Rest: ein Punkt gegen den letzten Preis, dazu der letzte Preis selbst
+        tail_start = max(next_b * bucket, start)
+        if tail_start < end - 1:
+            tail_x, tail_y = [], []
+            self._select(tail_x, tail_y, data[tail_start - start:end - 1 - start], tail_start,
+                         end - 1, float(at(end - 1)), anchor=(xs[-1], ys[-1]) if xs else None)
+            xs += tail_x
+            ys += tail_y
+        xs.append(end - 1)
+        ys.append(float(at(end - 1)))
+        return np.asarray(xs) - start, np.asarray(ys), low, high
+
+    def _bucket_cache(self, bucket, start):
+        entry = self.cache.get(bucket)
+        if entry is None or entry[2] * bucket < start:
+            # Neu oder zu alt (Daten inzwischen abgeschnitten): ab erstem vollen Bucket im Fenster
+            if entry is None and len(self.cache) >= self.MAX_CACHES:
+                self.cache.pop(next(iter(self.cache)))
+            entry = self.cache[bucket] = [array("q"), array("d"), -(-start // bucket)]
+        return entry
+
+    @staticmethod
+    def _select(idx, vals, bucket_values, first_index, target_x, target_y, anchor=None):
+        if len(bucket_values) == 0:
+            return
+        if anchor is None:
+            anchor = (idx[-1], vals[-1]) if len(idx) else None
+        if anchor is None:
+            best = 0  # erster Punkt der Reihe
+        else:
+            ax, ay = anchor
+            xs = np.arange(first_index, first_index + len(bucket_values))
+            area = np.abs((ax - target_x) * (bucket_values - ay) - (ax - xs) * (target_y - ay))
+            best = int(area.argmax())
+        idx.append(first_index + best)
+        vals.append(float(bucket_values[best]))
+
+
+CHART_SERIES = {pair: ChartSeries() for pair in TRADE_PAIRS}
+
+
+# ----------------- Kerzen (OHLCV, mehrere Zeitrahmen) -----------------
+class CandleSeries:
+    """OHLCV-Kerzen eines Zeitrahmens in array('d')-Spalten. Die letzte Kerze ist die laufende und wird
+    pro Tick in O(1) fortgeschrieben; Lücken ohne Ticks werden mit flachen Kerzen (Volumen 0) gefüllt,
+    damit N Kerzen immer N * Zeitrahmen entsprechen."""
+    FIELDS = ("start", "open", "high", "low", "close", "volume")
+    __slots__ = ("seconds", "maxlen", "lock") + FIELDS
+
+    def __init__(self, seconds, maxlen=CANDLE_MAXLEN, columns=None):
+        self.seconds = seconds
+        self.maxlen = maxlen
+        self.lock = threading.Lock()
+        for field in self.FIELDS:
+            setattr(self, field, array("d", columns[field] if columns else ()))
+
+    def __len__(self):
+        return len(self.start)
+
+    def update(self, ts, price, volume=0.0):
+        bucket = ts - ts % self.seconds
+        with self.lock:
+            if not self.start or bucket > self.start[-1]:
+                if self.start:
+                    last = self.close[-1]
+                    gap = min(int((bucket - self.start[-1]) / self.seconds) - 1, self.maxlen)
+                    for k in range(gap, 0, -1):
+                        self._append(bucket - k * self.seconds, last, last, last, last, 0.0)
+                self._append(bucket, price, price, price, price, volume)
+                if len(self.start) >= 2 * self.maxlen:
+                    self._trim()
+                return
+            i = len(self.start) - 1
+            if bucket < self.start[i]:
+                # Verspäteter Trade: passende Kerze suchen, Schlusskurs bleibt
+                i = bisect.bisect_left(self.start, bucket)
+                if i >= len(self.start) or self.start[i] != bucket:
+                    return
+            else:
+                self.close[i] = price
+            if price > self.high[i]:
+                self.high[i] = price
+            if price < self.low[i]:
+                self.low[i] = price
+            self.volume[i] += volume
+
+    def _append(self, start, o, h, l, c, v):
+        self.start.append(start)
+        self.open.append(o)
+        self.high.append(h)
+        self.low.append(l)
+        self.close.append(c)
+        self.volume.append(v)
+
+    def _trim(self):
+        cut = len(self.start) - self.maxlen
+        for field in self.FIELDS:
+            del getattr(self, field)[:cut]
+
+    def resize(self, maxlen):
+        with self.lock:
+            self.maxlen = maxlen
+            if len(self.start) > maxlen:
+                self._trim()
+
+    def columns(self):
+        with self.lock:
+            return {field: np.frombuffer(getattr(self, field), dtype=np.float64).copy() for field in self.FIELDS}
+
+    def closes(self, count):
+        with self.lock:
+            return self.close[-count:].tolist()
+
+    def close_at(self, start):
+        with self.lock:
+            i = bisect.bisect_left(self.start, start)
+            if i < len(self.start) and self.start[i] == start:
+                return self.close[i]
+            return None
+
+    def last_completed(self):
+        with self.lock:
+            return self.start[-2] if len(self.start) >= 2 else None
+
+    def tail(self, count):
+        return self.closes(count)
+
+    def snapshot(self):
+        with self.lock:
+            n = min(len(self.start), self.maxlen)
+            return {field: getattr(self, field)[-n:] for field in self.FIELDS}
+
+    def view(self, window, width):
+        """Gleiche Schnittstelle wie ChartSeries.view: Schlusskurse plus echtes Hoch/Tief des Fensters."""
+        with self.lock:
+            n = min(window, len(self.start))
+            ys = np.frombuffer(self.close, dtype=np.float64)[-n:].copy()
+            low = min(self.low[-n:])
+            high = max(self.high[-n:])
+        return np.arange(n), ys, low, high
+
+
+class CandleBook:
+    """Alle Zeitrahmen eines Paares; ein Tick aktualisiert jeden Zeitrahmen in O(1)."""
+
+    def __init__(self, timeframes=None, saved=None):
+        timeframes = CANDLE_TIMEFRAMES if timeframes is None else timeframes
+        saved = saved or {}
+        self.series = {name: CandleSeries(seconds, CANDLE_MAXLEN, columns=saved.get(name))
+                       for name, seconds in timeframes.items()}
+
+    def reconfigure(self, timeframes, maxlen):
+        """Bestehende Zeitrahmen behalten, neue aus einem feineren (Teiler) zusammenfassen statt leer zu starten."""
+        series = {}
+        for name, seconds in timeframes.items():
+            current = self.series.get(name)
+            if current is not None and current.seconds == seconds:
+                current.resize(maxlen)
+            else:
+                current = self._resample(seconds, maxlen)
+            series[name] = current
+        self.series = series  # Referenztausch, Leser sehen alt oder neu
+
+    def _resample(self, seconds, maxlen):
+        sources = [s for s in self.series.values() if len(s) and s.seconds < seconds and seconds % s.seconds == 0]
+        if not sources:
+            return CandleSeries(seconds, maxlen)
+        source = min(sources, key=lambda s: (s.start[0], s.seconds))  # längste Abdeckung, dann feinste
+        cols = source.columns()
+        buckets = cols["start"] - cols["start"] % seconds
+        first = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        if cols["start"][0] != buckets[0]:
+            first = first[1:]  # angeschnittene erste Kerze verwerfen
+        if not len(first):
+            return CandleSeries(seconds, maxlen)
+        cut = first[0]
+        offsets = first - cut
+        last = np.r_[first[1:], len(buckets)] - 1
+        columns = {
+            "start": buckets[first],
+            "open": cols["open"][first],
+            "high": np.maximum.reduceat(cols["high"][cut:], offsets),
+            "low": np.minimum.reduceat(cols["low"][cut:], offsets),
+            "close": cols["close"][last],
+            "volume": np.add.reduceat(cols["volume"][cut:], offsets),
+        }
+        return CandleSeries(seconds, maxlen, columns={f: v[-maxlen:].tolist() for f, v in columns.items()})
+
+    def __getitem__(self, timeframe):
+        return self.series[timeframe]
+
+    def update(self, ts, price, volume=0.0):
+        for series in self.series.values():
+            series.update(ts, price, volume)
+
+    def snapshot(self):
+        return {name: series.snapshot() for name, series in self.series.items()}
+
+
+CANDLES = {pair: CandleBook() for pair in TRADE_PAIRS}
+
+
+def indicator_prices(pair):
+    """Kursreihe für die Indikatoren: Roh-Ticks oder Schlusskurse von INDICATOR_TIMEFRAME (inkl. laufender Kerze)."""
+    if INDICATOR_TIMEFRAME is None:
+        return PRICE_HISTORY[pair]
+    return CANDLES[pair][INDICATOR_TIMEFRAME].closes(PRICE_HISTORY_LEN)
+
+
+# ----------------- Trades-Feed (VWAP, Volumen, Orderflow) -----------------
+class TradeFlow:
+    """Rollendes Zeitfenster über die öffentlichen Trades eines Paares. Summen laufen mit,
+    jeder Trade kostet O(1), abgelaufene werden am Kopf übersprungen (amortisiert O(1))."""
+    __slots__ = ("window", "times", "prices", "volumes", "sides", "head",
+                 "sum_pv", "sum_v", "buy_v", "sell_v", "count")
+
+    def __init__(self, window=TRADE_FLOW_WINDOW_SECONDS):
+        self.window = window
+        self.times = array("d")
+        self.prices = array("d")
+        self.volumes = array("d")
+        self.sides = array("b")  # +1 Käufer-, -1 Verkäufer-initiiert
+        self.head = 0
+        self.sum_pv = self.sum_v = self.buy_v = self.sell_v = 0.0
+        self.count = 0
+
+    def add(self, ts, price, volume, side):
+        self.times.append(ts)
+        self.prices.append(price)
+        self.volumes.append(volume)
+        self.sides.append(side)
+        self.count += 1
+        self.sum_pv += price * volume
+        self.sum_v += volume
+        if side > 0:
+            self.buy_v += volume
+        else:
+            self.sell_v += volume
+
+    def expire(self, now):
+        cutoff = now - self.window
+        while self.head < len(self.times) and self.times[self.head] < cutoff:
+            i = self.head
+            self.sum_pv -= self.prices[i] * self.volumes[i]
+            self.sum_v -= self.volumes[i]
+            if self.sides[i] > 0:
+                self.buy_v -= self.volumes[i]
+            else:
+                self.sell_v -= self.volumes[i]
+            self.head += 1
+        if self.head > 1024 and self.head * 2 > len(self.times):
+            self._compact()
+
+    def _compact(self):
+        # Kopf abschneiden und Summen frisch aufaddieren (kein Drift durch ewiges +=/-=)
+        for column in (self.times, self.prices, self.volumes, self.sides):
+            del column[:self.head]
+        self.head = 0
+        self.sum_pv = sum(p * v for p, v in zip(self.prices, self.volumes))
+        self.sum_v = sum(self.volumes)
+        self.buy_v = sum(v for v, s in zip(self.volumes, self.sides) if s > 0)
+        self.sell_v = self.sum_v - self.buy_v
+
+    def vwap(self):
+        return self.sum_pv / self.sum_v if self.sum_v > VOLUME_EPSILON else None
+
+    def volume_quote(self):
+        return self.sum_pv  # Umsatz in Quote-Währung (EUR)
+
+    def imbalance(self):
+        total = self.buy_v + self.sell_v
+        return (self.buy_v - self.sell_v) / total if total > VOLUME_EPSILON else 0.0
+
+
+class TradeFeed:
+    """Liest /0/public/Trades mit since-Cursor: jede Abfrage setzt genau hinter dem letzten Trade auf,
+    daher weder Lücken noch Doppelte. Trades gehen in TradeFlow und (mit Volumen) in die Kerzen."""
+
+    def __init__(self):
+        self.flows = {}
+        self.cursors = {}    # pair -> "last" von Kraken
+        self.last_ids = {}   # pair -> letzte Trade-ID (Schutz gegen Überlappung)
+        self.polled_at = {}
+
+    def flow(self, pair):
+        flow = self.flows.get(pair)
+        if flow is None:
+            flow = self.flows[pair] = TradeFlow(TRADE_FLOW_WINDOW_SECONDS)
+        return flow
+
+    def due(self, pair):
+        return time.monotonic() - self.polled_at.get(pair, 0.0) >= TRADE_FEED_INTERVAL_SECONDS
+
+    def poll(self, pair):
+        self.polled_at[pair] = time.monotonic()
+        flow = self.flow(pair)
+        added = 0
+        for _ in range(TRADE_FEED_MAX_PAGES):
+            params = {"pair": pair}
+            if pair in self.cursors:
+                params["since"] = self.cursors[pair]
+            data = kraken_request("GET", "/0/public/Trades", params=params).json()
+            if data.get("error"):
+                raise RuntimeError(data["error"])
+            result = data["result"]
+            trades = next((v for k, v in result.items() if k != "last"), [])
+            added += self._ingest(pair, flow, trades)
+            self.cursors[pair] = result["last"]
+            if len(trades) < 1000:  # letzte Seite erreicht
+                break
+        flow.expire(time.time())
+        if added:
+            METRICS.inc("trades_ingested_total", added, pair=pair)
+        return added
+
+    def _ingest(self, pair, flow, trades):
+        last_id = self.last_ids.get(pair, -1)
+        book = CANDLES.get(pair)
+        added = 0
+        for trade in trades:
+            # [Preis, Volumen, Zeit, b/s, m/l, misc, trade_id]
+            if len(trade) > 6:
+                if trade[6] <= last_id:
+                    continue
+                last_id = trade[6]
+            price, volume, ts = float(trade[0]), float(trade[1]), float(trade[2])
+            flow.add(ts, price, volume, 1 if trade[3] == "b" else -1)
+            if book is not None:
+                book.update(ts, price, volume)
+            added += 1
+        self.last_ids[pair] = last_id
+        return added
+
+    def remove(self, pair):
+        for table in (self.flows, self.cursors, self.last_ids, self.polled_at):
+            table.pop(pair, None)
+
+    def set_window(self, seconds):
+        # Kürzer wirkt sofort; länger füllt sich mit neuen Trades (abgelaufene sind schon verworfen)
+        now = time.time()
+        for flow in self.flows.values():
+            flow.window = seconds
+            flow.expire(now)
+
+    def describe(self, pair):
+        flow = self.flows.get(pair)
+        if flow is None or flow.vwap() is None:
+            return "keine Trades"
+        minutes = TRADE_FLOW_WINDOW_SECONDS / 60
+        return (f"VWAP {minutes:.0f}min {flow.vwap():.4f}, Umsatz {flow.volume_quote():,.0f}, "
+                f"Kaufdruck {flow.imbalance():+.2f}")
+
+
+TRADE_FEED = TradeFeed()
+
+
+def flow_allows_buy(pair):
+    """Volumen-/Orderflow-Filter für Kaufsignale (MIN_FLOW_VOLUME_EUR, MIN_BUY_IMBALANCE)."""
+    if not MIN_FLOW_VOLUME_EUR and MIN_BUY_IMBALANCE is None:
+        return True
+    flow = TRADE_FEED.flows.get(pair)
+    if flow is None:
+        return False
+    flow.expire(time.time())
+    if flow.volume_quote() < MIN_FLOW_VOLUME_EUR:
+        return False
+    return MIN_BUY_IMBALANCE is None or flow.imbalance() >= MIN_BUY_IMBALANCE
+
+
+# ----------------- Korrelation und Exposure (rollend, je Kerze) -----------------
+class RollingCorrelation:
+    """Kovarianz/Korrelation der Log-Renditen aller aktiven Paare über die letzten N Kerzen.
+    Summen und Kreuzprodukt-Matrix laufen mit: pro Kerze kommt r r^T hinzu und die älteste fällt
+    heraus, also O(Paare²) statt Neuberechnung aus der ganzen Historie."""
+
+    def __init__(self, timeframe=CORRELATION_TIMEFRAME, window=CORRELATION_WINDOW):
+        self.timeframe = timeframe
+        self.window = window
+        self.lock = threading.Lock()
+        self._reset(())
+
+    def configure(self, timeframe, window):
+        # Beim nächsten update() aus den vorhandenen Kerzen neu aufgebaut
+        with self.lock:
+            self.timeframe = timeframe
+            self.window = window
+            self._reset(())
+
+    def _reset(self, pairs):
+        n = len(pairs)
+        self.pairs = pairs
+        self.index = {pair: i for i, pair in enumerate(pairs)}
+        self.returns = np.zeros((self.window, n))  # Ringpuffer, eine Zeile je Kerze
+        self.pos = 0
+        self.count = 0
+        self.pushes = 0
+        self.sums = np.zeros(n)
+        self.cross = np.zeros((n, n))
+        self.last_bar = None
+
+    def update(self):
+        """Im Bot-Thread nach jedem Zyklus: neu abgeschlossene Kerzen einarbeiten."""
+        pairs = tuple(sorted(p for p in TRADE_PAIRS if p in CANDLES))
+        books = [CANDLES[p][self.timeframe] for p in pairs]
+        completed = [b.last_completed() for b in books]
+        if not pairs or None in completed:
+            return
+        latest = min(completed)
+        seconds = CANDLE_TIMEFRAMES[self.timeframe]
+        with self.lock:
+            if pairs != self.pairs:
+                # Paare geändert: einmalig aus den Kerzen neu aufbauen
+                self._reset(pairs)
+                self.last_bar = latest - self.window * seconds
+            bar = self.last_bar + seconds if self.last_bar is not None else latest
+            bar = max(bar, latest - (self.window - 1) * seconds)  # nach langer Pause nur das Fenster
+            while bar <= latest:
+                self._push_bar(books, bar, seconds)
+                bar += seconds
+            self.last_bar = latest
+
+    def _push_bar(self, books, bar, seconds):
+        returns = np.empty(len(books))
+        for i, book in enumerate(books):
+            prev, close = book.close_at(bar - seconds), book.close_at(bar)
+            if not prev or not close:
+                return  # Kerze fehlt bei einem Paar (z.B. frisch hinzugefügt)
+            returns[i] = math.log(close / prev)
+        if self.count == self.window:
+            old = self.returns[self.pos]
+            self.sums -= old
+            self.cross -= np.outer(old, old)
+        else:
+            self.count += 1
+        self.returns[self.pos] = returns
+        self.sums += returns
+        self.cross += np.outer(returns, returns)
+        self.pos = (self.pos + 1) % self.window
+        self.pushes += 1
+        if self.pushes % self.window == 0:
+            # Rundungsfehler der laufenden Summen einmal je Fenster zurücksetzen
+            rows = self.returns[:self.count]
+            self.sums = rows.sum(axis=0)
+            self.cross = rows.T @ rows
+
+    def covariance(self):
+        with self.lock:
+            if self.count < 2:
+                return None
+            return (self.cross - np.outer(self.sums, self.sums) / self.count) / (self.count - 1)
+
+    def correlation(self):
+        cov = self.covariance()
+        if cov is None:
+            return None
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr = np.nan_to_num(corr)
+        np.fill_diagonal(corr, 1.0)
+        return np.clip(corr, -1.0, 1.0)
+
+    def report(self):
+        corr = self.correlation()
+        if corr is None:
+            return f"Noch zu wenige {self.timeframe}-Kerzen für eine Korrelation."
+        width = max(8, *(len(p) + 1 for p in self.pairs))
+        lines = [" " * width + "".join(f"{p:>{width}}" for p in self.pairs)]
+        for pair, row in zip(self.pairs, corr):
+            lines.append(f"{pair:<{width}}" + "".join(f"{v:>{width}.2f}" for v in row))
+        lines.append(f"\n{self.count} Kerzen à {self.timeframe}")
+        return "\n".join(lines)
+
+
+CORRELATION = RollingCorrelation()
+
+
+def position_values(pairs):
+    # Marktwert der offenen Positionen in EUR, Reihenfolge wie pairs
+    values = np.zeros(len(pairs))
+    for i, pair in enumerate(pairs):
+        history = PRICE_HISTORY.get(pair)
+        if history:
+            values[i] = LEDGER.open_volume(pair) * history[-1]
+    return values
+
+
+def total_exposure():
+    """Marktwert aller offenen Positionen in EUR – unabhängig davon, ob das Paar schon in der Matrix ist.
+    Ohne Kurs zählt der Einstand."""
+    total = 0.0
+    for pair, lots in list(LEDGER.pairs.items()):
+        if not lots.open_units:
+            continue
+        history = PRICE_HISTORY.get(pair)
+        total += lots.open_volume * (history[-1] if history else lots.avg_price())
+    return total
+
+
+def exposure_report():
+    pairs = CORRELATION.pairs
+    values = position_values(pairs)
+    lines = [CORRELATION.report(), ""]
+    lines += [f"{pair:<12}{value:>12.2f} EUR" for pair, value in zip(pairs, values) if value]
+    lines.append(f"{'Summe':<12}{total_exposure():>12.2f} EUR")
+    cov = CORRELATION.covariance()
+    if cov is not None and values.any():
+        lines.append(f"Risiko (1σ je {CORRELATION.timeframe}): {math.sqrt(max(float(values @ cov @ values), 0.0)):.2f} EUR")
+    return "\n".join(lines)
+
+
+def exposure_check(pair, order_eur):
+    """Prüft einen Kauf gegen die Portfolio-Limits. Liefert (erlaubt, Begründung)."""
+    if MAX_PORTFOLIO_EXPOSURE_EUR is None and MAX_CORRELATED_EXPOSURE_EUR is None and MAX_PORTFOLIO_RISK_EUR is None:
+        return True, ""
+    if MAX_PORTFOLIO_EXPOSURE_EUR is not None:
+        total = total_exposure() + order_eur
+        if total > MAX_PORTFOLIO_EXPOSURE_EUR:
+            return False, f"Gesamtexposure {total:.2f} EUR > {MAX_PORTFOLIO_EXPOSURE_EUR:.2f}"
+    # Korrelation und Kovarianz nur über die Paare, die schon in der Matrix sind
+    values = position_values(CORRELATION.pairs)
+    i = CORRELATION.index.get(pair)
+    if i is None:
+        return True, ""  # Paar noch nicht in der Matrix: nur das Gesamtlimit greift
+    if MAX_CORRELATED_EXPOSURE_EUR is not None:
+        corr = CORRELATION.correlation()
+        if corr is not None:
+            correlated = order_eur + float(np.clip(corr[i], 0, None) @ values)
+            if correlated > MAX_CORRELATED_EXPOSURE_EUR:
+                return False, f"korreliertes Exposure {correlated:.2f} EUR > {MAX_CORRELATED_EXPOSURE_EUR:.2f}"
+    if MAX_PORTFOLIO_RISK_EUR is not None:
+        cov = CORRELATION.covariance()
+        if cov is not None:
+            after = values.copy()
+            after[i] += order_eur
+            risk = math.sqrt(max(float(after @ cov @ after), 0.0))
+            if risk > MAX_PORTFOLIO_RISK_EUR:
+                return False, f"Portfoliorisiko {risk:.2f} EUR je {CORRELATION.timeframe} > {MAX_PORTFOLIO_RISK_EUR:.2f}"
+    return True, ""
+
+
+# ----------------- Konfigurationsdatei (validiert, Hot-Reload zwischen zwei Ticks) -----------------
+# JSON-Objekt mit einem Teil der Schlüssel aus CONFIG_SCHEMA, z.B. {"RSI_PERIOD": 21, "TRADE_PAIRS": {"SOLEUR": 0.5}}.
+# Fehlende Schlüssel gelten mit ihrem Standardwert.
+def _number(low=None, high=None, integer=False):
+    def check(value):
+        if isinstance(value, bool) or not isinstance(value, int if integer else (int, float)):
+            raise ValueError("ganze Zahl erwartet" if integer else "Zahl erwartet")
+        if (low is not None and value < low) or (high is not None and value > high):
+            raise ValueError(f"{value} außerhalb [{low}, {high}]")
+        return value if integer else float(value)
+    return check
+
+
+def _text(value):
+    if not isinstance(value, str) or not value:
+        raise ValueError("Text erwartet")
+    return value
+
+
+def _optional(check):
+    return lambda value: None if value is None else check(value)
+
+
+def _rules(value):
+    if not isinstance(value, dict) or set(value) != {"buy", "sell"}:
+        raise ValueError('{"buy": ..., "sell": ...} erwartet')
+    for side, text in value.items():
+        compile_rule(_text(text))
+    return dict(value)
+
+
+def _mapping(check_value):
+    def check(value):
+        if not isinstance(value, dict) or not value:
+            raise ValueError("nicht-leeres Objekt erwartet")
+        result = {}
+        for key, item in value.items():
+            try:
+                result[key] = check_value(item)
+            except ValueError as e:
+                raise ValueError(f"{key}: {e}") from None
+        return result
+    return check
+
+
+CONFIG_SCHEMA = {
+    "TRADE_PAIRS": _mapping(_number(low=1e-12)),
+    "TRADE_COOLDOWN_SECONDS": _number(0),
+    "REENTRY_THRESHOLD": _number(0, 1),
+    "STRATEGY": _text,
+    "STRATEGY_RULES": _mapping(_rules),
+    "PRICE_HISTORY_LEN": _number(10, 100000, integer=True),
+    "RSI_PERIOD": _number(2, integer=True),
+    "BOLLINGER_PERIOD": _number(2, integer=True),
+    "BOLLINGER_STD": _number(0.1, 10),
+    "INDICATOR_TIMEFRAME": _optional(_text),
+    "MIN_PROFIT_EUR": _number(),
+    "MIN_PROFIT_PCT": _number(),
+    "STOP_LOSS_DYNAMIC": _number(0, 1),
+    "TAKE_PROFIT_DYNAMIC": _number(0),
+    "TRAILING_STOP_DYNAMIC": _optional(_number(0, 1)),
+    "CANDLE_TIMEFRAMES": _mapping(_number(1, integer=True)),
+    "CANDLE_MAXLEN": _number(10, integer=True),
+    "TRADE_FLOW_WINDOW_SECONDS": _number(1),
+    "MIN_FLOW_VOLUME_EUR": _number(0),
+    "MIN_BUY_IMBALANCE": _optional(_number(-1, 1)),
+    "CORRELATION_TIMEFRAME": _text,
+    "CORRELATION_WINDOW": _number(3, integer=True),
+    "MAX_PORTFOLIO_EXPOSURE_EUR": _optional(_number(0)),
+    "MAX_CORRELATED_EXPOSURE_EUR": _optional(_number(0)),
+    "MAX_PORTFOLIO_RISK_EUR": _optional(_number(0)),
+    "SCREENER_TOP_N": _number(0, integer=True),
+    "SCREENER_ORDER_EUR": _number(0),
+    "SCREENER_MIN_VOLUME_EUR": _number(0),
+    "SCREENER_PROMOTE_SECONDS": _number(0),
+    "TRADE_FEED_INTERVAL_SECONDS": _number(1),
+    "RISK_POLL_SECONDS": _number(0.1),
+}
+CONFIG_DEFAULTS = {key: dict(globals()[key]) if isinstance(globals()[key], dict) else globals()[key]
+                   for key in CONFIG_SCHEMA}
+
+
+def validate_config(raw):
+    """Komplette Konfiguration prüfen (Standardwerte + Datei). Liefert (Werte, Fehler); nur fehlerfrei anwenden."""
+    if not isinstance(raw, dict):
+        return None, ["JSON-Objekt erwartet"]
+    values, errors = {k: dict(v) if isinstance(v, dict) else v for k, v in CONFIG_DEFAULTS.items()}, []
+    for key, value in raw.items():
+        check = CONFIG_SCHEMA.get(key)
+        if check is None:
+            errors.append(f"{key}: unbekannter Schlüssel")
+            continue
+        try:
+            values[key] = check(value)
+        except ValueError as e:
+            errors.append(f"{key}: {e}")
+    if errors:
+        return values, errors
+    for key in ("INDICATOR_TIMEFRAME", "CORRELATION_TIMEFRAME"):
+        if values[key] is not None and values[key] not in values["CANDLE_TIMEFRAMES"]:
+            errors.append(f"{key}: {values[key]} fehlt in CANDLE_TIMEFRAMES")
+    if values["STRATEGY"] not in values["STRATEGY_RULES"]:
+        errors.append(f"STRATEGY: {values['STRATEGY']} fehlt in STRATEGY_RULES")
+    for key in ("RSI_PERIOD", "BOLLINGER_PERIOD"):
+        if values[key] > values["PRICE_HISTORY_LEN"]:
+            errors.append(f"{key}: {values[key]} > PRICE_HISTORY_LEN {values['PRICE_HISTORY_LEN']}")
+    if ASSET_PAIRS.pairs:
+        errors.extend(f"TRADE_PAIRS: {pair} unbekannt" for pair in values["TRADE_PAIRS"] if not ASSET_PAIRS.resolve(pair))
+    return values, errors
+
+
+def resize_price_history():
+    for pair, history in list(PRICE_HISTORY.items()):
+        if len(history) > PRICE_HISTORY_LEN:
+            del history[:-PRICE_HISTORY_LEN]
+        elif pair in CHART_SERIES and len(CHART_SERIES[pair]) > len(history):
+            # Längerer Puffer: aus der Chart-Reihe (gleiche Ticks, ~3 Tage) nachfüllen statt neu aufzuwärmen
+            PRICE_HISTORY[pair] = CHART_SERIES[pair].tail(PRICE_HISTORY_LEN)
+
+
+def apply_trade_pairs(old, new):
+    for pair, volume in new.items():
+        if pair in TRADE_PAIRS:
+            TRADE_PAIRS[pair] = volume
+        else:
+            add_trade_pair(pair, volume)
+    PENDING_REMOVAL.difference_update(new)
+    for pair in old.keys() - new.keys():
+        if pair not in TRADE_PAIRS or pair in SCREENER.promoted:
+            continue
+        if LEDGER.open_units(pair):
+            PENDING_REMOVAL.add(pair)
+            log.warning("%s: keine Käufe mehr, wird entfernt, sobald die offene Position abgebaut ist.", pair,
+                        extra={"pair": pair})
+            continue
+        remove_trade_pair(pair)
+
+
+def retire_pending_pairs():
+    # Zu Beginn jedes Ticks: vorgemerkte Paare ohne offene Position endgültig entfernen
+    for pair in list(PENDING_REMOVAL):
+        if not LEDGER.open_units(pair):
+            remove_trade_pair(pair)
+            log.info("%s entfernt (Position abgebaut).", pair, extra={"pair": pair})
+
+
+def apply_config(values, previous):
+    """Kommando (Bot-Thread, zwischen zwei Ticks): geänderte Werte setzen, nur betroffenen Zustand nachziehen."""
+    changed = {key: value for key, value in values.items() if value != previous.get(key)}
+    if not changed:
+        return
+    namespace = globals()
+    for key, value in changed.items():
+        if key != "TRADE_PAIRS":
+            namespace[key] = value
+    if "TRADE_PAIRS" in changed:
+        apply_trade_pairs(previous["TRADE_PAIRS"], values["TRADE_PAIRS"])
+    if "PRICE_HISTORY_LEN" in changed:
+        resize_price_history()
+    if changed.keys() & {"CANDLE_TIMEFRAMES", "CANDLE_MAXLEN"}:
+        for book in CANDLES.values():
+            book.reconfigure(CANDLE_TIMEFRAMES, CANDLE_MAXLEN)
+    if changed.keys() & {"CANDLE_TIMEFRAMES", "CORRELATION_TIMEFRAME", "CORRELATION_WINDOW"}:
+        CORRELATION.configure(CORRELATION_TIMEFRAME, CORRELATION_WINDOW)
+    if "TRADE_FLOW_WINDOW_SECONDS" in changed:
+        TRADE_FEED.set_window(TRADE_FLOW_WINDOW_SECONDS)
+    METRICS.inc("config_reloads_total", result="applied")
+    log.info("Konfiguration übernommen: %s", ", ".join(f"{key}={value}" for key, value in changed.items()))
+
+
+class ConfigWatcher:
+    """Prüft die Konfigurationsdatei (mtime/Größe) im Hintergrund. Eine gültige neue Fassung geht als
+    ein Kommando an den Bot-Thread; ungültige werden mit allen Fehlern geloggt, der alte Stand bleibt."""
+
+    def __init__(self, path=CONFIG_PATH, interval=CONFIG_POLL_SECONDS):
+        self.path = path
+        self.interval = interval
+        self.applied = CONFIG_DEFAULTS
+        self.stamp = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.check()
+        self.thread = threading.Thread(target=self._run, name="ConfigWatcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                log.error("ConfigWatcher: %s", e)
+
+    def check(self):
+        try:
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if stamp == self.stamp:
+            return False
+        self.stamp = stamp
+        if stamp is None:
+            return False  # Datei entfernt: aktueller Stand bleibt
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError) as e:
+            errors = [str(e)]  # z.B. halb gespeichert; die nächste Änderung wird erneut geprüft
+        else:
+            values, errors = validate_config(raw)
+        if errors:
+            METRICS.inc("config_reloads_total", result="invalid")
+            log.error("Konfiguration %s verworfen: %s", self.path, "; ".join(errors))
+            return False
+        previous, self.applied = self.applied, values
+        STATE.submit(partial(apply_config, values, previous))
+        return True
+
+
+CONFIG_WATCHER = ConfigWatcher()
+
+
+# ----------------- Chart-Renderer (persistente Linien, Blitting) -----------------
+CHART_POINTS = 100
+CHART_FRAME_MS = 250       # kürzester Abstand zweier Chart-Frames
+CHART_FRAME_BUDGET = 0.25  # max. Anteil der GUI-Zeit, den Charts belegen dürfen
+
+
+class ChartRenderer:
+    """Legt die Linien eines Paares einmal an und aktualisiert sie per set_data.
+    Komplett neu gezeichnet wird nur, wenn sich Achsen oder Titel ändern, sonst wird geblittet."""
+    LEVELS = (
+        ("Next Buy", "green", "--"),
+        ("Next Sell", "red", "--"),
+        ("Stop-Loss", "orange", ":"),
+        ("Fibo 0.0", "purple", "--"),
+        ("Fibo 38.2", "purple", "--"),
+        ("Fibo 61.8", "purple", "--"),
+    )
+
+    def __init__(self, pair, canvas, ax, zoom=next(iter(CHART_ZOOM_LEVELS))):
+        self.pair = pair
+        self.canvas = canvas
+        self.ax = ax
+        self.zoom = zoom
+        self.timeframe = None  # None = Ticks, sonst Schlusskurse der Kerzen dieses Zeitrahmens
+        self.background = None
+        self.title = None
+        self.price_line, = ax.plot([], [], label="Price", color="blue", animated=True)
+        self.levels = [ax.axhline(y=0, color=color, linestyle=style, label=label, animated=True)
+                       for label, color, style in self.LEVELS]
+        self.artists = [self.price_line, *self.levels]
+        ax.legend(loc="upper left")
+        canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        # Nach jedem vollen Draw (auch Resize) Hintergrund ohne die animierten Linien merken
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+
+    def _update_limits(self, lo, hi):
+        span = max(hi - lo, abs(hi) * 1e-6, 1e-12)
+        cur_lo, cur_hi = self.ax.get_ylim()
+        if self.background is not None and lo >= cur_lo and hi <= cur_hi and cur_hi - cur_lo <= 3 * span:
+            return False
+        pad = span * 0.1
+        self.ax.set_ylim(lo - pad, hi + pad)
+        return True
+
+    def _update_xlim(self, count, window):
+        # x-Achse wächst in Verdopplungen bis zur Fensterbreite, damit nicht jeder Tick neu zeichnet
+        xmax = CHART_POINTS
+        while xmax < count:
+            xmax *= 2
+        xmax = min(max(xmax, CHART_POINTS), max(window, CHART_POINTS)) - 1
+        if self.ax.get_xlim() == (0, xmax):
+            return False
+        self.ax.set_xlim(0, xmax)
+        return True
+
+    def update(self, series):
+        if series is None or not len(series):
+            return
+        window = CHART_ZOOM_LEVELS[self.zoom]
+        xs, ys, low, high = series.view(window, max(100, self.canvas.width()))
+        current = float(ys[-1])
+        diff = high - low
+        stop, take = RISK.nearest(self.pair)  # scharfe Trigger offener Lots, sonst Richtwerte
+        levels = (
+            current * (1 - REENTRY_THRESHOLD),
+            take if take is not None else current * (1 + TAKE_PROFIT_DYNAMIC),
+            stop if stop is not None else current * (1 - STOP_LOSS_DYNAMIC),
+            high, high - diff * 0.382, high - diff * 0.618,  # Fibonacci über das sichtbare Fenster
+        )
+        self.price_line.set_data(xs, ys)
+        for line, y in zip(self.levels, levels):
+            line.set_ydata([y, y])
+
+        # Trendpfeil (einfacher linearer Trend)
+        recent = series.tail(10)
+        label = self.zoom if self.timeframe is None else f"{self.timeframe}-Kerzen, {self.zoom}"
+        if len(recent) >= 10:
+            slope, _ = np.polyfit(np.arange(10), np.array(recent), 1)
+            title = f"{self.pair} – {label}   Trend: {'↑' if slope > 0 else '↓'}"
+        else:
+            title = f"{self.pair} – {label}"
+
+        full_redraw = self._update_xlim(int(xs[-1]) + 1, window)
+        full_redraw |= self._update_limits(min(low, min(levels)), max(high, max(levels)))
+        if title != self.title:
+            self.ax.set_title(title)
+            self.title = title
+            full_redraw = True
+
+        if full_redraw or self.background is None:
+            self.canvas.draw()  # draw_event aktualisiert Hintergrund und Linien
+        else:
+            self.canvas.restore_region(self.background)
+            self._draw_artists()
+            self.canvas.blit(self.ax.bbox)
+
+
+# ----------------- Trade-Liste (Model/View über TRADES) -----------------
+class TradeListModel(QAbstractListModel):
+    """Neuester Eintrag oben. Neue Trades werden oben eingefügt, ältere Seiten
+    (auch aus dem Archiv) lädt die View erst beim Scrollen über fetchMore nach.
+    Im Speicher liegen nur die zuletzt angezeigten MAX_PAGES Seiten; Seiten sind nach der
+    laufenden Nummer des Eintrags geschnitten und bleiben daher beim Einfügen oben gültig."""
+    PAGE_SIZE = 200
+    MAX_PAGES = 8
+
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.count = 0
+        self.exhausted = False
+        self.pages = OrderedDict()  # Seite -> (Ende exklusiv, Einträge neuester zuerst)
+        self.seen = history.appended
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entry(index.row())
+        if entry is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return entry.text
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return datetime.fromtimestamp(entry.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        return None
+
+    def entry(self, row):
+        seq = self.seen - 1 - row  # laufende Nummer dieser Sitzung, ältere Sitzungen im Archiv < 0
+        page_no = seq // self.PAGE_SIZE
+        end = min((page_no + 1) * self.PAGE_SIZE, self.seen)
+        page = self.pages.get(page_no)
+        if page is None or page[0] < end:
+            page = self.pages[page_no] = (end, self._load(page_no * self.PAGE_SIZE, end))
+            while len(self.pages) > self.MAX_PAGES:
+                self.pages.popitem(last=False)  # am längsten nicht angezeigte Seite
+        else:
+            self.pages.move_to_end(page_no)
+        entries = page[1]
+        i = end - 1 - seq
+        return entries[i] if i < len(entries) else None
+
+    def _load(self, start, end):
+        # Offset zählt vom neuesten Eintrag; hängt der Bot währenddessen an, noch einmal
+        try:
+            while True:
+                total = self.history.appended
+                entries = self.history.query(offset=total - end, limit=end - start)
+                if self.history.appended == total:
+                    return entries
+        except Exception as e:
+            log.warning("TradeListModel: Seite nicht geladen: %s", e)
+            return []
+
+    def refresh(self):
+        total = self.history.appended
+        new = total - self.seen
+        if new <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), 0, new - 1)
+        self.seen = total
+        self.count += new
+        self.endInsertRows()
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        self.refresh()  # Offsets beziehen sich auf den aktuellen Stand
+        # Die Seite des nächsten älteren Eintrags laden; sie landet gleich im Seiten-Cache
+        seq = self.seen - 1 - self.count
+        self.entry(self.count)
+        end, entries = self.pages[seq // self.PAGE_SIZE]
+        oldest = end - len(entries)
+        if len(entries) < end - seq // self.PAGE_SIZE * self.PAGE_SIZE:
+            self.exhausted = True  # Archiv reicht nicht weiter zurück
+        available = max(seq - oldest + 1, 0)
+        if available:
+            self.beginInsertRows(QModelIndex(), self.count, self.count + available - 1)
+            self.count += available
+            self.endInsertRows()
+
+
+# ----------------- Hintergrund-Aufgaben der GUI (Fortschritt, Abbruch) -----------------
+class TaskCancelled(Exception):
+    pass
+
+
+class Worker(QThread):
+    """Führt eine blockierende Aufgabe (Netzwerk) außerhalb des GUI-Threads aus. Die Aufgabe bekommt den
+    Worker und meldet mit step() ihren Stand; nach cancel() wirft der nächste step() TaskCancelled.
+    Ergebnis, Fehler und Abbruch kommen als Signale im GUI-Thread an."""
+    progress = pyqtSignal(int, int, str)
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, name, task):
+        super().__init__()
+        self.name = name
+        self.task = task
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def step(self, done, total, text):
+        if self.cancel_event.is_set():
+            raise TaskCancelled()
+        self.progress.emit(done, total, text)
+
+    def run(self):
+        threading.current_thread().name = f"Worker-{self.name}"
+        try:
+            result = self.task(self)
+            if self.cancel_event.is_set():
+                raise TaskCancelled()  # laufender Request war nicht abbrechbar: Ergebnis verwerfen
+        except TaskCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            log.error("%s fehlgeschlagen: %s", self.name, e)
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit(result)
 
 
 # ----------------- BotThread -----------------
 class BotThread(QThread):
     update_gui = pyqtSignal()
+    price_updated = pyqtSignal(str)
+    progress = pyqtSignal(int, int, str)
 
-    def __init__(self):
+    def __init__(self, initial_trades=False):
         super().__init__()
         self.running = True
+        self.tick = 0
+        self.backoff = Backoff()
+        self.initial_trades = initial_trades
+        self.risk_retries = {}  # (pair, lot_id) -> [nächster Versuch, Backoff] nach fehlgeschlagenem Verkauf
 
     def run(self):
-        print("[DEBUG] BotThread gestartet.")
+        log.debug("BotThread gestartet.")
+        threading.current_thread().name = "BotThread"  # für Profiler und Log
+        STATE.attach(self)
+        try:
+            ASSET_PAIRS.ensure()  # Orders brauchen Dezimalen und Mindestmengen, bei frischer Installation ohne Cache
+            if self.initial_trades:
+                self.startup()
+            self.trade_loop()
+        finally:
+            STATE.detach(self)
+
+    def startup(self):
+        # Initialkäufe im Bot-Thread statt in der GUI; Stop bricht zwischen zwei Paaren ab
+        try:
+            bought = perform_initial_trades(self.progress.emit, lambda: not self.running)
+        except Exception as e:
+            log.error("Initialkäufe fehlgeschlagen: %s", e)
+            bought = 0
+        STATE.publish()
+        self.update_gui.emit()
+        self.progress.emit(1, 1, f"{bought} Initialkäufe")
+
+    def trade_loop(self):
         while self.running:
             try:
-                for pair, amount in TRADE_PAIRS.items():
-                    price = fetch_price(pair)
-                    if price is None:
-                        print(f"[WARNING] Kein Preis für {pair}")
-                        continue
+                STATE.drain()
+                retire_pending_pairs()
+                ASSET_PAIRS.ensure()  # TTL-Refresh; sonst kein Request
+                self.tick += 1
+                cycle_start = time.perf_counter()
+                requested = time.monotonic()
+                quotes = self.screen() if SCREENER_ENABLED else {}
+                if quotes:
+                    LATENCY.observe("batch_fetch", time.monotonic() - requested)
+                for pair, amount in list(TRADE_PAIRS.items()):
+                    if pair in quotes:
+                        # Stufen ab Beginn dieses Paares, sonst zählen Trades-Abfragen früherer Paare mit
+                        trace = TickTrace(pair, None)
+                        trace.received = time.monotonic()
+                    else:
+                        trace = TickTrace(pair, time.monotonic())
+                    self.process_pair(pair, amount, trace, quotes.get(pair))
+                    LATENCY.record(trace)
+                    if TRADE_FEED_ENABLED and TRADE_FEED.due(pair):
+                        self.ingest_trades(pair)
+
+                with METRICS.timer("correlation_seconds"):
+                    CORRELATION.update()
+                STATE.publish()
+                METRICS.observe("bot_cycle_seconds", time.perf_counter() - cycle_start)
+                self.update_gui.emit()
+                CHECKPOINTER.maybe_submit()
+                PROFILER.alloc_checkpoint()
 
-                    PRICE_HISTORY[pair].append(price)
-                    if len(PRICE_HISTORY[pair]) > 100:
-                        PRICE_HISTORY[pair].pop(0)
-
-                    rsi = calculate_rsi(PRICE_HISTORY[pair])
-                    sma, upper, lower = calculate_bollinger(PRICE_HISTORY[pair])
-                    trend = calculate_trend(PRICE_HISTORY[pair])
-                    fib0, fib382, fib618 = calculate_fibonacci_levels(PRICE_HISTORY[pair])
-
-                    if rsi is not None and lower is not None and upper is not None:
-                        if rsi < 30 and price < lower and trend > 0 and fib618 and price <= fib618:
-                            last_trade = LAST_TRADE_TIME.get(pair, 0)
-                            if time.time() - last_trade < TRADE_COOLDOWN_SECONDS:
-                                print(f"[DEBUG] Kauf gesperrt für {pair}: Cooldown läuft.")
-                                continue
-                            last_buy = LAST_BUY_PRICE.get(pair)
-                            if last_buy is not None and price >= last_buy * (1 - REENTRY_THRESHOLD):
-                                print(f"[DEBUG] Kein Reentry-Kauf für {pair}: Preis {price:.2f} nahe letztem Kauf {last_buy:.2f}.")
-                                continue
-                            execute_trade(pair, "buy", amount, price,
-                                f"Signal: RSI={rsi:.2f}, BB-Low={lower:.2f}, Trend={trend:.2f}, Fibo={fib618:.2f}")
-                            LAST_TRADE_TIME[pair] = time.time()
-                            LAST_BUY_PRICE[pair] = price
-
-                        elif rsi > 70 and price > upper and trend < 0:
-                            last_buy = LAST_BUY_PRICE.get(pair)
-                            if last_buy is None:
-                                continue
-                            gain_eur = (price - last_buy) * amount
-                            gain_pct = (price - last_buy) / last_buy * 100
-                            if gain_eur < MIN_PROFIT_EUR or gain_pct < MIN_PROFIT_PCT:
-                                print(f"[DEBUG] Kein Verkauf: Gewinn ({gain_eur:.2f} EUR / {gain_pct:.2f}%) zu gering.")
-                                continue
-                            execute_trade(pair, "sell", amount, price,
-                                f"Signal: RSI={rsi:.2f}, BB-High={upper:.2f}, Trend={trend:.2f}")
-                            LAST_TRADE_TIME[pair] = time.time()
+                self.backoff.reset()
+                self.idle(5)
+            except Exception as e:
+                # Nicht sofort neu anlaufen: wachsende Pause statt Dauerschleife gegen Kraken
+                delay = self.backoff.next()
+                METRICS.inc("bot_cycle_errors_total")
+                log.error("in BotThread.run: %s – neuer Versuch in %.1fs", e, delay, extra={"tick": self.tick})
+                STATE.idle(delay)
 
-                self.update_gui.emit()
+    def ingest_trades(self, pair):
+        try:
+            TRADE_FEED.poll(pair)
+        except CircuitOpenError:
+            pass
+        except Exception as e:
+            log.warning("Trades für %s nicht gelesen: %s", pair, e, extra={"pair": pair, "tick": self.tick})
 
-                if chart_window_instance and hasattr(chart_window_instance, 'canvases'):
-                    for pair in chart_window_instance.canvases:
-                        chart_window_instance.update_chart(pair)
+    def screen(self):
+        try:
+            with METRICS.timer("screener_seconds"):
+                quotes = SCREENER.scan()
+                added, removed = SCREENER.promote()
+        except Exception as e:
+            log.error("Screener: %s", e, extra={"tick": self.tick})
+            return {}
+        for pair in added:
+            log.info("Screener: %s aktiviert (Volumen %s).", pair, TRADE_PAIRS[pair], extra={"pair": pair})
+        for pair in removed:
+            log.info("Screener: %s deaktiviert.", pair, extra={"pair": pair})
+        return quotes
+
+    def idle(self, seconds):
+        # Zwischen zwei Zyklen nur die Paare mit offenen Lots schneller abfragen (ein Sammel-Request)
+        deadline = time.monotonic() + seconds
+        while self.running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            STATE.idle(min(remaining, RISK_POLL_SECONDS))
+            pairs = RISK.armed_pairs()
+            if not self.running or not pairs or time.monotonic() >= deadline:
+                continue
+            for pair, price in fetch_prices(pairs).items():
+                self.check_risk(pair, price)
+
+    def rearm_due(self, pair):
+        now = time.monotonic()
+        for key, retry in list(self.risk_retries.items()):
+            if key[0] != pair or retry[0] > now:
+                continue
+            if RISK.rearm(*key):
+                retry[0] = math.inf  # scharf; Backoff bleibt für den nächsten Fehlschlag erhalten
+            else:
+                del self.risk_retries[key]  # Lot inzwischen anderweitig geschlossen
+
+    def check_risk(self, pair, price):
+        self.rearm_due(pair)
+        for lot_id, volume, kind, level in RISK.on_price(pair, price):
+            METRICS.inc("risk_triggers_total", kind=kind)
+            volume = min(volume, LEDGER.open_volume(pair))
+            if volume <= VOLUME_EPSILON:
+                RISK.on_fill(pair, "sell", float("inf"), price, lot_id)  # Lot existiert im Ledger nicht mehr
+                continue
+            try:
+                ASSET_PAIRS.normalize_order(pair, volume, price)
+            except ValueError as e:
+                # Dauerhaft (z.B. Rest unter ordermin): Lot bleibt ausgelöst und wird nicht wieder scharf
+                METRICS.inc("signals_rejected_total", side="sell", reason="dust")
+                log.warning("%s für %s (Lot %d) nicht ausführbar, Trigger deaktiviert: %s", kind, pair, lot_id, e,
+                            extra={"pair": pair, "tick": self.tick, "category": "risk"})
+                continue
+            log.info("%s ausgelöst für %s (Lot %d): Preis %.2f, Level %.2f", kind, pair, lot_id, price, level,
+                     extra={"pair": pair, "tick": self.tick, "category": "risk"})
+            key = (pair, lot_id)
+            if execute_trade(pair, "sell", volume, price, f"{kind}: Level={level:.2f}", lot=lot_id):
+                LAST_TRADE_TIME[pair] = time.time()
+                self.risk_retries.pop(key, None)
+            else:
+                # Vorübergehend (Netz, Breaker, API): erst nach wachsender Pause wieder scharf schalten
+                retry = self.risk_retries.setdefault(key, [0.0, Backoff(RISK_POLL_SECONDS, 300)])
+                delay = retry[1].next()
+                retry[0] = time.monotonic() + delay
+                log.warning("Verkauf %s (Lot %d) fehlgeschlagen, neuer Versuch in %.0fs", pair, lot_id, delay,
+                            extra={"pair": pair, "tick": self.tick, "category": "risk"})
+
+    def process_pair(self, pair, amount, trace, price=None):
+        ctx = {"pair": pair, "tick": self.tick}
+        if price is None:  # sonst Kurs aus dem Sammel-Ticker des Screeners
+            price = fetch_price(pair)
+            trace.received = time.monotonic()
+        if price is None:
+            log.warning("Kein Preis für %s", pair, extra=ctx)
+            return
+        self.check_risk(pair, price)
+
+        PRICE_HISTORY[pair].append(price)
+        if len(PRICE_HISTORY[pair]) > PRICE_HISTORY_LEN:
+            PRICE_HISTORY[pair].pop(0)
+        CHART_SERIES[pair].append(price)
+        CANDLES[pair].update(time.time(), price)
+        self.price_updated.emit(pair)
+
+        with METRICS.timer("indicator_seconds"):
+            prices = indicator_prices(pair)
+            rsi = calculate_rsi(prices)
+            sma, upper, lower = calculate_bollinger(prices)
+            trend = calculate_trend(prices)
+            fib0, fib382, fib618 = calculate_fibonacci_levels(prices)
+        trace.computed = time.monotonic()
+
+        flow = TRADE_FEED.flows.get(pair)
+        buy, sell = STRATEGIES.decide({
+            "price": price, "rsi": rsi, "sma": sma, "upper": upper, "lower": lower, "trend": trend,
+            "fib0": fib0, "fib382": fib382, "fib618": fib618,
+            "vwap": flow.vwap() if flow else None,
+            "imbalance": flow.imbalance() if flow else None,
+            "flow_eur": flow.volume_quote() if flow else None,
+        })
+        if not (buy or sell):
+            return
+        values = {name: "-" if value is None else f"{value:.2f}"
+                  for name, value in (("rsi", rsi), ("lower", lower), ("upper", upper), ("trend", trend), ("fib", fib618))}
+        if buy:
+            METRICS.inc("signals_total", side="buy")
+            if pair in PENDING_REMOVAL:
+                METRICS.inc("signals_rejected_total", side="buy", reason="removed")
+                log.debug("Kein Kauf für %s: Paar wird entfernt.", pair, extra=ctx)
+                return
+            last_trade = LAST_TRADE_TIME.get(pair, 0)
+            if time.time() - last_trade < TRADE_COOLDOWN_SECONDS:
+                METRICS.inc("signals_rejected_total", side="buy", reason="cooldown")
+                log.debug("Kauf gesperrt für %s: Cooldown läuft.", pair,
+                          extra={**ctx, "category": "cooldown"})
+                return
+            last_buy = LAST_BUY_PRICE.get(pair)
+            if last_buy is not None and price >= last_buy * (1 - REENTRY_THRESHOLD):
+                METRICS.inc("signals_rejected_total", side="buy", reason="reentry")
+                log.debug("Kein Reentry-Kauf für %s: Preis %.2f nahe letztem Kauf %.2f.",
+                          pair, price, last_buy, extra={**ctx, "category": "reentry"})
+                return
+            if not flow_allows_buy(pair):
+                METRICS.inc("signals_rejected_total", side="buy", reason="flow")
+                log.debug("Kauf gesperrt für %s: %s", pair, TRADE_FEED.describe(pair), extra=ctx)
+                return
+            allowed, why = exposure_check(pair, amount * price)
+            if not allowed:
+                METRICS.inc("signals_rejected_total", side="buy", reason="exposure")
+                log.info("Kauf gesperrt für %s: %s", pair, why, extra={**ctx, "category": "exposure"})
+                return
+            trace.decided = time.monotonic()
+            execute_trade(pair, "buy", amount, price,
+                f"Signal {STRATEGY}: RSI={values['rsi']}, BB-Low={values['lower']}, Trend={values['trend']}, "
+                f"Fibo={values['fib']}", trace)
+            LAST_TRADE_TIME[pair] = time.time()
+            LAST_BUY_PRICE[pair] = price
 
-                time.sleep(5)
-            except Exception as e:
-                print(f"[ERROR] in BotThread.run: {e}")
+        elif sell:
+            METRICS.inc("signals_total", side="sell")
+            lots = LEDGER.get(pair)
+            if lots is None or not lots.open_units:
+                METRICS.inc("signals_rejected_total", side="sell", reason="no_position")
+                return
+            sell_units = min(to_units(amount, VOLUME_DECIMALS), lots.open_units)
+            cost = lots.sell_cost(sell_units)
+            gain = sell_units * to_units(price, PRICE_DECIMALS) - cost  # exakt in 1e-18 EUR
+            gain_eur = gain / _POW10[COST_DECIMALS]
+            gain_pct = gain * 100 / cost if cost > 0 else 0.0
+            if gain_eur < MIN_PROFIT_EUR or gain_pct < MIN_PROFIT_PCT:
+                METRICS.inc("signals_rejected_total", side="sell", reason="min_profit")
+                log.debug("Kein Verkauf: Gewinn (%.2f EUR / %.2f%%) zu gering.", gain_eur, gain_pct,
+                          extra={**ctx, "category": "profit"})
+                return
+            trace.decided = time.monotonic()
+            execute_trade(pair, "sell", amount, price,
+                f"Signal {STRATEGY}: RSI={values['rsi']}, BB-High={values['upper']}, Trend={values['trend']}", trace)
+            LAST_TRADE_TIME[pair] = time.time()
 
     def stop(self):
         self.running = False
+        STATE.wake()
 
 
 
 # ----------------- Hilfsfunktionen -----------------
 def fetch_price(pair):
+    # Eigener Breaker je Paar: ein unbekanntes/abgeschaltetes Paar sperrt nicht den ganzen Ticker
+    breaker = BREAKERS.get(f"Ticker/{pair}")
+    if not breaker.allow():
+        return None
+    try:
+        response = kraken_request("GET", "/0/public/Ticker", params={"pair": pair})
+    except CircuitOpenError as e:
+        breaker.release()
+        log.debug("Preisabfrage für %s übersprungen: %s", pair, e, extra={"pair": pair})
+        return None
+    except Exception as e:
+        # Transportfehler zählt der Endpoint-Breaker, nicht das Paar
+        breaker.release()
+        METRICS.inc("price_fetch_failures_total", pair=pair)
+        log.error("Preisabfrage fehlgeschlagen für %s: %s", pair, e, extra={"pair": pair})
+        return None
+    transient = _transient_failure(response)
+    if transient:
+        # 5xx/429/Dienst gestört hat kraken_request schon dem Endpoint angerechnet; das Paar kann nichts dafür
+        breaker.release()
+        METRICS.inc("price_fetch_failures_total", pair=pair)
+        log.error("Preisabfrage fehlgeschlagen für %s: %s", pair, transient, extra={"pair": pair})
+        return None
+    data = None
     try:
-        url = f"https://api.kraken.com/0/public/Ticker?pair={pair}"
-        response = requests.get(url)
         data = response.json()
-        return float(data["result"][pair]["c"][0])
+        price = float(data["result"][pair]["c"][0])
     except Exception as e:
-        print(f"[ERROR] Preisabfrage fehlgeschlagen für {pair}: {e}")
+        error = data.get("error") if isinstance(data, dict) and data.get("error") else e
+        METRICS.inc("price_fetch_failures_total", pair=pair)
+        breaker.failure(error)
+        log.error("Preisabfrage fehlgeschlagen für %s: %s", pair, error, extra={"pair": pair})
         return None
+    breaker.success()
+    return price
 
 
-def calculate_rsi(prices, period=RSI_PERIOD):
+def fetch_prices(pairs):
+    """Letzte Kurse mehrerer Paare mit einem Ticker-Aufruf; fehlende Paare fehlen im Ergebnis."""
+    try:
+        response = kraken_request("GET", "/0/public/Ticker", params={"pair": ",".join(pairs)})
+        result = response.json().get("result", {})
+        prices = {}
+        for pair in pairs:
+            info = ASSET_PAIRS.resolve(pair)  # Kraken antwortet mit dem REST-Namen, auch bei Altnamen
+            ticker = result.get(pair) or (result.get(info.name) if info else None)
+            if ticker:
+                prices[pair] = float(ticker["c"][0])
+        return prices
+    except CircuitOpenError:
+        return {}
+    except Exception as e:
+        METRICS.inc("price_fetch_failures_total", pair="batch")  # feste Marke statt Paar-Kombination
+        log.error("Sammel-Preisabfrage fehlgeschlagen: %s", e)
+        return {}
+
+
+def calculate_rsi(prices, period=None):
+    period = RSI_PERIOD if period is None else period
     if len(prices) < period:
         return None
     deltas = np.diff(prices)
@@ -244,7 +3990,8 @@ def calculate_rsi(prices, period=RSI_PERIOD):
     return 100 - (100 / (1 + rs))
 
 
-def calculate_bollinger(prices, period=BOLLINGER_PERIOD):
+def calculate_bollinger(prices, period=None):
+    period = BOLLINGER_PERIOD if period is None else period
     if len(prices) < period:
         return None, None, None
     sma = np.mean(prices[-period:])
@@ -252,33 +3999,63 @@ def calculate_bollinger(prices, period=BOLLINGER_PERIOD):
     return sma, sma + BOLLINGER_STD * std, sma - BOLLINGER_STD * std
 
 
-def execute_trade(pair, side, volume, price, reason):
+def execute_trade(pair, side, volume, price, reason, trace=None, lot=None):
     global SIMUL_WALLET_VALUE
+    try:
+        volume_units, price_units = ASSET_PAIRS.normalize_order(pair, volume, price)
+    except ValueError as e:
+        METRICS.inc("signals_rejected_total", side=side, reason="order_size")
+        log.warning("Order verworfen: %s", e, extra={"pair": pair, "category": "trade"})
+        return False
+    volume_text = ASSET_PAIRS.format_volume(pair, volume_units)
+    volume = volume_units / _POW10[VOLUME_DECIMALS]  # Float-Sicht für Journal und Risiko-Engine
+    price = price_units / _POW10[PRICE_DECIMALS]
     if SIMUL:
-        if side == "buy" and SIMUL_WALLET_VALUE >= volume * price:
-            SIMUL_WALLET_VALUE -= volume * price
-            SIMUL_ASSETS[pair] += volume
-            msg = f"[SIMUL] BUY {volume} {pair} @ {price:.2f} — Grund: {reason}"
-        elif side == "sell" and SIMUL_ASSETS[pair] >= volume:
-            SIMUL_ASSETS[pair] -= volume
-            SIMUL_WALLET_VALUE += volume * price
-            msg = f"[SIMUL] SELL {volume} {pair} @ {price:.2f} — Grund: {reason}"
+        filled = False
+        held = SIMUL_ASSETS.get(pair, Amount(0, VOLUME_DECIMALS))
+        # Kauf rundet die Kosten auf, Verkauf den Erlös ab: Rundung erzeugt nie Geld
+        if side == "buy" and SIMUL_WALLET_VALUE.units >= cost_units(volume_units, price_units, "ceil"):
+            SIMUL_WALLET_VALUE -= Amount(cost_units(volume_units, price_units, "ceil"), QUOTE_DECIMALS)
+            SIMUL_ASSETS[pair] = held + Amount(volume_units, VOLUME_DECIMALS)
+            filled = True
+            msg = f"[SIMUL] BUY {volume_text} {pair} @ {price:.2f} — Grund: {reason}"
+        elif side == "sell" and held.units >= volume_units:
+            SIMUL_ASSETS[pair] = held - Amount(volume_units, VOLUME_DECIMALS)
+            SIMUL_WALLET_VALUE += Amount(cost_units(volume_units, price_units, "floor"), QUOTE_DECIMALS)
+            filled = True
+            msg = f"[SIMUL] SELL {volume_text} {pair} @ {price:.2f} — Grund: {reason}"
         else:
+            METRICS.inc("signals_rejected_total", side=side, reason="funds")
             msg = f"[SIMUL] Nicht genug {'EUR' if side == 'buy' else pair} für {side.upper()}"
-        print("[DEBUG] " + msg)
-        TRADES.append(msg)
+        if filled:
+            METRICS.inc("trades_total", side=side, mode="SIMUL")
+            if side == "buy":
+                lot = LEDGER.next_lot(pair)
+            LEDGER.record(pair, side, volume_units, price_units, lot)
+            RISK.on_fill(pair, side, volume, price, lot)
+            if trace is not None:
+                trace.acked = time.monotonic()
+            latency = trace.journal_fields() if trace is not None else ()
+            JOURNAL.record(TradeRecord(time.time(), pair, side, volume, price, "SIMUL", reason, "", *latency))
+        log.info(msg, extra={"pair": pair, "category": "trade"})
+        TRADES.append(msg, pair, side)
+        return filled
     else:
+        if ASSET_PAIRS.resolve(pair) is None:
+            # Ohne Katalog keine Prüfung auf ordermin/Tick-Größe: lieber gar nicht handeln
+            METRICS.inc("signals_rejected_total", side=side, reason="no_pair_info")
+            log.error("[REAL] Order für %s verweigert: AssetPairs nicht geladen.", pair, extra={"pair": pair})
+            return False
         try:
             nonce = str(int(time.time() * 1000))
             url_path = "/0/private/AddOrder"
-            url = f"{KRAKEN_API_URL}{url_path}"
             order_data = {
                 "nonce": nonce,
                 "ordertype": "limit",
                 "type": side,
-                "volume": str(volume),
+                "volume": volume_text,
                 "pair": pair,
-                "price": str(price),
+                "price": ASSET_PAIRS.format_price(pair, price_units),
                 "validate": False
             }
             post_data = urllib.parse.urlencode(order_data)
@@ -289,29 +4066,35 @@ def execute_trade(pair, side, volume, price, reason):
                 "API-Key": API_KEY,
                 "API-Sign": sig_b64.decode()
             }
-            response = requests.post(url, headers=headers, data=order_data)
+            response = kraken_request("POST", url_path, headers=headers, data=order_data)
             response.raise_for_status()
             data = response.json()
             if data.get("error"):
-                print(f"[REAL] Trade-Fehler: {data['error']}")
-            else:
-                msg = f"[REAL] {side.upper()} {volume} {pair} @ {price:.2f} — Grund: {reason}"
-                print("[DEBUG] " + msg)
-                TRADES.append(msg)
+                log.error("[REAL] Trade-Fehler: %s", data["error"], extra={"pair": pair})
+                METRICS.inc("kraken_errors_total", endpoint="AddOrder", kind="api")
+                return False
+            if trace is not None:
+                trace.acked = time.monotonic()
+            METRICS.inc("trades_total", side=side, mode="REAL")
+            if side == "buy":
+                lot = LEDGER.next_lot(pair)
+            LEDGER.record(pair, side, volume_units, price_units, lot)
+            RISK.on_fill(pair, side, volume, price, lot)
+            txid = ",".join(data.get("result", {}).get("txid", []))
+            latency = trace.journal_fields() if trace is not None else ()
+            JOURNAL.record(TradeRecord(time.time(), pair, side, volume, price, "REAL", reason, txid, *latency))
+            msg = f"[REAL] {side.upper()} {volume_text} {pair} @ {price:.2f} — Grund: {reason}"
+            log.info(msg, extra={"pair": pair, "category": "trade"})
+            TRADES.append(msg, pair, side)
+            return True
         except Exception as e:
-            print(f"[ERROR] execute_trade (REAL): {e}")
+            log.error("execute_trade (REAL): %s", e, extra={"pair": pair})
+            return False
 
 
 # ----------------- Pair-Auswahl von Kraken -----------------
 def get_available_pairs():
-    try:
-        url = f"{KRAKEN_API_URL}/0/public/AssetPairs"
-        response = requests.get(url)
-        data = response.json()
-        return list(data["result"].keys())
-    except Exception as e:
-        print(f"[ERROR] get_available_pairs(): {e}")
-        return []
+    return ASSET_PAIRS.ensure().names()
 
 
 # ----------------- MainWindow -----------------
@@ -320,11 +4103,14 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.api_key = ""
         self.api_secret = ""
+        self.simul_mode = SIMUL  # gewünschter Modus; der Bot übernimmt ihn per Kommando
         self.safe_asset_checkboxes = {}
         self.setWindowTitle("Kraken Trade Bot")
         self.setGeometry(100, 100, 1200, 600)
         self.bot_thread = None
         self.chart_window = None
+        self.workers = set()  # Referenzen halten, sonst räumt Python laufende QThreads ab
+        self.stopped_bots = []  # gestoppte Bot-Threads, die ihren letzten Tick noch beenden
 
         layout = QHBoxLayout()
         self.left_layout = QVBoxLayout()
@@ -370,6 +4156,14 @@ class MainWindow(QMainWindow):
         self.del_pair_button.clicked.connect(self.delete_pair)
         self.left_layout.addWidget(self.del_pair_button)
 
+        self.screener_button = QPushButton("Start Screener")
+        self.screener_button.clicked.connect(self.toggle_screener)
+        self.left_layout.addWidget(self.screener_button)
+
+        self.screener_report_button = QPushButton("Show Screener")
+        self.screener_report_button.clicked.connect(self.show_screener)
+        self.left_layout.addWidget(self.screener_report_button)
+
         self.chart_button = QPushButton("Show Charts")
         self.chart_button.clicked.connect(self.show_charts)
         self.left_layout.addWidget(self.chart_button)
@@ -383,15 +4177,49 @@ class MainWindow(QMainWindow):
         self.stop_button.clicked.connect(self.stop_bot)
         self.left_layout.addWidget(self.stop_button)
 
+        self.exposure_button = QPushButton("Show Exposure")
+        self.exposure_button.clicked.connect(self.show_exposure)
+        self.left_layout.addWidget(self.exposure_button)
+
+        self.strategies_button = QPushButton("Show Strategies")
+        self.strategies_button.clicked.connect(self.show_strategies)
+        self.left_layout.addWidget(self.strategies_button)
+
+        self.latency_button = QPushButton("Show Latency")
+        self.latency_button.clicked.connect(self.show_latency)
+        self.left_layout.addWidget(self.latency_button)
+
+        self.profile_button = QPushButton("Start Profiling")
+        self.profile_button.clicked.connect(self.toggle_profiling)
+        self.left_layout.addWidget(self.profile_button)
+
         self.license_button = QPushButton("License / Info")
         self.license_button.clicked.connect(self.show_license)
         self.left_layout.addWidget(self.license_button)
 
+        self.health_label = QLabel("API: OK")
+        self.left_layout.addWidget(self.health_label)
+        self.health_timer = QTimer(self)
+        self.health_timer.timeout.connect(self.update_health)
+        self.health_timer.start(1000)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        self.left_layout.addWidget(self.progress_bar)
+
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_tasks)
+        self.cancel_button.setVisible(False)
+        self.left_layout.addWidget(self.cancel_button)
+
         self.status_display = QTextEdit()
         self.status_display.setReadOnly(True)
         self.left_layout.addWidget(self.status_display)
 
-        self.trade_list = QListWidget(self)
+        self.trade_model = TradeListModel(TRADES, self)
+        self.trade_list = QListView(self)
+        self.trade_list.setUniformItemSizes(True)
+        self.trade_list.setModel(self.trade_model)
         self.right_layout.addWidget(QLabel("Recent Trades:"))
         self.right_layout.addWidget(self.trade_list)
 
@@ -402,51 +4230,158 @@ class MainWindow(QMainWindow):
         container.setLayout(layout)
         self.setCentralWidget(container)
 
+        if RESTORED_STATE:
+            self.status_display.append("[INFO] Zustand aus Checkpoint wiederhergestellt.")
+
+    def run_task(self, name, task, on_success, button=None):
+        """task(worker) läuft im Hintergrund; on_success(result) danach im GUI-Thread."""
+        worker = Worker(name, task)
+        self.workers.add(worker)
+        if button is not None:
+            button.setEnabled(False)
+        worker.progress.connect(self.show_progress)
+        worker.succeeded.connect(on_success)
+        worker.failed.connect(lambda error: QMessageBox.warning(self, name, error))
+        worker.cancelled.connect(lambda: self.status_display.append(f"[INFO] {name} abgebrochen."))
+        worker.finished.connect(lambda: self.task_finished(worker, button))
+        self.cancel_button.setVisible(True)
+        self.show_progress(0, 0, name)
+        worker.start()
+        return worker
+
+    def task_finished(self, worker, button):
+        self.workers.discard(worker)
+        if button is not None:
+            button.setEnabled(True)
+        if not self.workers:
+            self.cancel_button.setVisible(False)
+            self.progress_bar.setVisible(False)
+
+    def cancel_tasks(self):
+        for worker in self.workers:
+            worker.cancel()
+
+    def show_progress(self, done, total, text):
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, total)  # total 0 = unbestimmt (laufender Balken)
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat(f"{text} (%v/%m)" if total else text)
+        if total and done >= total and not self.workers:
+            QTimer.singleShot(2000, lambda: self.progress_bar.setVisible(bool(self.workers)))
+
+    def closeEvent(self, event):
+        self.cancel_tasks()
+        self.stop_bot()
+        # Bot-Thread abwarten, damit der letzte Checkpoint nicht mitten in einem Tick gezogen wird
+        for thread in self.stopped_bots:
+            thread.wait()
+        for worker in list(self.workers):
+            worker.wait(12000)  # höchstens ein Request-Timeout
+        super().closeEvent(event)
+
+    def toggle_screener(self):
+        enabled = self.screener_button.text() == "Start Screener"
+        STATE.submit(partial(set_screener, enabled))
+        self.screener_button.setText("Stop Screener" if enabled else "Start Screener")
+        self.status_display.append(f"[INFO] Screener {'gestartet' if enabled else 'gestoppt'} "
+                                   f"(Top {SCREENER_TOP_N} {SCREENER_QUOTE}-Paare werden aktiv geschaltet).")
+
+    def show_screener(self):
+        if not SCREENER.ranking:
+            QMessageBox.information(self, "Screener", "Noch keine Rangliste – Screener starten und Bot laufen lassen.")
+            return
+        QMessageBox.information(self, "Screener", f"<pre>{SCREENER.report()}</pre>")
+
+    def update_health(self):
+        unhealthy = BREAKERS.unhealthy()
+        if not unhealthy:
+            text, style = "API: OK", ""
+        else:
+            text = "API gestört: " + ", ".join(b.describe() for b in unhealthy)
+            style = "color: #c0392b;"
+        if text != self.health_label.text():
+            self.health_label.setText(text)
+            self.health_label.setToolTip("\n".join(f"{b.name}: {b.last_error}" for b in unhealthy))
+            self.health_label.setStyleSheet(style)
+
+    def show_exposure(self):
+        # Vom Bot-Thread mit dem Snapshot veröffentlicht, hier nichts Lebendes lesen
+        QMessageBox.information(self, "Korrelation und Exposure", f"<pre>{STATE.get().exposure_report}</pre>")
+
+    def show_strategies(self):
+        pairs = list(STATE.get().trade_pairs)
+
+        def backtest(worker):
+            return STRATEGIES.report(pairs, worker.step)
+        self.run_task("Backtest", backtest, self.strategy_report, self.strategies_button)
+
+    def strategy_report(self, text):
+        QMessageBox.information(self, "Strategien", f"<pre>{html.escape(text)}</pre>")
+
+    def show_latency(self):
+        QMessageBox.information(self, "Tick-to-Trade-Latenz", f"<pre>{LATENCY.report()}</pre>")
+
+    def toggle_profiling(self):
+        if PROFILER.running:
+            for path in PROFILER.stop():
+                self.status_display.append(f"[INFO] Profil geschrieben: {path}")
+        else:
+            PROFILER.start(trace_alloc=QMessageBox.question(
+                self, "Profiling", "Zusätzlich Speicher-Allokationen verfolgen (tracemalloc)?"
+            ) == QMessageBox.StandardButton.Yes)
+            self.status_display.append("[INFO] Profiling läuft.")
+        self.profile_button.setText("Stop Profiling" if PROFILER.running else "Start Profiling")
+
     def show_active_pairs(self):
-        try:
-            if not TRADE_PAIRS:
-                QMessageBox.information(self, "Aktive Paare", "Es sind derzeit keine aktiven Paare konfiguriert.")
-                return
+        if not STATE.get().trade_pairs:
+            QMessageBox.information(self, "Aktive Paare", "Es sind derzeit keine aktiven Paare konfiguriert.")
+            return
+        if ASSET_PAIRS.pairs:
+            # Geladener (ggf. älterer) Katalog reicht für Base-Namen; neu lädt der Bot bzw. ein Worker
+            self.active_pairs_report()
+            return
 
+        def load(worker):
+            worker.step(0, 0, "AssetPairs laden")
+            ASSET_PAIRS.ensure()
+        self.run_task("AssetPairs", load, lambda _: self.active_pairs_report(), self.active_pairs_button)
+
+    def active_pairs_report(self):
+        try:
+            snap = STATE.get()
             lines = []
-            for pair in TRADE_PAIRS:
-                base = pair[:-4] if pair.endswith("EUR") else pair[:3]
-                sockel = 0.0
-                for asset in SAFE_BALANCES:
-                    if asset.endswith(base):  # z.B. XXBT vs XBT
-                        sockel = SAFE_BALANCES.get(asset, 0.0)
-                        erlaubt = SAFE_ASSET_ALLOW_SELL.get(asset, False)
-                        lines.append(
-                            f"{pair} – Sockel: {sockel:.4f} {'(verkaufen erlaubt)' if erlaubt else '(verkauf gesperrt)'}")
-                        break
-                else:
-                    lines.append(f"{pair} – Sockel: 0.0000 (verkauf gesperrt)")
+            for pair in snap.trade_pairs:
+                base = ASSET_PAIRS.base(pair)  # Balance-Name, z.B. XETHZEUR -> XETH
+                if base is None:
+                    lines.append(f"{pair} – unbekanntes Paar (AssetPairs nicht geladen)")
+                    continue
+                sockel = snap.safe_balances.get(base, 0.0)
+                erlaubt = snap.safe_allow_sell.get(base, False)
+                lines.append(
+                    f"{pair} – Sockel: {sockel:.4f} {base} {'(verkaufen erlaubt)' if erlaubt else '(verkauf gesperrt)'}"
+                    f" – {snap.trade_flows.get(pair, 'keine Trades')}")
 
             QMessageBox.information(self, "Aktive Handelspaare", "\n".join(lines))
         except Exception as e:
-            print(f"[ERROR] show_active_pairs: {e}")
+            log.error("active_pairs_report: %s", e)
             QMessageBox.warning(self, "Fehler", f"Fehler beim Anzeigen der Paare: {e}")
 
 
     def update_interface(self):
         try:
-            # Handels-Historie aktualisieren (GUI + CSV)
-            update_trade_list(self.trade_list)
+            # Handels-Historie: nur neue Zeilen einfügen (CSV schreibt JOURNAL)
+            self.trade_model.refresh()
 
             # Portfolio-Tabelle aktualisieren (falls vorhanden)
             self.update_portfolio_table()
 
-            # Charts aktualisieren
-            if hasattr(self, 'chart_window'):
-                print("[DEBUG] update_interface: has_attr chart_window")
-                for pair in self.chart_window.canvases:
-                    print(f"[DEBUG] work with {pair}")
-                    self.chart_window.update_chart(pair)
-                    print(f"[DEBUG] done with {pair}")
-
+            # Charts zeichnet ChartWindow selbst (nur sichtbarer Tab, siehe render_frame);
+            # Tabs folgen den aktiven Paaren (der Screener schaltet Paare auch selbst um)
+            if self.chart_window:
+                self.chart_window.sync_tabs(STATE.get().trade_pairs)
 
         except Exception as e:
-            print(f"[ERROR] update_interface: {e}")
+            log.error("update_interface: %s", e)
 
     def save_keys(self):
         self.api_key = self.api_key_input.text().strip()
@@ -456,75 +4391,78 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Fehler", "Bitte gültige API-Daten eingeben.")
         else:
             self.status_display.append("[INFO] API-Daten gespeichert.")
-        print(f"[DEBUG] API_KEY: {repr(self.api_key)}")
-        print(f"[DEBUG] API_SECRET: {repr(self.api_secret)}")
+        log.debug("API-Daten übernommen (Key: %d Zeichen, Secret: %d Zeichen)",
+                  len(self.api_key), len(self.api_secret))
 
     def toggle_mode(self):
-        global SIMUL, SIMUL_WALLET_VALUE, SIMUL_ASSETS, SAFE_BALANCES, SAFE_ASSET_ALLOW_SELL
-
-        SIMUL = not SIMUL
-        print("[DEBUG] toggle-mode")
+        log.debug("toggle-mode")
 
-        if not SIMUL:
+        if self.simul_mode:
             if not self.api_key or not self.api_secret:
                 QMessageBox.warning(self, "Fehler", "Bitte API-Key und Secret zuerst speichern.")
-                SIMUL = True
-                return
-            ok = self.test_api_credentials()
-            if not ok:
-                QMessageBox.critical(self, "API-Fehler", "API-Verbindung fehlgeschlagen.")
-                SIMUL = True
                 return
 
-            try:
+            def connect(worker):
+                worker.step(0, 2, "API-Key prüfen")
+                ok, info = self.test_api_credentials()
+                if not ok:
+                    raise RuntimeError(f"API-Verbindung fehlgeschlagen:\n{info}")
+                worker.step(1, 2, "Kontostand laden")
                 balances = self.get_real_balance()
-                SAFE_BALANCES = {}
-                SAFE_ASSET_ALLOW_SELL = {}
-                info_lines = []
-                for asset, value in balances.items():
-                    val = float(value)
-                    if val > 0:
-                        SAFE_BALANCES[asset] = val
-
-                        # EUR-Assets automatisch erlauben (für Käufe)
-                        if asset.endswith("EUR"):
-                            continue
-
-
-                        SAFE_ASSET_ALLOW_SELL[asset] = False
-                        cb = QCheckBox(f"{asset}: {val:.4f} freigeben")
-                        cb.stateChanged.connect(lambda state, a=asset: self.set_asset_permission(a, state))
-                        self.safe_asset_checkboxes[asset] = cb
-                        self.left_layout.addWidget(cb)
-                        info_lines.append(f"{asset}: {val:.4f}")
-                QMessageBox.information(self, "Vorhandene Assets", "\n".join(info_lines) +
-                                        "\n\nNur freigegebene Assets dürfen verkauft werden. Siehe Optionen.")
-            except Exception as e:
-                print(f"[ERROR] Real-Balance Abfrage fehlgeschlagen: {e}")
-                QMessageBox.warning(self, "Balance", f"Fehler beim Abrufen des Kontos:\n{e}")
-                SIMUL = True
-                return
-
-            self.status_display.append("[REAL] Modus aktiviert. Achtung: Echter Handel möglich.")
+                worker.step(2, 2, "Kontostand geladen")
+                return balances
+            self.run_task("Real-Modus", connect, self.enable_real_mode, self.mode_button)
         else:
-            SIMUL_WALLET_VALUE = 1000.0
-            for pair in SIMUL_ASSETS:
-                SIMUL_ASSETS[pair] = 0.0
+            STATE.submit(partial(apply_mode, True))
+            self.simul_mode = True
             self.status_display.append("[SIMUL] Simulationsmodus aktiviert.")
+            self.mode_button.setText("Switch to Real Mode")
+
+    def enable_real_mode(self, balances):
+        try:
+            safe_balances = {}
+            allow_sell = {}
+            info_lines = []
+            for asset, value in balances.items():
+                val = float(value)
+                if val > 0:
+                    safe_balances[asset] = val
+
+                    # EUR-Assets automatisch erlauben (für Käufe)
+                    if asset.endswith("EUR"):
+                        continue
+
 
-        self.mode_button.setText(f"Switch to {'Real' if SIMUL else 'Simulation'} Mode")
+                    allow_sell[asset] = False
+                    cb = QCheckBox(f"{asset}: {val:.4f} freigeben")
+                    cb.stateChanged.connect(lambda state, a=asset: self.set_asset_permission(a, state))
+                    self.safe_asset_checkboxes[asset] = cb
+                    self.left_layout.addWidget(cb)
+                    info_lines.append(f"{asset}: {val:.4f}")
+            QMessageBox.information(self, "Vorhandene Assets", "\n".join(info_lines) +
+                                    "\n\nNur freigegebene Assets dürfen verkauft werden. Siehe Optionen.")
+        except Exception as e:
+            log.error("Real-Balance Abfrage fehlgeschlagen: %s", e)
+            QMessageBox.warning(self, "Balance", f"Fehler beim Abrufen des Kontos:\n{e}")
+            return
+
+        STATE.submit(partial(apply_mode, False, safe_balances, allow_sell))
+        self.simul_mode = False
+        self.status_display.append("[REAL] Modus aktiviert. Achtung: Echter Handel möglich.")
+        self.mode_button.setText("Switch to Simulation Mode")
 
 
     def set_asset_permission(self, asset, state):
-        SAFE_ASSET_ALLOW_SELL[asset] = state == Qt.CheckState.Checked
+        STATE.submit(partial(set_sell_permission, asset, Qt.CheckState(state) == Qt.CheckState.Checked))
 
     def can_sell(self, asset, volume):
-        if SIMUL:
+        snap = STATE.get()
+        if snap.simul:
             return True
-        sockel = SAFE_BALANCES.get(asset, 0.0)
-        erlaubt = SAFE_ASSET_ALLOW_SELL.get(asset, False)
+        sockel = snap.safe_balances.get(asset, 0.0)
+        erlaubt = snap.safe_allow_sell.get(asset, False)
         if erlaubt:
-            return (SAFE_BALANCES.get(asset, 0.0) - volume) >= sockel
+            return (snap.safe_balances.get(asset, 0.0) - volume) >= sockel
         return False
 
 
@@ -541,7 +4479,6 @@ class MainWindow(QMainWindow):
 
             # API-Endpunkt definieren
             url_path = "/0/private/Balance"
-            url = f"{KRAKEN_API_URL}{url_path}"
 
             # Daten für die Anfrage vorbereiten
             post_data = {
@@ -564,18 +4501,18 @@ class MainWindow(QMainWindow):
             }
 
             # API-Anfrage senden
-            response = requests.post(url, headers=headers, data=post_data)
+            response = kraken_request("POST", url_path, headers=headers, data=post_data)
             if response.status_code != 200:
-                print(f"[ERROR] API-Status: {response.status_code}")
+                log.error("API-Status: %s", response.status_code)
                 return False, f"HTTP {response.status_code}"
             json_data = response.json()
-            print("[DEBUG] API Testantwort:", json_data)
+            log.debug("API Testantwort: %s", json_data)
             if "result" in json_data:
                 return True, "API-Key ist gültig und verbunden."
             else:
                 return False, str(json_data.get("error"))
         except Exception as e:
-            print(f"[ERROR] API-Test fehlgeschlagen: {e}")
+            log.error("API-Test fehlgeschlagen: %s", e)
             return False, str(e)
 
 
@@ -586,11 +4523,13 @@ class MainWindow(QMainWindow):
 
     def start_bot(self):
         if not self.bot_thread:
-            perform_initial_trades()  # <<< hier der neue Initialkauf
             if not self.chart_window:
                 self.chart_window = ChartWindow()
-            self.bot_thread = BotThread()
+            # Initialkäufe (eine Sammel-Kursabfrage) macht der Bot-Thread selbst, die GUI wartet nicht
+            self.bot_thread = BotThread(initial_trades=not RESTORED_STATE)
             self.bot_thread.update_gui.connect(self.update_interface)
+            self.bot_thread.price_updated.connect(self.chart_window.mark_dirty)
+            self.bot_thread.progress.connect(self.show_progress)
             self.bot_thread.start()
             self.status_display.append("[INFO] Bot gestartet.")
 
@@ -598,33 +4537,41 @@ class MainWindow(QMainWindow):
     def stop_bot(self):
         if self.bot_thread:
             self.bot_thread.stop()
+            self.stopped_bots = [t for t in self.stopped_bots if t.isRunning()] + [self.bot_thread]
             self.bot_thread = None
             self.status_display.append("[INFO] Bot gestoppt.")
+            log.info("Latenz je Stufe:\n%s", LATENCY.report())
 
     def add_pair(self):
-        pairs = get_available_pairs()
+        def load(worker):
+            worker.step(0, 0, "Paarliste laden")
+            return get_available_pairs()
+        self.run_task("Paarliste", load, self.choose_pair, self.add_pair_button)
+
+    def choose_pair(self, pairs):
+        if not pairs:
+            QMessageBox.warning(self, "Add Pair", "Paarliste (AssetPairs) nicht verfügbar.")
+            return
         pair, ok = QInputDialog.getItem(self, "Add Pair", "Kraken Trading Pair wählen:", pairs, 0, False)
         if ok and pair:
-            if pair in TRADE_PAIRS:
+            if pair in STATE.get().trade_pairs:
                 QMessageBox.information(self, "Hinweis", f"{pair} ist bereits aktiv.")
                 return
-            TRADE_PAIRS[pair] = 0.01
-            PRICE_HISTORY[pair] = []
-            SIMUL_ASSETS[pair] = 0.0
+            info = ASSET_PAIRS.resolve(pair)
+            STATE.submit(partial(add_trade_pair, pair, max(0.01, info.ordermin) if info else 0.01))
             self.status_display.append(f"[INFO] Paar hinzugefügt: {pair}")
             if self.chart_window:
                 self.chart_window.add_chart_tab(pair)
 
     def delete_pair(self):
-        if not TRADE_PAIRS:
+        pairs = list(STATE.get().trade_pairs)
+        if not pairs:
             QMessageBox.information(self, "Hinweis", "Keine aktiven Paare vorhanden.")
             return
-        pair, ok = QInputDialog.getItem(self, "Delete Pair", "Aktives Paar entfernen:", list(TRADE_PAIRS.keys()), 0,
+        pair, ok = QInputDialog.getItem(self, "Delete Pair", "Aktives Paar entfernen:", pairs, 0,
                                         False)
         if ok and pair:
-            TRADE_PAIRS.pop(pair, None)
-            PRICE_HISTORY.pop(pair, None)
-            SIMUL_ASSETS.pop(pair, None)
+            STATE.submit(partial(remove_trade_pair, pair))
             self.status_display.append(f"[INFO] Paar gelöscht: {pair}")
             if self.chart_window:
                 self.chart_window.remove_chart_tab(pair)
@@ -645,49 +4592,75 @@ class MainWindow(QMainWindow):
         info.exec()
 
     def show_charts(self):
-        global chart_window_instance
         if not self.chart_window:
             self.chart_window = ChartWindow()
-            chart_window_instance = self.chart_window
         self.chart_window.show()
 
     def show_portfolio(self):
-        dialog = QMessageBox(self)
-        dialog.setWindowTitle("Portfolio")
-
         try:
-            if SIMUL:
-                message = "Wallet: {:.2f} EUR\n".format(SIMUL_WALLET_VALUE)
-                total = SIMUL_WALLET_VALUE
-                for pair, amount in SIMUL_ASSETS.items():
-                    price = fetch_price(pair)
-                    value = amount * price if price else 0
-                    message += "{}: {:.4f} = {:.2f} EUR\n".format(pair, amount, value)
+            snap = STATE.get()
+            if snap.simul:
+                message = "Wallet: {:.2f} EUR\n".format(snap.wallet)
+                total = float(snap.wallet)
+                unrealized = 0.0
+                missing = False
+                for pair, amount in snap.simul_assets.items():
+                    # Kurse holt nur der Bot-Thread (je Tick); ohne Kurs bleibt der Posten unbewertet
+                    price = snap.last_prices.get(pair)
+                    if price is None:
+                        missing = missing or float(amount) > 0
+                        message += "{}: {:.4f} = n/a (noch kein Kurs)\n".format(pair, amount)
+                        continue
+                    value = float(amount) * price
+                    message += "{}: {:.4f} = {:.2f} EUR".format(pair, amount, value)
+                    open_volume, avg_price, _ = snap.positions.get(pair, (0.0, 0.0, 0.0))
+                    if open_volume > VOLUME_EPSILON:
+                        pnl = open_volume * (price - avg_price)
+                        unrealized += pnl
+                        message += " (Einstand Ø {:.2f}, offen {:+.2f} EUR)".format(avg_price, pnl)
+                    message += "\n"
                     total += value
-                gain = total - 1000.0
-                pct = (gain / 1000.0) * 100
+                start = float(SIMUL_START_EUR)
+                gain = total - start
+                pct = (gain / start) * 100
                 message += "\nGesamtwert: {:.2f} EUR\nGewinn/Verlust: {:+.2f} EUR ({:+.2f}%)".format(total, gain, pct)
+                message += "\nRealisiert: {:+.2f} EUR / Unrealisiert: {:+.2f} EUR".format(snap.realized_pnl, unrealized)
+                if missing:
+                    message += "\n(ohne Posten ohne Kurs – Bot starten bzw. nächsten Tick abwarten)"
+                self.show_portfolio_text(message)
             else:
-                balances = self.get_real_balance()
-                message = "📊 Real-Konto:\n\n"
-                for asset, value in balances.items():
-                    message += f"{asset}: {float(value):.4f}\n"
-
-            dialog.setText(message)
-            dialog.exec()
+                def load(worker):
+                    worker.step(0, 0, "Kontostand laden")
+                    return self.get_real_balance()
+                self.run_task("Kontostand", load, partial(self.show_real_portfolio, snap.realized_pnl),
+                              self.portfolio_button)
         except Exception as e:
-            print("[ERROR] show_portfolio:", e)
+            log.error("show_portfolio: %s", e)
             QMessageBox.warning(self, "Fehler", f"Fehler beim Berechnen des Portfolios:\n{e}")
 
+    def show_real_portfolio(self, realized_pnl, balances):
+        message = "📊 Real-Konto:\n\n"
+        for asset, value in balances.items():
+            message += f"{asset}: {float(value):.4f}\n"
+        message += "\nRealisiert (Bot): {:+.2f} EUR".format(realized_pnl)
+        self.show_portfolio_text(message)
+
+    def show_portfolio_text(self, message):
+        dialog = QMessageBox(self)
+        dialog.setWindowTitle("Portfolio")
+        dialog.setText(message)
+        dialog.exec()
+
 
 
     def check_api_keys(self):
-        try:
-            ok, info = self.test_api_credentials()
-        except Exception as e:
-            print(f"{e}")
-            return
+        def test(worker):
+            worker.step(0, 0, "API-Key prüfen")
+            return self.test_api_credentials()
+        self.run_task("API-Test", test, self.show_api_test, self.api_test_button)
 
+    def show_api_test(self, result):
+        ok, info = result
         if ok:
             QMessageBox.information(self, "API-Test", f"✅ Erfolgreich: {info}")
         else:
@@ -706,29 +4679,28 @@ class MainWindow(QMainWindow):
                 'API-Key': self.api_key,
                 'API-Sign': sig_b64.decode()
             }
-            url = f"{KRAKEN_API_URL}{url_path}"
-            response = requests.post(url, headers=headers, data=post_data)
+            response = kraken_request("POST", url_path, headers=headers, data=post_data)
             if response.status_code == 200:
                 return response.json().get("result", {})
             return {}
         except Exception as e:
-            print(f"[ERROR] get_real_balance: {e}")
+            log.error("get_real_balance: %s", e)
             return {}
 
 
     def place_real_order(self, pair, side, volume, price):
         try:
+            volume_units, price_units = ASSET_PAIRS.normalize_order(pair, volume, price)
             decoded_secret = base64.b64decode(self.api_secret)
             nonce = str(int(1000 * time.time()))
             url_path = "/0/private/AddOrder"
-            url = f"{KRAKEN_API_URL}{url_path}"
             post_data = {
                 "nonce": nonce,
                 "ordertype": "limit",
                 "type": side,
-                "volume": str(volume),
+                "volume": ASSET_PAIRS.format_volume(pair, volume_units),
                 "pair": pair,
-                "price": str(price)
+                "price": ASSET_PAIRS.format_price(pair, price_units)
             }
             postdata = urllib.parse.urlencode(post_data)
             encoded = (nonce + postdata).encode()
@@ -739,11 +4711,11 @@ class MainWindow(QMainWindow):
                 "API-Key": self.api_key,
                 "API-Sign": sig_b64.decode()
             }
-            response = requests.post(url, headers=headers, data=post_data)
-            print("[DEBUG] Real Order Antwort:", response.json())
+            response = kraken_request("POST", url_path, headers=headers, data=post_data)
+            log.debug("Real Order Antwort: %s", response.json())
             return response.json()
         except Exception as e:
-            print(f"[ERROR] Real Order fehlgeschlagen: {e}")
+            log.error("Real Order fehlgeschlagen: %s", e)
             return None
 
 
@@ -752,28 +4724,73 @@ class ChartWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Live Charts")
+        self.zoom_box = QComboBox()
+        self.zoom_box.addItems(CHART_ZOOM_LEVELS.keys())
+        self.zoom_box.currentTextChanged.connect(self.set_zoom)
+        self.timeframe_box = QComboBox()
+        self.timeframe_box.addItems(["Ticks", *CANDLE_TIMEFRAMES])
+        self.timeframe_box.currentTextChanged.connect(self.set_timeframe)
         self.tabs = QTabWidget()
+        controls = QHBoxLayout()
+        controls.addWidget(self.zoom_box)
+        controls.addWidget(self.timeframe_box)
         layout = QVBoxLayout()
+        layout.addLayout(controls)
         layout.addWidget(self.tabs)
         self.setLayout(layout)
-        self.timers = {}
         self.canvases = {}
+        self.renderers = {}
+        self.dirty = set()
+        self.next_frame = 0.0
 
-        for pair in TRADE_PAIRS:
+        for pair in STATE.get().trade_pairs:
             self.add_chart_tab(pair)
 
+        # Ein Timer für alle Paare; gezeichnet wird nur der sichtbare Tab
+        self.tabs.currentChanged.connect(lambda index: self.render_frame(force=True))
+        self.frame_timer = QTimer(self)
+        self.frame_timer.timeout.connect(self.render_frame)
+        self.frame_timer.start(CHART_FRAME_MS)
+
+    def sync_tabs(self, pairs):
+        for pair in list(self.canvases):
+            if pair not in pairs:
+                self.remove_chart_tab(pair)
+        for pair in pairs:
+            self.add_chart_tab(pair)
+        self.sync_timeframes()
+
+    def sync_timeframes(self):
+        # CANDLE_TIMEFRAMES kann sich per Konfigurationsdatei ändern
+        items = ["Ticks", *CANDLE_TIMEFRAMES]
+        if [self.timeframe_box.itemText(i) for i in range(self.timeframe_box.count())] == items:
+            return
+        current = self.timeframe_box.currentText()
+        self.timeframe_box.blockSignals(True)
+        self.timeframe_box.clear()
+        self.timeframe_box.addItems(items)
+        self.timeframe_box.setCurrentText(current if current in items else "Ticks")
+        self.timeframe_box.blockSignals(False)
+        self.set_timeframe(self.timeframe_box.currentText())
+
     def remove_chart_tab(self, pair):
         for i in range(self.tabs.count()):
             if self.tabs.tabText(i) == pair:
                 self.tabs.removeTab(i)
                 break
-        self.timers.pop(pair, None)
         self.canvases.pop(pair, None)
+        self.renderers.pop(pair, None)
+        self.dirty.discard(pair)
 
     def add_chart_tab(self, pair):
+        if pair in self.canvases:
+            return
         canvas = FigureCanvas(Figure(figsize=(8, 4)))
         ax = canvas.figure.add_subplot(111)
         self.canvases[pair] = (canvas, ax)
+        self.renderers[pair] = renderer = ChartRenderer(pair, canvas, ax, self.zoom_box.currentText())
+        renderer.timeframe = self.timeframe()
+        self.dirty.add(pair)
 
         widget = QWidget()
         tab_layout = QVBoxLayout()
@@ -782,67 +4799,122 @@ class ChartWindow(QWidget):
 
         self.tabs.addTab(widget, pair)
 
-        timer = QTimer()
-        timer.timeout.connect(lambda p=pair: self.plot(p))
-        timer.start(5000)
-        self.timers[pair] = timer
-
+    def set_zoom(self, zoom):
+        for renderer in self.renderers.values():
+            renderer.zoom = zoom
+        self.dirty.update(self.renderers)
+        self.render_frame(force=True)
+
+    def timeframe(self):
+        text = self.timeframe_box.currentText()
+        return text if text in CANDLE_TIMEFRAMES else None
+
+    def set_timeframe(self, _text):
+        for renderer in self.renderers.values():
+            renderer.timeframe = self.timeframe()
+        self.dirty.update(self.renderers)
+        self.render_frame(force=True)
+
+    def mark_dirty(self, pair):
+        if pair in self.canvases:
+            self.dirty.add(pair)
+
+    def current_pair(self):
+        index = self.tabs.currentIndex()
+        return self.tabs.tabText(index) if index >= 0 else None
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.render_frame(force=True)
+
+    def render_frame(self, force=False):
+        # Versteckte Tabs bleiben dirty und werden beim Umschalten nachgezeichnet
+        if not self.isVisible():
+            return
+        pair = self.current_pair()
+        if pair not in self.dirty:
+            return
+        now = time.monotonic()
+        if not force and now < self.next_frame:
+            return
+        self.dirty.discard(pair)
+        self.update_chart(pair)
+        cost = time.monotonic() - now
+        METRICS.observe("chart_render_seconds", cost)
+        # Teure Frames strecken den Abstand zum nächsten (Frame-Budget)
+        self.next_frame = now + max(CHART_FRAME_MS / 1000, cost / CHART_FRAME_BUDGET)
 
     def plot(self, pair):
-        canvas, ax = self.canvases[pair]
-        ax.clear()
-        prices = PRICE_HISTORY.get(pair, [])
-        if not prices:
+        renderer = self.renderers.get(pair)
+        if not renderer:
             return
-        ax.plot(prices[-100:], label="Price", color="blue")
-
-        # Trendpfeil (einfacher linearer Trend)
-        if len(prices) >= 10:
-            x = np.arange(len(prices[-10:]))
-            y = np.array(prices[-10:])
-            slope, _ = np.polyfit(x, y, 1)
-            trend = "↑" if slope > 0 else "↓"
-            ax.set_title(f"{pair} – letzte 100 Preise   Trend: {trend}")
-        else:
-            ax.set_title(f"{pair} – letzte 100 Preise")
-
-        # Zusätzliche Linien
-        current_price = prices[-1]
-        next_buy = current_price * (1 - REENTRY_THRESHOLD)
-        next_sell = current_price * (1 + TAKE_PROFIT_DYNAMIC)
-        stop_loss = current_price * (1 - STOP_LOSS_DYNAMIC)
-        ax.axhline(y=next_buy, color="green", linestyle="--", label="Next Buy")
-        ax.axhline(y=next_sell, color="red", linestyle="--", label="Next Sell")
-        ax.axhline(y=stop_loss, color="orange", linestyle=":", label="Stop-Loss")
-
-        # Fibonacci-Linien
-        high = max(prices)
-        low = min(prices)
-        fib_0 = high
-        fib_382 = high - (high - low) * 0.382
-        fib_618 = high - (high - low) * 0.618
-        ax.axhline(y=fib_0, color="purple", linestyle="--", label="Fibo 0.0")
-        ax.axhline(y=fib_382, color="purple", linestyle="--", label="Fibo 38.2")
-        ax.axhline(y=fib_618, color="purple", linestyle="--", label="Fibo 61.8")
-
-        ax.legend()
-        canvas.draw()
+        if renderer.timeframe is None:
+            renderer.update(CHART_SERIES.get(pair))
+        elif pair in CANDLES and renderer.timeframe in CANDLES[pair].series:
+            renderer.update(CANDLES[pair][renderer.timeframe])
 
     def update_chart(self, pair):
         try:
             if pair not in self.canvases:
                 return
-            canvas, ax = self.canvases[pair]
             self.plot(pair)
         except Exception as e:
-            print(f"[ERROR] Chart update failed for {pair}: {e}")
+            log.error("Chart update failed for %s: %s", pair, e, extra={"pair": pair})
 
 
 
 
 #######################
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Kraken Trade Bot")
+    parser.add_argument("--metrics", action="store_true", help="Metriken sammeln und per HTTP anbieten")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT)
+    parser.add_argument("--profile", action="store_true", help="Stack-Sampling ab Start (Ausgabe in profiles/)")
+    parser.add_argument("--profile-alloc", action="store_true", help="zusätzlich tracemalloc-Berichte")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="DATEI", help="öffentliche Kraken-Antworten in eine Kassette aufzeichnen")
+    cassette.add_argument("--replay", metavar="DATEI", help="Kraken-Antworten offline aus einer Kassette abspielen")
+    parser.add_argument("--replay-timing", action="store_true", help="beim Abspielen die Originallatenz nachbilden")
+    parser.add_argument("--config", metavar="DATEI", default=CONFIG_PATH,
+                        help="Strategie-Konfiguration (JSON), Änderungen werden im Betrieb übernommen")
+    # Unbekannte Argumente gehen an Qt weiter
+    return parser.parse_known_args(argv[1:])
+
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    args, qt_args = parse_args(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
+    log_listener = setup_logging()
+    if args.metrics or METRICS_ENABLED:
+        METRICS.enabled = True
+        register_gauges()
+        METRICS.serve(args.metrics_port)
+    if args.record or args.replay:
+        CASSETTE = Cassette(args.record or args.replay, "record" if args.record else "replay", args.replay_timing)
+        ASSET_PAIRS.path = None  # AssetPairs sollen in der Kassette landen bzw. aus ihr kommen
+    ASSET_PAIRS.load_cache()
+    restore_checkpoint()
+    CONFIG_WATCHER.path = args.config
+    CONFIG_WATCHER.start()
+    STATE.publish()
+    JOURNAL.start()
+    CHECKPOINTER.start()
     window = MainWindow()
+    if args.profile or args.profile_alloc:
+        PROFILER.start(trace_alloc=args.profile_alloc)
+        window.profile_button.setText("Stop Profiling")
     window.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    CONFIG_WATCHER.stop()
+    PROFILER.stop()
+    # läuft wider Erwarten noch ein Bot-Thread, zieht er den Zustand selbst zwischen zwei Ticks
+    STATE.submit(lambda: CHECKPOINTER.submit(capture_state()))
+    CHECKPOINTER.stop()
+    JOURNAL.stop()
+    if METRICS.enabled:
+        METRICS.shutdown()
+        METRICS.dump_csv()
+    if CASSETTE is not None:
+        CASSETTE.close()
+    log_listener.stop()
+    sys.exit(exit_code)
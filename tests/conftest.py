@@ -0,0 +1,17 @@
+import importlib.util
+import os
+import pathlib
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+BOT_PATH = pathlib.Path(__file__).resolve().parent.parent / "botv1.5.py"
+
+
+@pytest.fixture(scope="session")
+def bot():
+    spec = importlib.util.spec_from_file_location("bot", BOT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
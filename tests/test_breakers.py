@@ -0,0 +1,35 @@
+import json
+
+import pytest
+import requests
+
+
+def ticker_response(status, payload):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(payload).encode()
+    return response
+
+
+@pytest.fixture
+def breakers(bot, monkeypatch):
+    monkeypatch.setattr(bot, "BREAKERS", bot.BreakerRegistry())
+    monkeypatch.setattr(bot, "BREAKER_FAILURE_THRESHOLD", 1)
+    return bot
+
+
+def test_server_error_only_counts_against_the_endpoint(breakers, monkeypatch):
+    bot = breakers
+    monkeypatch.setattr(bot.requests, "request", lambda *a, **kw: ticker_response(503, {"error": []}))
+    assert bot.fetch_price("XETHZEUR") is None
+    assert bot.BREAKERS.get("Ticker").state == "open"
+    assert bot.BREAKERS.get("Ticker/XETHZEUR").state == "closed"
+
+
+def test_unknown_pair_counts_against_the_pair(breakers, monkeypatch):
+    bot = breakers
+    monkeypatch.setattr(bot.requests, "request",
+                        lambda *a, **kw: ticker_response(200, {"error": ["EQuery:Unknown asset pair"]}))
+    assert bot.fetch_price("NOPEEUR") is None
+    assert bot.BREAKERS.get("Ticker").state == "closed"
+    assert bot.BREAKERS.get("Ticker/NOPEEUR").state == "open"
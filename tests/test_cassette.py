@@ -0,0 +1,74 @@
+import json
+
+import pytest
+import requests
+
+ASSET_PAIRS_BODY = {"error": [], "result": {"XETHZEUR": {
+    "altname": "ETHEUR", "wsname": "ETH/EUR", "base": "XETH", "quote": "ZEUR",
+    "lot_decimals": 4, "pair_decimals": 2, "ordermin": "0.002", "costmin": "0.5", "status": "online"}}}
+TICKER_BODY = {"error": [], "result": {"XETHZEUR": {"c": ["2345.678", "0.1"]}}}
+
+
+def exchange(method, url, **kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    body = ASSET_PAIRS_BODY if url.endswith("/AssetPairs") else TICKER_BODY
+    response._content = json.dumps(body).encode()
+    return response
+
+
+def offline(method, url, **kwargs):
+    raise AssertionError(f"Netzzugriff beim Abspielen: {url}")
+
+
+@pytest.fixture
+def cassette_path(bot, monkeypatch, tmp_path):
+    monkeypatch.setattr(bot, "BREAKERS", bot.BreakerRegistry())
+    monkeypatch.setattr(bot, "ASSET_PAIRS", bot.AssetPairCatalog(path=None))
+    monkeypatch.setattr(bot.requests, "request", exchange)
+    path = str(tmp_path / "kraken.cassette.gz")
+    cassette = bot.Cassette(path, "record")
+    monkeypatch.setattr(bot, "CASSETTE", cassette)
+    bot.ASSET_PAIRS.refresh()
+    assert bot.fetch_price("XETHZEUR") == pytest.approx(2345.678)
+    cassette.close()
+    monkeypatch.setattr(bot.requests, "request", offline)
+    monkeypatch.setattr(bot, "ASSET_PAIRS", bot.AssetPairCatalog(path=None))
+    return path
+
+
+def test_replay_drives_catalog_price_and_order(bot, monkeypatch, cassette_path):
+    monkeypatch.setattr(bot, "CASSETTE", bot.Cassette(cassette_path, "replay"))
+    monkeypatch.setattr(bot, "LEDGER", bot.PositionLedger("fifo"))
+    monkeypatch.setattr(bot, "RISK", bot.RiskEngine())
+    monkeypatch.setattr(bot, "SIMUL", True)
+    monkeypatch.setattr(bot, "SIMUL_WALLET_VALUE", bot.Amount.parse("1000", bot.QUOTE_DECIMALS))
+    monkeypatch.setattr(bot, "SIMUL_ASSETS", {})
+    monkeypatch.setattr(bot.JOURNAL, "record", lambda rec: None)
+
+    bot.ASSET_PAIRS.refresh()
+    price = bot.fetch_price("XETHZEUR")
+    assert price == pytest.approx(2345.678)
+    assert bot.execute_trade("XETHZEUR", "buy", 0.0123456, price, "replay")
+    assert str(bot.SIMUL_ASSETS["XETHZEUR"]) == "0.01230000"  # lot_decimals 4 aus der Kassette
+    assert bot.LEDGER.get("XETHZEUR").avg_price() == pytest.approx(2345.68)  # pair_decimals 2
+    assert not bot.execute_trade("XETHZEUR", "buy", 0.001, price, "replay")  # unter ordermin
+
+
+def test_truncated_cassette_keeps_complete_entries(bot, cassette_path, tmp_path):
+    with open(cassette_path, "rb") as f:
+        data = f.read()
+    truncated = tmp_path / "truncated.cassette.gz"
+    truncated.write_bytes(data[:-12])  # gzip-Trailer und Ende des letzten Blocks fehlen
+    cassette = bot.Cassette(str(truncated), "replay")
+    assert sum(len(entries) for entries in cassette.index.values()) <= 2
+
+
+def test_unfinished_recording_leaves_no_cassette(bot, monkeypatch, tmp_path):
+    monkeypatch.setattr(bot.requests, "request", exchange)
+    path = tmp_path / "crash.cassette.gz"
+    cassette = bot.Cassette(str(path), "record")
+    cassette.record("GET", "/0/public/Ticker", {"pair": "XETHZEUR"}, exchange("GET", "/Ticker"), 0.01)
+    assert not path.exists()
+    cassette.close()
+    assert path.exists()
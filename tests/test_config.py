@@ -0,0 +1,25 @@
+def test_removed_pair_with_position_is_retired_once_flat(bot, monkeypatch):
+    monkeypatch.setattr(bot, "LEDGER", bot.PositionLedger("fifo"))
+    pair, volume, price = "TESTEUR", bot.to_units(1, bot.VOLUME_DECIMALS), bot.to_units(10, bot.PRICE_DECIMALS)
+    bot.add_trade_pair(pair, 1.0)
+    bot.LEDGER.record(pair, "buy", volume, price)
+
+    bot.apply_trade_pairs({**bot.TRADE_PAIRS}, {p: v for p, v in bot.TRADE_PAIRS.items() if p != pair})
+    bot.retire_pending_pairs()
+    assert pair in bot.TRADE_PAIRS and pair in bot.PENDING_REMOVAL
+
+    bot.LEDGER.record(pair, "sell", volume, price)
+    bot.retire_pending_pairs()
+    assert pair not in bot.TRADE_PAIRS and pair not in bot.PENDING_REMOVAL
+
+
+def test_readding_a_pending_pair_cancels_the_removal(bot, monkeypatch):
+    monkeypatch.setattr(bot, "LEDGER", bot.PositionLedger("fifo"))
+    pair = "TESTEUR"
+    bot.add_trade_pair(pair, 1.0)
+    bot.LEDGER.record(pair, "buy", bot.to_units(1, bot.VOLUME_DECIMALS), bot.to_units(10, bot.PRICE_DECIMALS))
+    others = {p: v for p, v in bot.TRADE_PAIRS.items() if p != pair}
+    bot.apply_trade_pairs({**bot.TRADE_PAIRS}, others)
+    bot.apply_trade_pairs(others, {**others, pair: 2.0})
+    assert pair not in bot.PENDING_REMOVAL and bot.TRADE_PAIRS[pair] == 2.0
+    bot.remove_trade_pair(pair)
@@ -0,0 +1,25 @@
+import pytest
+
+
+@pytest.fixture
+def portfolio(bot, monkeypatch):
+    monkeypatch.setattr(bot, "LEDGER", bot.PositionLedger("fifo"))
+    monkeypatch.setattr(bot, "CORRELATION", bot.RollingCorrelation())
+    monkeypatch.setattr(bot, "PRICE_HISTORY", {"XETHZEUR": [2000.0]})
+    monkeypatch.setattr(bot, "MAX_PORTFOLIO_EXPOSURE_EUR", 1000.0)
+    bot.LEDGER.record("XETHZEUR", "buy", bot.to_units(2, bot.VOLUME_DECIMALS), bot.to_units(1900, bot.PRICE_DECIMALS))
+    return bot
+
+
+def test_total_limit_applies_before_correlation_warm_up(portfolio):
+    bot = portfolio
+    assert bot.CORRELATION.pairs == ()
+    assert bot.total_exposure() == pytest.approx(4000.0)
+    allowed, reason = bot.exposure_check("SOLEUR", 50.0)
+    assert not allowed and "Gesamtexposure" in reason
+
+
+def test_position_without_price_counts_at_cost(portfolio):
+    bot = portfolio
+    bot.PRICE_HISTORY.clear()
+    assert bot.total_exposure() == pytest.approx(3800.0)
@@ -0,0 +1,19 @@
+import pytest
+
+
+def test_batched_quote_has_no_per_pair_fetch_stage(bot):
+    trace = bot.TickTrace("SOLEUR", None)
+    trace.received, trace.computed, trace.decided, trace.acked = 10.0, 10.004, 10.005, 10.105
+    stages = trace.stages()
+    assert "fetch" not in stages
+    assert stages["indicators"] == pytest.approx(0.004)
+    assert stages["tick_to_trade"] == pytest.approx(0.105)
+    assert trace.journal_fields()[0] is None
+
+
+def test_batch_fetch_is_its_own_stage(bot):
+    tracker = bot.LatencyTracker(window=8)
+    tracker.observe("batch_fetch", 0.25)
+    tracker.record(bot.TickTrace("SOLEUR", None))
+    assert tracker.stats["batch_fetch"].count == 1
+    assert tracker.stats["fetch"].count == 0
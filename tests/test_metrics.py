@@ -0,0 +1,16 @@
+def test_label_values_are_escaped(bot):
+    metrics = bot.Metrics(enabled=True)
+    metrics.inc("kraken_errors_total", kind='EGeneral:"x"\\y\nz')
+    assert 'kraken_errors_total{kind="EGeneral:\\"x\\"\\\\y\\nz"} 1' in metrics.render_prometheus()
+
+
+def test_batch_price_failures_use_a_fixed_label(bot, monkeypatch):
+    metrics = bot.Metrics(enabled=True)
+    monkeypatch.setattr(bot, "METRICS", metrics)
+
+    def broken(*args, **kwargs):
+        raise ValueError("kaputt")
+    monkeypatch.setattr(bot, "kraken_request", broken)
+    bot.fetch_prices(["XETHZEUR", "SOLEUR"])
+    bot.fetch_prices(["SOLEUR", "ADAEUR"])
+    assert metrics.counters == {("price_fetch_failures_total", (("pair", "batch"),)): 2}
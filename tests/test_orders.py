@@ -0,0 +1,15 @@
+def test_order_text_without_catalog_has_no_padding(bot, monkeypatch):
+    monkeypatch.setattr(bot, "ASSET_PAIRS", bot.AssetPairCatalog(path=None))
+    volume_units, price_units = bot.ASSET_PAIRS.normalize_order("XETHZEUR", 0.01, 2345.12)
+    assert bot.ASSET_PAIRS.format_price("XETHZEUR", price_units) == "2345.12"
+    assert bot.ASSET_PAIRS.format_volume("XETHZEUR", volume_units) == "0.01"
+    assert bot.ASSET_PAIRS.format_price("XETHZEUR", bot.to_units(2345, bot.PRICE_DECIMALS)) == "2345"
+
+
+def test_real_order_refused_without_catalog(bot, monkeypatch):
+    monkeypatch.setattr(bot, "ASSET_PAIRS", bot.AssetPairCatalog(path=None))
+    monkeypatch.setattr(bot, "SIMUL", False)
+    sent = []
+    monkeypatch.setattr(bot, "kraken_request", lambda *a, **kw: sent.append(a))
+    assert bot.execute_trade("XETHZEUR", "buy", 0.01, 2345.12, "test") is False
+    assert sent == []
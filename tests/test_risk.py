@@ -0,0 +1,79 @@
+import pytest
+
+
+@pytest.fixture
+def books(bot, monkeypatch):
+    monkeypatch.setattr(bot, "LEDGER", bot.PositionLedger("fifo"))
+    monkeypatch.setattr(bot, "RISK", bot.RiskEngine())
+    monkeypatch.setattr(bot, "SIMUL", True)
+    monkeypatch.setattr(bot, "SIMUL_WALLET_VALUE", bot.Amount.parse("10000", bot.QUOTE_DECIMALS))
+    monkeypatch.setattr(bot, "SIMUL_ASSETS", {})
+    monkeypatch.setattr(bot, "STOP_LOSS_DYNAMIC", 0.02)
+    monkeypatch.setattr(bot, "TAKE_PROFIT_DYNAMIC", 0.5)
+    monkeypatch.setattr(bot, "TRAILING_STOP_DYNAMIC", None)
+    monkeypatch.setattr(bot.JOURNAL, "record", lambda rec: None)
+    return bot
+
+
+def open_lots(bot, pair):
+    ledger = [(lot_id, volume / 10 ** bot.VOLUME_DECIMALS, price / 10 ** bot.PRICE_DECIMALS)
+              for lot_id, volume, price in bot.LEDGER.get(pair).open_lots()]
+    risk = [(lot_id, volume, price) for lot_id, (volume, price) in bot.RISK.pairs[pair].lots.items()]
+    return ledger, risk
+
+
+def test_triggered_stop_closes_the_same_lot_in_ledger_and_risk(books):
+    bot, pair = books, "XETHZEUR"
+    assert bot.execute_trade(pair, "buy", 1.0, 115.0, "test")
+    assert bot.execute_trade(pair, "buy", 1.0, 120.0, "test")
+
+    bot.BotThread().check_risk(pair, 117.5)  # nur der Stop des 120er-Lots (117.6) liegt darüber
+
+    ledger, risk = open_lots(bot, pair)
+    assert ledger == [(0, 1.0, 115.0)]
+    assert risk == [(0, 1.0, 115.0)]
+    assert bot.LEDGER.realized_pnl == pytest.approx(-2.5)
+    assert bot.RISK.nearest(pair)[0] == pytest.approx(112.7)
+
+    # Wiederanlauf: Trigger aus dem Ledger ergeben dasselbe Lot
+    bot.RISK.sync_from_ledger(bot.LEDGER)
+    assert open_lots(bot, pair)[1] == [(0, 1.0, 115.0)]
+    assert bot.RISK.nearest(pair)[0] == pytest.approx(112.7)
+
+    # Weiterer Kauf und FIFO-Verkauf bleiben in beiden Büchern deckungsgleich
+    assert bot.execute_trade(pair, "buy", 1.0, 118.0, "test")
+    assert bot.execute_trade(pair, "sell", 1.0, 119.0, "test")
+    ledger, risk = open_lots(bot, pair)
+    assert [lot_id for lot_id, *_ in ledger] == [lot_id for lot_id, *_ in risk] == [2]
+
+
+def test_unsellable_dust_lot_is_not_rearmed(books, monkeypatch):
+    bot, pair = books, "XETHZEUR"
+    assert bot.execute_trade(pair, "buy", 1.0, 120.0, "test")
+
+    def too_small(pair, volume, price):
+        raise ValueError("unter Mindestmenge")
+    monkeypatch.setattr(bot.ASSET_PAIRS, "normalize_order", too_small)
+    attempts = []
+    monkeypatch.setattr(bot, "execute_trade", lambda *a, **kw: attempts.append(a))
+    thread = bot.BotThread()
+    for _ in range(3):
+        thread.check_risk(pair, 117.0)
+    assert attempts == []
+    assert bot.RISK.on_price(pair, 100.0) == []
+
+
+def test_failed_trigger_sell_retries_with_backoff(books, monkeypatch):
+    bot, pair = books, "XETHZEUR"
+    assert bot.execute_trade(pair, "buy", 1.0, 120.0, "test")
+    attempts = []
+    monkeypatch.setattr(bot, "execute_trade", lambda *a, **kw: attempts.append(a) or False)
+    thread = bot.BotThread()
+    thread.check_risk(pair, 117.0)
+    thread.check_risk(pair, 117.0)
+    assert len(attempts) == 1
+
+    thread.risk_retries[(pair, 0)][0] = 0.0  # Wartezeit abgelaufen
+    thread.check_risk(pair, 117.0)
+    thread.check_risk(pair, 117.0)
+    assert len(attempts) == 2
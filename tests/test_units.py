@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.mark.parametrize("value, rounding, expected", [
+    ("1.234567891", "floor", 123456789),
+    ("1.234567891", "ceil", 123456790),
+    ("-1.234567891", "floor", -123456790),
+    ("-1.234567891", "ceil", -123456789),
+    ("-0.000000015", "half_even", -2),
+    ("-0.000000025", "half_even", -2),
+    ("-1e-9", "floor", -1),
+    ("-1e-9", "ceil", 0),
+])
+def test_to_units_string_rounding(bot, value, rounding, expected):
+    assert bot.to_units(value, 8, rounding) == expected
+
+
+@pytest.mark.parametrize("value", [-1.234567891, -0.1, -2.5e-9, -123.456789015, 0.30000000000000004])
+@pytest.mark.parametrize("rounding", ["floor", "ceil", "half_even"])
+def test_to_units_float_matches_string(bot, value, rounding):
+    assert bot.to_units(value, 8, rounding) == bot.to_units(repr(value), 8, rounding)